@@ -1,32 +1,121 @@
 from __future__ import annotations
 import os
+import time
+from contextlib import contextmanager
+import click
 from flask import Flask
 from flask_migrate import Migrate
 from models.models import db
+from models.storage import database_url, pick_profile, install_pragmas
+
+
+@contextmanager
+def _timed(timings: dict[str, float], phase: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = round((time.perf_counter() - t0) * 1000, 2)
+
+
+def run_seed(force: bool = False) -> bool:
+    from seed_courses import seed as seed_courses
+    try:
+        return seed_courses(db.session, force=force)
+    except Exception:
+        db.session.rollback()
+        raise
+
 
 def create_app() -> Flask:
     app = Flask(__name__)
+    timings: dict[str, float] = {}
+    t0 = time.perf_counter()
 
     base_dir = os.path.abspath(os.path.dirname(__file__))
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(base_dir, 'planner.db')}"
+    # DATABASE_URL / PLANNER_DB_PROFILE / PLANNER_DB_POOL_SIZE, see models/storage.py
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url(f"sqlite:///{os.path.join(base_dir, 'planner.db')}")
+    profile = pick_profile(app.config["SQLALCHEMY_DATABASE_URI"])
+    app.config["DB_PROFILE"] = profile.name
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = dict(profile.engine_options)
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # PLANNER_SEED_ON_STARTUP=0 leaves seeding to `flask seed`
+    app.config["SEED_ON_STARTUP"] = os.environ.get("PLANNER_SEED_ON_STARTUP", "1") != "0"
+    # PLANNER_METRICS=0 turns off per-request SQL/timing instrumentation and /metrics
+    app.config["METRICS"] = os.environ.get("PLANNER_METRICS", "1") != "0"
+    # PLANNER_PROFILE_DIR turns on ?profile= / X-Profile request profiling, see routes/profiling.py
+    app.config["PROFILE_DIR"] = os.environ.get("PLANNER_PROFILE_DIR") or None
+    app.config["PROFILE_KEEP"] = int(os.environ.get("PLANNER_PROFILE_KEEP", "50"))
+    app.config["PROFILE_TOKEN"] = os.environ.get("PLANNER_PROFILE_TOKEN") or None
 
     db.init_app(app)
     Migrate(app, db)
 
-    from routes.routes import bp  # your Blueprint with routes
-    app.register_blueprint(bp)
+    with _timed(timings, "routes"):
+        from routes.routes import bp  # your Blueprint with routes
+        app.register_blueprint(bp)
 
-    # Build tables and seed on startup (safe if they already exist)
+    # Build tables and seed on startup (safe if they already exist; an
+    # unchanged seed is skipped after one lookup, see seed_courses.seed_fingerprint)
     with app.app_context():
-        db.create_all()
+        install_pragmas(db.engine, profile)
+        if app.config["METRICS"]:
+            from routes.metrics import install_metrics
+            install_metrics(app, db.engine)
+        if app.config["PROFILE_DIR"]:
+            from routes.profiling import install_profiling
+            install_profiling(app, app.config["PROFILE_DIR"], app.config["PROFILE_KEEP"], app.config["PROFILE_TOKEN"])
+        with _timed(timings, "create_all"):
+            db.create_all()
+        with _timed(timings, "search_index"):
+            from models.search import ensure_course_search
+            app.config["COURSE_FTS"] = ensure_course_search(db.engine)
+        if app.config["SEED_ON_STARTUP"]:
+            with _timed(timings, "seed"):
+                app.config["SEEDED"] = run_seed()
+
+    timings["total"] = round((time.perf_counter() - t0) * 1000, 2)
+    app.config["STARTUP_TIMINGS"] = timings
+    app.logger.info("startup timings (ms): %s (seed ran: %s)", timings, app.config.get("SEEDED", False))
+
+    @app.cli.command("seed")
+    @click.option("--force", is_flag=True, help="Reseed even if the seed fingerprint is unchanged.")
+    def seed_command(force: bool):
+        """Load the demo user, catalog, prereqs and degree groups."""
+        t = time.perf_counter()
+        ran = run_seed(force=force)
+        ms = (time.perf_counter() - t) * 1000
+        click.echo(f"seed {'applied' if ran else 'unchanged, skipped'} in {ms:.1f} ms")
+
+    @app.cli.command("load-catalog")
+    @click.argument("directory", type=click.Path(exists=True, file_okay=False))
+    @click.option("--batch-size", default=1000, show_default=True, help="Rows per INSERT batch.")
+    def load_catalog_command(directory: str, batch_size: int):
+        """Upsert catalog/offering/prereq/program/group files from DIRECTORY."""
+        from catalog_loader import load_catalog
+        t = time.perf_counter()
+        results = load_catalog(db.session, directory, batch_size=batch_size)
+        for stats in results:
+            click.echo(str(stats))
+            for msg in stats.malformed:
+                click.echo(f"  skipped {msg}")
+        total = sum(s.rows for s in results)
+        secs = time.perf_counter() - t
+        click.echo(f"{'total':<14} {total:>8} rows in {secs:.2f} s ({total / secs if secs else 0:.0f} rows/s)")
+
+    @app.cli.command("audit-cohort")
+    @click.argument("program_code")
+    @click.option("-o", "--out", type=click.File("w"), default="-", help="JSONL output file (default stdout).")
+    @click.option("--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 = inline).")
+    @click.option("--completed-only", is_flag=True, help="Only count COMPLETED enrollments.")
+    def audit_cohort_command(program_code: str, out, workers: int | None, completed_only: bool):
+        """Audit every student against PROGRAM_CODE, one JSON line per student."""
+        from cohort_audit import audit_cohort
         try:
-            from seed_courses import seed as seed_courses
-            seed_courses(db.session)
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
-            raise
+            stats = audit_cohort(db.session, program_code, out, workers=workers, include_planned=not completed_only)
+        except LookupError as e:
+            raise click.ClickException(str(e))
+        click.echo(str(stats), err=True)
 
     return app
 
@@ -0,0 +1,361 @@
+"""
+Concurrent load generator: how many students can one worker serve?
+
+Each thread is one student running planner sessions back to back, the way
+the browser does:
+1. load the semesters
+2. open the class modal (/api/requirements for a planned semester)
+3. search the catalog and type into the modal (/api/requirements?q=)
+4. add a class from the results
+5. reload the semesters
+6. delete the class again
+
+Threads get different students, wrapping around when there are more
+threads than students. Every --concurrency level runs for --seconds. For
+each endpoint it reports throughput, p50/p90/p99/max latency, the DB share
+of the time (from the Server-Timing header), 4xx and 5xx counts, and 503s
+("database busy"). A summary at the end puts the --focus endpoint
+(default: the modal's /api/requirements) next to the throughput at each
+level.
+
+By default the app runs in this process, on a scratch SQLite file filled
+by bench/synthetic.py (--scale). All threads then share one interpreter,
+as they would in one worker. In this mode SQLite lock contention is
+measured as well, per endpoint:
+- lock ms: time spent in the lock_plan() UPDATE, where a plan write waits
+  for the write lock
+- locked: "database is locked" errors that made @retry_on_conflict rerun
+  a write
+
+With --url the requests go over HTTP to a server that is already running,
+e.g. `flask run` or gunicorn with one worker. It uses that server's data:
+the demo user, or --users.
+
+    python -m bench.load [--concurrency 1,2,4,8,16] [--seconds 10] [--scale small]
+    python -m bench.load --url http://127.0.0.1:5000 [--users 1-50] [--program BS-CS-Core-2025]
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any
+from urllib.parse import quote, urlsplit
+
+_SERVER_TIMING_DB = re.compile(r"(?:^|,)\s*db;dur=([\d.]+)")
+
+
+def _pct(sorted_ms: list[float], q: float) -> float:
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * q))] if sorted_ms else 0.0
+
+
+class Recorder:
+    """Latencies and outcomes per endpoint, shared by all threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: dict[str, list[float]] = defaultdict(list)
+        self.db_ms: dict[str, float] = defaultdict(float)
+        self.status: dict[str, Counter] = defaultdict(Counter)
+        self.lock_ms: dict[str, float] = defaultdict(float)
+        self.locked: dict[str, int] = defaultdict(int)
+        self.failures: list[str] = []
+
+    def add(self, endpoint: str, ms: float, status: int, db_ms: float) -> None:
+        with self._lock:
+            self.latency[endpoint].append(ms)
+            self.db_ms[endpoint] += db_ms
+            self.status[endpoint][status] += 1
+
+    def fail(self, endpoint: str, ms: float, error: str) -> None:
+        with self._lock:
+            self.latency[endpoint].append(ms)
+            self.status[endpoint][0] += 1
+            self.failures.append(f"{endpoint}: {error}")
+
+    def contention(self, endpoint: str, wait_ms: float = 0.0, locked: int = 0) -> None:
+        with self._lock:
+            self.lock_ms[endpoint] += wait_ms
+            self.locked[endpoint] += locked
+
+    def report(self, seconds: float) -> dict[str, dict[str, Any]]:
+        out = {}
+        for ep, lat in sorted(self.latency.items()):
+            s = sorted(lat)
+            st = self.status[ep]
+            out[ep] = {
+                "n": len(s),
+                "rps": round(len(s) / seconds, 2),
+                "p50_ms": round(_pct(s, 0.50), 2),
+                "p90_ms": round(_pct(s, 0.90), 2),
+                "p99_ms": round(_pct(s, 0.99), 2),
+                "max_ms": round(s[-1], 2),
+                "db_share": round(self.db_ms[ep] / sum(s), 3) if sum(s) else 0.0,
+                "4xx": sum(n for code, n in st.items() if 400 <= code < 500),
+                "5xx": sum(n for code, n in st.items() if code >= 500),
+                "busy_503": st.get(503, 0),
+                "failed": st.get(0, 0),
+                "lock_ms": round(self.lock_ms.get(ep, 0.0), 1),
+                "locked": self.locked.get(ep, 0),
+            }
+        return out
+
+
+class InProcessTarget:
+    """Requests through Flask's test client, one client per thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: Any = None) -> tuple[int, dict[str, str], bytes]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        r = client.open(path, method=method, json=body)
+        try:
+            return r.status_code, dict(r.headers), r.get_data()  # drains a streamed body
+        finally:
+            r.close()
+
+
+class HttpTarget:
+    """Requests to a running server, one keep-alive connection per thread."""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: Any = None) -> tuple[int, dict[str, str], bytes]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            r = conn.getresponse()
+            return r.status, dict(r.getheaders()), r.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+class Student:
+    """One simulated student running planner sessions against a target."""
+
+    def __init__(self, target, rec: Recorder, user_id: int | None, program: str, terms: list[str], rnd: random.Random, think_ms: float):
+        self.target = target
+        self.rec = rec
+        self.user = f"user_id={user_id}" if user_id else ""
+        self.program = program
+        self.terms = terms
+        self.rnd = rnd
+        self.think = think_ms / 1000
+
+    def call(self, endpoint: str, method: str, path: str, body: Any = None) -> tuple[int, Any]:
+        sep = "&" if "?" in path else "?"
+        url = f"{path}{sep}{self.user}" if self.user else path
+        _current.endpoint, _current.rec = endpoint, self.rec
+        t0 = time.perf_counter()
+        try:
+            status, headers, data = self.target.request(method, url, body)
+        except Exception as e:  # a dead connection or a crashed view counts against the endpoint
+            self.rec.fail(endpoint, (time.perf_counter() - t0) * 1000, repr(e))
+            return 0, None
+        finally:
+            _current.endpoint = None
+        ms = (time.perf_counter() - t0) * 1000
+        m = _SERVER_TIMING_DB.search(headers.get("Server-Timing", ""))
+        self.rec.add(endpoint, ms, status, float(m.group(1)) if m else 0.0)
+        if self.think:
+            time.sleep(self.rnd.uniform(0, 2 * self.think))
+        if status >= 400 or not data:
+            return status, None
+        return status, json.loads(data)
+
+    def session(self) -> None:
+        _, sems = self.call("GET /api/semesters", "GET", "/api/semesters")
+        if not sems:
+            return
+        sem = self.rnd.choice(sems)
+        modal = f"/api/requirements?program={quote(self.program)}&current_semester_id={sem['id']}&current_order={sem['order']}"
+        if sem.get("term"):
+            modal += f"&current_term={sem['term']}"
+        self.call("GET /api/requirements", "GET", modal)
+        term = self.rnd.choice(self.terms)
+        _, found = self.call("GET /api/courses", "GET", f"/api/courses?unassigned=1&q={quote(term)}")
+        self.call("GET /api/requirements", "GET", f"{modal}&q={quote(term.lower())}")
+        if not found:
+            return
+        status, added = self.call(
+            "POST /api/classes", "POST", "/api/classes",
+            {"course_id": self.rnd.choice(found)["id"], "semester_id": sem["id"]},
+        )
+        self.call("GET /api/semesters", "GET", "/api/semesters")
+        if status == 201 and added:
+            self.call("DELETE /api/classes/<id>", "DELETE", f"/api/classes/{added['id']}")
+
+
+# which endpoint the calling thread is in, and its recorder, for the SQLite contention hooks
+_current = threading.local()
+
+
+def _install_contention_hooks(engine) -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(_conn, _cursor, statement, _params, context, _executemany):
+        if statement.startswith("UPDATE user SET plan_version"):  # lock_plan()
+            context._load_lock_t0 = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(_conn, _cursor, _statement, _params, context, _executemany):
+        t0 = getattr(context, "_load_lock_t0", None)
+        ep = getattr(_current, "endpoint", None)
+        if t0 is not None and ep:
+            _current.rec.contention(ep, wait_ms=(time.perf_counter() - t0) * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        ep = getattr(_current, "endpoint", None)
+        if ep and "locked" in str(ctx.original_exception).lower():
+            _current.rec.contention(ep, locked=1)
+
+
+def in_process_app(scale: str, workdir: str):
+    """Boot the app on a scratch SQLite file filled with the synthetic dataset; returns (app, user ids, program)."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    os.environ["PLANNER_SEED_ON_STARTUP"] = "0"
+    os.environ.setdefault("PLANNER_SLOW_REQUEST_MS", "1e9")  # the slow log would drown the report
+    os.environ.setdefault("PLANNER_SLOW_QUERY_MS", "1e9")
+    from sqlalchemy import select
+
+    from app import app
+    from bench.synthetic import SCALES, populate
+    from models.models import db, User
+
+    with app.app_context():
+        _install_contention_hooks(db.engine)
+        data = populate(db.session, SCALES[scale])
+        users = list(db.session.execute(select(User.id).order_by(User.id)).scalars())
+    print(f"{scale}: {data['courses']} courses, {data['students']} students, {data['enrollments']} enrollments")
+    return app, users, "SYN-0"
+
+
+def search_terms(target) -> list[str]:
+    """Department prefixes and title words from the first catalog page, like a student would type."""
+    _, _, body = target.request("GET", "/api/courses?unassigned=0&limit=200")
+    terms = set()
+    for c in json.loads(body):
+        terms.add(c["code"].split()[0])
+        terms.update(w for w in c["title"].split() if len(w) > 3)
+    return sorted(terms) or ["intro"]
+
+
+def run_level(target, users, program, terms, concurrency: int, seconds: float, think_ms: float, seed: int):
+    rec = Recorder()
+    deadline = time.perf_counter() + seconds
+    sessions = [0] * concurrency
+
+    def run(tid: int) -> None:
+        student = Student(
+            target, rec, users[tid % len(users)] if users else None, program, terms,
+            random.Random(seed * 1000 + tid), think_ms,
+        )
+        while time.perf_counter() < deadline:
+            student.session()
+            sessions[tid] += 1
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    secs = time.perf_counter() - t0
+    return rec, sum(sessions), secs
+
+
+def _parse_users(spec: str | None) -> list[int]:
+    if not spec:
+        return []
+    out = []
+    for part in spec.split(","):
+        lo, _, hi = part.partition("-")
+        out.extend(range(int(lo), int(hi or lo) + 1))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Concurrent planner sessions; latency percentiles per endpoint.")
+    ap.add_argument("--concurrency", default="1,2,4,8,16", help="comma-separated thread counts, one run each")
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--think-ms", type=float, default=0, help="mean pause after each request")
+    ap.add_argument("--scale", default="small", help="synthetic dataset for the in-process app")
+    ap.add_argument("--url", help="load a running server instead, e.g. http://127.0.0.1:5000")
+    ap.add_argument("--users", help="with --url: student ids, e.g. 1-50 (default: the demo user)")
+    ap.add_argument("--program", help="degree program code for the modal (default: SYN-0 in process, BS-CS-Core-2025 with --url)")
+    ap.add_argument("--focus", default="GET /api/requirements", help="endpoint for the summary table")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="write all results here as JSON")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            target = HttpTarget(args.url)
+            users, program = _parse_users(args.users), args.program or "BS-CS-Core-2025"
+        else:
+            app, users, program = in_process_app(args.scale, tmp)
+            program = args.program or program
+            target = InProcessTarget(app)
+
+        terms = search_terms(target)
+        # warm-up: snapshot build, compiled audits, first connections
+        run_level(target, users, program, terms, 1, 0.5, 0, args.seed)
+
+        levels = []
+        for conc in (int(c) for c in args.concurrency.split(",")):
+            rec, sessions, secs = run_level(target, users, program, terms, conc, args.seconds, args.think_ms, args.seed)
+            endpoints = rec.report(secs)
+            total = sum(e["n"] for e in endpoints.values())
+            levels.append({
+                "concurrency": conc, "seconds": round(secs, 2), "sessions": sessions,
+                "sessions_per_s": round(sessions / secs, 2), "requests_per_s": round(total / secs, 2),
+                "endpoints": endpoints, "failures": rec.failures[:20],
+            })
+            print(f"\n== {conc} concurrent: {sessions} sessions, {total} requests in {secs:.1f} s "
+                  f"({total / secs:.0f} req/s)")
+            print(f"{'endpoint':<26} {'n':>6} {'req/s':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} "
+                  f"{'db%':>5} {'4xx':>5} {'5xx':>5} {'503':>5} {'lock ms':>8} {'locked':>7}")
+            for ep, e in endpoints.items():
+                print(f"{ep:<26} {e['n']:>6} {e['rps']:>7.1f} {e['p50_ms']:>8.2f} {e['p90_ms']:>8.2f} "
+                      f"{e['p99_ms']:>8.2f} {e['max_ms']:>8.2f} {e['db_share'] * 100:>4.0f}% {e['4xx']:>5} "
+                      f"{e['5xx']:>5} {e['busy_503']:>5} {e['lock_ms']:>8.1f} {e['locked']:>7}")
+            for f in rec.failures[:5]:
+                print("failed:", f)
+
+    print(f"\nsummary for {args.focus}")
+    print(f"{'threads':>7} {'sessions/s':>11} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for lv in levels:
+        e = lv["endpoints"].get(args.focus, {})
+        errors = sum(x["5xx"] + x["failed"] for x in lv["endpoints"].values())
+        print(f"{lv['concurrency']:>7} {lv['sessions_per_s']:>11.1f} {lv['requests_per_s']:>8.0f} "
+              f"{e.get('p50_ms', 0):>8.2f} {e.get('p99_ms', 0):>8.2f} {errors:>7}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": levels}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
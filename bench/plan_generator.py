@@ -0,0 +1,117 @@
+"""
+Time the plan generator (models/plan_solver.py) on synthetic deep-prereq catalogs.
+
+Builds a --courses catalog in --levels prereq layers, split into --tracks
+sequences. Each course above the first layer of its track has one or two
+OR-groups of 1-2 prereqs from lower layers of the same track, mostly the
+layer just below, so chains run up to --levels deep. About a fifth of the
+rules allow concurrency. Offerings are random FALL/SPRING/both. A
+program of --required ALL courses plus ANY_COUNT picks is generated over
+it, and an empty plan of --semesters alternating FALL/SPRING terms is
+filled under each --budgets value. No database is needed.
+
+    python -m bench.plan_generator [--courses 1500] [--levels 12] [--required 16] [--semesters 16]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from types import MappingProxyType
+
+from models.catalog import (
+    CatalogSnapshot,
+    CourseRow,
+    GroupCourseRow,
+    GroupRow,
+    PrereqGroup,
+    PrereqRule,
+    ProgramRow,
+)
+from models.audit import compile_program_audit
+from models.models import TERM_BITS
+from models.plan_solver import OpenSlot, generate_plan
+from models.prereqs import compile_prereq_graph, compile_prereq_index
+
+
+def synthetic_snapshot(rnd: random.Random, n: int, levels: int, tracks: int) -> tuple[CatalogSnapshot, list[list[int]]]:
+    # courses belong to a track (think department sequence) and only require
+    # lower layers of their own track, like a real catalog
+    layers: list[list[int]] = [[] for _ in range(levels)]
+    by_track: dict[tuple[int, int], list[int]] = {}
+    courses = {}
+    prereqs = {}
+    for cid in range(1, n + 1):
+        track = rnd.randrange(tracks)
+        lvl = min(levels - 1, int(rnd.random() ** 1.3 * levels))
+        layers[lvl].append(cid)
+        by_track.setdefault((track, lvl), []).append(cid)
+        mask = rnd.choice([TERM_BITS["FALL"], TERM_BITS["SPRING"], TERM_BITS["FALL"] | TERM_BITS["SPRING"]])
+        courses[cid] = CourseRow(cid, f"SYN {cid:04d}", "t", None, rnd.choice([2.0, 3.0, 3.0, 4.0]), "SYN", None, cid, mask)
+    for (track, lvl), ids in by_track.items():
+        lower = [by_track[(track, k)] for k in range(lvl) if (track, k) in by_track]
+        if not lower:
+            continue
+        for cid in ids:
+            groups = []
+            for gk in range(rnd.choice([1, 1, 2])):
+                # mostly the nearest lower layer, so chains run deep
+                src = lower[-1] if rnd.random() < 0.7 else rnd.choice(lower)
+                rules = {
+                    p: PrereqRule(p, None, rnd.random() < 0.2)
+                    for p in rnd.sample(src, min(len(src), rnd.randint(1, 2)))
+                }
+                groups.append(PrereqGroup(gk + 1, tuple(rules.values())))
+            prereqs[cid] = tuple(groups)
+    index = compile_prereq_index(courses.keys(), prereqs)
+    snap = CatalogSnapshot(
+        "1", MappingProxyType(courses), MappingProxyType({}), MappingProxyType({}),
+        MappingProxyType(prereqs), MappingProxyType({}), index, compile_prereq_graph(index, prereqs),
+    )
+    return snap, layers
+
+
+def synthetic_program(rnd: random.Random, layers: list[list[int]], required: int) -> ProgramRow:
+    # required courses spread over all layers so the deep ones drag their chains in
+    pool = [cid for layer in layers for cid in layer]
+    core = rnd.sample(pool, required)
+    rest = [cid for cid in pool if cid not in set(core)]
+    groups = [GroupRow(1, "Core", "ALL", 0, 0, False, 0, None, None, tuple(GroupCourseRow(c, None) for c in core))]
+    for i in range(6):
+        opts = rnd.sample(rest, 12)
+        groups.append(GroupRow(
+            i + 2, f"Elective {i}", "ANY_COUNT", rnd.randint(2, 4), 0, False, i + 1, None, None,
+            tuple(GroupCourseRow(c, None) for c in opts),
+        ))
+    return ProgramRow(1, "SYN", "Synthetic", 120, tuple(groups))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Time the plan generator on synthetic deep-prereq catalogs.")
+    ap.add_argument("--courses", type=int, default=1500)
+    ap.add_argument("--levels", type=int, default=12)
+    ap.add_argument("--tracks", type=int, default=60)
+    ap.add_argument("--required", type=int, default=16)
+    ap.add_argument("--semesters", type=int, default=16)
+    ap.add_argument("--budgets", default="5,50,200,1000", help="comma-separated budgets in ms")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    snap, layers = synthetic_snapshot(rnd, args.courses, args.levels, args.tracks)
+    prog = synthetic_program(rnd, layers, args.required)
+    pa = compile_program_audit(prog)
+    slots = [
+        OpenSlot(i + 1, i, TERM_BITS["FALL"] if i % 2 == 0 else TERM_BITS["SPRING"], 8, 18.0)
+        for i in range(args.semesters)
+    ]
+    needed = sum(g.need for g in pa.groups)
+    print(f"{args.courses} courses in {args.levels} layers, program needs {needed} courses, {len(slots)} open semesters")
+    print(f"{'budget':>8} {'passes':>7} {'time':>9} {'added':>6} {'terms':>6} {'missing':>8}")
+    for budget in (float(b) for b in args.budgets.split(",")):
+        plan = generate_plan(snap, pa, {}, {}, slots, budget_ms=budget)
+        missing, span, added = plan.score()
+        print(f"{budget:>6.0f}ms {plan.passes:>7} {plan.elapsed_ms:>7.1f}ms {added:>6} {span + 1:>6} {missing:>8}")
+
+
+if __name__ == "__main__":
+    main()
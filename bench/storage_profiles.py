@@ -0,0 +1,151 @@
+"""
+Read/write throughput per storage profile (models/storage.py).
+
+Each profile gets a fresh SQLite file with one plan per writer. Reader
+threads load a plan the way /api/semesters does (semesters joined to
+classes and catalog rows). Writer threads add a class and remove it
+again, one transaction each. Reported per profile: reads/s, writes/s,
+p50/p99 write latency, and how many operations failed with "database is
+locked".
+
+    python -m bench.storage_profiles [--seconds 5] [--readers 4] [--writers 2]
+
+With DATABASE_URL set to a server database, the "server" profile runs
+against it too. It creates the tables and writes rows there, so point
+it at a scratch database.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.exc import OperationalError
+
+from models.models import db, User, StudentSemester, StudentCourse, CourseCatalog, ORDER_GAP
+from models.storage import PROFILES, install_pragmas, database_url
+
+N_COURSES = 400
+N_SEMESTERS = 8
+
+
+def setup(engine, n_users: int) -> None:
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(CourseCatalog), [
+            {"code": f"BNCH {100 + i}", "title": f"Bench course {i}", "credits": 3.0,
+             "department": "BNCH", "number": 100 + i, "level": str((100 + i) // 100 * 100), "term_mask": 7}
+            for i in range(N_COURSES)
+        ])
+        for u in range(n_users):
+            uid = conn.execute(insert(User).values(email=f"bench{u}@example.com", name="Bench", plan_version=0)).inserted_primary_key[0]
+            conn.execute(insert(StudentSemester), [
+                {"student_id": uid, "name": f"S{i}", "term": "FALL", "year": 2000 + i, "order": i * ORDER_GAP}
+                for i in range(N_SEMESTERS)
+            ])
+
+
+def run_profile(url: str, profile, seconds: float, readers: int, writers: int) -> dict:
+    engine = create_engine(url, **profile.engine_options)
+    install_pragmas(engine, profile)
+    setup(engine, max(writers, 1))
+    with engine.connect() as conn:
+        users = [r[0] for r in conn.execute(select(User.id).where(User.email.like("bench%")))]
+        sems = {u: [r[0] for r in conn.execute(select(StudentSemester.id).where(StudentSemester.student_id == u))] for u in users}
+        course_ids = [r[0] for r in conn.execute(select(CourseCatalog.id).where(CourseCatalog.code.like("BNCH %")))]
+
+    stop = time.perf_counter() + seconds
+    reads = [0] * readers
+    write_lat: list[list[float]] = [[] for _ in range(writers)]
+    locked = [0]
+    lock = threading.Lock()
+
+    plan_q = (
+        select(StudentSemester.id, StudentSemester.name, StudentCourse.id, StudentCourse.position, CourseCatalog.code)
+        .outerjoin(StudentCourse, StudentCourse.semester_id == StudentSemester.id)
+        .outerjoin(CourseCatalog, CourseCatalog.id == StudentCourse.course_id)
+    )
+
+    def reader(i: int) -> None:
+        rnd = random.Random(i)
+        while time.perf_counter() < stop:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(plan_q.where(StudentSemester.student_id == rnd.choice(users))).all()
+                reads[i] += 1
+            except OperationalError:
+                with lock:
+                    locked[0] += 1
+
+    def writer(i: int) -> None:
+        uid = users[i]
+        rnd = random.Random(1000 + i)
+        pos = 0
+        while time.perf_counter() < stop:
+            pos += ORDER_GAP
+            t0 = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    sc_id = conn.execute(insert(StudentCourse).values(
+                        student_id=uid, semester_id=rnd.choice(sems[uid]), course_id=rnd.choice(course_ids),
+                        credits=3.0, position=pos, status="PLANNED",
+                    )).inserted_primary_key[0]
+                with engine.begin() as conn:
+                    conn.execute(delete(StudentCourse).where(StudentCourse.id == sc_id))
+                write_lat[i].append((time.perf_counter() - t0) / 2)
+            except OperationalError:
+                with lock:
+                    locked[0] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    lat = sorted(x for per in write_lat for x in per)
+    n_writes = 2 * len(lat)
+    return {
+        "profile": profile.name,
+        "reads_per_s": sum(reads) / seconds,
+        "writes_per_s": n_writes / seconds,
+        "write_p50_ms": statistics.median(lat) * 1000 if lat else 0.0,
+        "write_p99_ms": lat[int(len(lat) * 0.99) - 1] * 1000 if lat else 0.0,
+        "locked": locked[0],
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--readers", type=int, default=4)
+    ap.add_argument("--writers", type=int, default=2)
+    ap.add_argument("--profiles", default="legacy,wal,bulk")
+    args = ap.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.profiles.split(","):
+            url = f"sqlite:///{os.path.join(tmp, name + '.db')}"
+            runs.append(run_profile(url, PROFILES[name], args.seconds, args.readers, args.writers))
+    server_url = database_url("")
+    if server_url and not server_url.startswith("sqlite"):
+        runs.append(run_profile(server_url, PROFILES["server"], args.seconds, args.readers, args.writers))
+
+    print(f"{'profile':<8} {'reads/s':>10} {'writes/s':>10} {'w p50 ms':>9} {'w p99 ms':>9} {'locked':>7}")
+    for r in runs:
+        print(
+            f"{r['profile']:<8} {r['reads_per_s']:>10.0f} {r['writes_per_s']:>10.0f} "
+            f"{r['write_p50_ms']:>9.2f} {r['write_p99_ms']:>9.2f} {r['locked']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Concurrent write load for the plan endpoints.
+
+Several worker processes, each with a few threads, play the role of
+gunicorn workers. They hammer one student's plan with adds, moves,
+deletes and batches against a scratch SQLite file, then print the write
+throughput and the mix of statuses (409s and 503s included). This is for
+load numbers. Conflict regressions are caught by tests/test_writes.py.
+As a sanity check it still fails on any 5xx or a broken invariant:
+- every semester is within MAX_CLASSES_PER_SEM and MAX_CREDITS_PER_SEM
+- no course is planned twice
+- no two classes share a semester position
+
+    python -m bench.stress_writes [--procs 4] [--threads 4] [--ops 150]
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+
+def _boot(db_path: str):
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    from app import app
+    return app
+
+
+def worker(db_path: str, seed: int, threads: int, ops: int) -> dict:
+    app = _boot(db_path)
+    statuses: collections.Counter = collections.Counter()
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def run(tid: int) -> None:
+        rnd = random.Random(seed * 100 + tid)
+        client = app.test_client()
+        courses = [c["id"] for c in client.get("/api/courses?unassigned=0&limit=200").get_json()]
+        sems = client.get("/api/semesters").get_json()
+        for _ in range(ops):
+            if rnd.random() < 0.2:
+                sems = client.get("/api/semesters").get_json()
+            sem_ids = [s["id"] for s in sems]
+            classes = [c for s in sems for c in s["classes"]]
+            kind = rnd.choices(["add", "move", "delete", "batch"], [5, 3, 2, 2])[0] if classes else "add"
+            if kind == "add":
+                r = client.post("/api/classes", json={"course_id": rnd.choice(courses), "semester_id": rnd.choice(sem_ids)})
+            elif kind == "move":
+                c = rnd.choice(classes)
+                body = {"semester_id": rnd.choice(sem_ids)}
+                if rnd.random() < 0.5:
+                    others = [o for o in classes if o["semester_id"] == body["semester_id"] and o["id"] != c["id"]]
+                    if others:
+                        body["before_id"] = rnd.choice(others)["id"]
+                r = client.patch(f"/api/classes/{c['id']}", json=body)
+            elif kind == "delete":
+                r = client.delete(f"/api/classes/{rnd.choice(classes)['id']}")
+            else:
+                batch = [{"op": "remove", "id": rnd.choice(classes)["id"]}]
+                batch += [{"op": "add", "course_id": rnd.choice(courses), "semester_id": rnd.choice(sem_ids)} for _ in range(2)]
+                r = client.post("/api/classes/batch", json={"ops": batch})
+            with lock:
+                statuses[f"{kind} {r.status_code}"] += 1
+                if r.status_code >= 500:
+                    errors.append(f"{kind} -> {r.status_code}: {r.get_data(as_text=True)[:200]}")
+
+    ts = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return {"statuses": dict(statuses), "errors": errors}
+
+
+def check_invariants(db_path: str) -> list[str]:
+    app = _boot(db_path)
+    from sqlalchemy import func
+    from models.models import db, StudentCourse
+    from routes.routes import MAX_CLASSES_PER_SEM, MAX_CREDITS_PER_SEM
+
+    problems = []
+    with app.app_context():
+        per_sem = (
+            db.session.query(StudentCourse.semester_id, func.count(), func.sum(StudentCourse.credits))
+            .group_by(StudentCourse.semester_id)
+        )
+        for sid, n, credits in per_sem:
+            if n > MAX_CLASSES_PER_SEM:
+                problems.append(f"semester {sid} has {n} classes")
+            if credits > MAX_CREDITS_PER_SEM:
+                problems.append(f"semester {sid} has {credits} credits")
+        dup_course = (
+            db.session.query(StudentCourse.student_id, StudentCourse.course_id)
+            .group_by(StudentCourse.student_id, StudentCourse.course_id)
+            .having(func.count() > 1).count()
+        )
+        dup_pos = (
+            db.session.query(StudentCourse.semester_id, StudentCourse.position)
+            .group_by(StudentCourse.semester_id, StudentCourse.position)
+            .having(func.count() > 1).count()
+        )
+        if dup_course:
+            problems.append(f"{dup_course} courses planned twice")
+        if dup_pos:
+            problems.append(f"{dup_pos} duplicate positions")
+    return problems
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Concurrent write stress test for the plan endpoints.")
+    ap.add_argument("--procs", type=int, default=4)
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--ops", type=int, default=150, help="requests per thread")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "stress.db")
+        ctx = mp.get_context("spawn")
+        with ctx.Pool(1) as pool:  # create + seed the database once, in its own process
+            pool.apply(_boot_only, (db_path,))
+        t0 = time.perf_counter()
+        with ctx.Pool(args.procs) as pool:
+            results = pool.starmap(worker, [(db_path, i, args.threads, args.ops) for i in range(args.procs)])
+        secs = time.perf_counter() - t0
+        with ctx.Pool(1) as pool:
+            problems = pool.apply(check_invariants, (db_path,))
+
+    statuses: collections.Counter = collections.Counter()
+    errors = []
+    for r in results:
+        statuses.update(r["statuses"])
+        errors.extend(r["errors"])
+    total = sum(statuses.values())
+    print(f"{total} writes from {args.procs} procs x {args.threads} threads in {secs:.1f} s ({total / secs:.0f}/s)")
+    for key in sorted(statuses):
+        print(f"  {key:<14} {statuses[key]}")
+    for e in errors[:10]:
+        print("5xx:", e)
+    for p in problems:
+        print("invariant broken:", p)
+    ok = not errors and not problems
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+def _boot_only(db_path: str) -> None:
+    _boot(db_path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
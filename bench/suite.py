@@ -0,0 +1,292 @@
+"""
+Benchmark every API route, DegreeProgram.audit_program and the seed at
+several data scales, and compare runs against stored JSON baselines.
+
+Each scale runs in its own process against a scratch SQLite file filled
+by bench/synthetic.py, because the catalog snapshot and the LRU caches are
+per process. Every case is timed --repeat times after one warm-up call.
+Read cases rotate through the synthetic students, so the per-user caches
+mostly miss, as on a student's first view. Write cases undo themselves
+(add then delete, move then move back), so the plan stays the same size.
+Reported per case: median, p90 and min in ms.
+
+    python -m bench.suite [--scales small,medium] [--repeat 20] [--out bench/baselines/mine.json]
+    python -m bench.suite --compare bench/baselines/mine.json [--threshold 0.25]
+
+With --compare the run is checked case by case against the baseline. A
+case regresses when its median is more than --threshold slower (25% by
+default) and also more than --min-ms slower in absolute terms. The script
+exits 1 if anything regressed. Baselines are only comparable on the same
+machine.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+DEFAULT_SCALES = "small,medium"
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    s = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(s), 3),
+        "p90_ms": round(s[min(len(s) - 1, int(len(s) * 0.9))], 3),
+        "min_ms": round(s[0], 3),
+        "n": len(s),
+    }
+
+
+def _time(fn: Callable[[int], Any], repeat: int) -> dict[str, float]:
+    fn(0)  # warm-up: snapshot build, first compile, etc.
+    samples = []
+    for i in range(1, repeat + 1):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return _summary(samples)
+
+
+def run_scale(name: str, repeat: int) -> dict[str, Any]:
+    """Build one scale in a scratch database and time every case; runs in a child process."""
+    workdir = tempfile.mkdtemp(prefix=f"planner-bench-{name}-")
+    try:
+        return _run_scale(name, repeat, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run_scale(name: str, repeat: int, workdir: str) -> dict[str, Any]:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["PLANNER_SEED_ON_STARTUP"] = "0"
+    os.environ.setdefault("PLANNER_SLOW_REQUEST_MS", "1e9")  # keep the slow log quiet
+    os.environ.setdefault("PLANNER_SLOW_QUERY_MS", "1e9")
+
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import Session
+
+    from app import app
+    from bench.synthetic import SCALES, populate
+    from models.catalog import get_catalog_snapshot
+    from models.models import db, DegreeProgram, StudentCourse, User
+    from seed_courses import seed
+
+    spec = SCALES[name]
+    out: dict[str, Any] = {"cases": {}}
+    cases = out["cases"]
+
+    # seed: the demo seed into its own fresh file, then again unchanged (fingerprint skip)
+    seed_engine = create_engine(f"sqlite:///{os.path.join(workdir, 'seed.db')}")
+    db.metadata.create_all(seed_engine)
+    with Session(seed_engine) as s:
+        t0 = time.perf_counter()
+        seed(s)
+        cases["seed (fresh)"] = _summary([(time.perf_counter() - t0) * 1000])
+        cases["seed (unchanged)"] = _time(lambda _i: seed(s), repeat)
+    seed_engine.dispose()
+
+    with app.app_context():
+        out["data"] = populate(db.session, spec)
+        users = [uid for (uid,) in db.session.execute(select(User.id).order_by(User.id))][: repeat + 1]
+        snap = get_catalog_snapshot()
+        course_ids = sorted(snap.courses)
+        graph = snap.prereq_graph
+        deep = max(graph.chain_depth, key=graph.chain_depth.get)  # longest prereq chain
+        root = max(graph.dependents, key=lambda c: len(graph.dependents[c]))  # most direct dependents
+        db.session.remove()
+
+    client = app.test_client()
+    program = "SYN-0"
+
+    def user(i: int) -> int:
+        return users[i % len(users)]
+
+    # an empty semester per student for the write cases, so the caps never reject them
+    spare = {
+        uid: client.post(f"/api/semesters?user_id={uid}", json={"name": "Bench", "term": "SUMMER", "year": 2030}).get_json()["id"]
+        for uid in users
+    }
+
+    def get(url: str) -> Callable[[int], Any]:
+        def call(i: int):
+            sep = "&" if "?" in url else "?"
+            r = client.get(f"{url}{sep}user_id={user(i)}")
+            r.get_data()
+            r.close()
+            assert r.status_code == 200, (url, r.status_code)
+        return call
+
+    def free_course(uid: int) -> int:
+        with app.app_context():
+            taken = set(db.session.execute(
+                select(StudentCourse.course_id).where(StudentCourse.student_id == uid)
+            ).scalars())
+        return next(cid for cid in course_ids[uid % len(course_ids):] + course_ids if cid not in taken)
+
+    def add(i: int) -> tuple[int, int]:
+        uid = user(i)
+        r = client.post(f"/api/classes?user_id={uid}", json={"course_id": free_course(uid), "semester_id": spare[uid]})
+        assert r.status_code == 201, r.get_data(as_text=True)
+        return uid, r.get_json()["id"]
+
+    def add_delete(i: int):
+        uid, sc_id = add(i)
+        client.delete(f"/api/classes/{sc_id}?user_id={uid}")
+
+    def batch(i: int):
+        uid = user(i)
+        ops = [{"op": "add", "course_id": free_course(uid), "semester_id": spare[uid]}]
+        res = client.post(f"/api/classes/batch?user_id={uid}", json={"ops": ops}).get_json()["results"][0]
+        assert res["ok"], res
+        client.post(f"/api/classes/batch?user_id={uid}", json={"ops": [{"op": "remove", "id": res["class"]["id"]}]})
+
+    def move(i: int):
+        uid = user(i)
+        with app.app_context():
+            sc_id, back = db.session.execute(
+                select(StudentCourse.id, StudentCourse.semester_id)
+                .where(StudentCourse.student_id == uid, StudentCourse.status == "PLANNED")
+                .order_by(StudentCourse.id.desc())
+            ).first()
+        client.patch(f"/api/classes/{sc_id}?user_id={uid}", json={"semester_id": spare[uid]})
+        client.patch(f"/api/classes/{sc_id}?user_id={uid}", json={"semester_id": back})
+
+    def create_semester(i: int):
+        r = client.post(f"/api/semesters?user_id={user(i)}", json={"name": f"Bench {i}", "term": "SUMMER", "year": 2031})
+        assert r.status_code == 201, r.get_data(as_text=True)
+
+    def audit_direct(i: int):
+        with app.app_context():
+            DegreeProgram.audit_program(db.session, user(i), program)
+
+    route_cases: dict[str, Callable[[int], Any]] = {
+        "GET /": get("/"),
+        "GET /api/cache/stats": get("/api/cache/stats"),
+        "GET /api/semesters": get("/api/semesters"),
+        "GET /api/plan/changes": get("/api/plan/changes?since=0"),
+        "GET /api/courses": get("/api/courses?q=synthetic%20course"),
+        "GET /api/courses (list)": get("/api/courses?unassigned=0"),
+        "GET /api/courses/<course_id>/unlocks": get(f"/api/courses/{root}/unlocks"),
+        "GET /api/courses/<course_id>/path": get(f"/api/courses/{deep}/path"),
+        "GET /api/requirements": get(f"/api/requirements?program={program}&current_term=FALL"),
+        "GET /api/requirements/progress": get(f"/api/requirements/progress?program={program}"),
+        "GET /api/audit": get(f"/api/audit?program={program}"),
+        "GET /api/plan/validate": get("/api/plan/validate"),
+        "GET /api/plan/generate": get(f"/api/plan/generate?program={program}&budget_ms=50"),
+        "GET /metrics": get("/metrics"),
+        "POST /api/classes (+DELETE)": add_delete,
+        "POST /api/classes/batch (add, remove)": batch,
+        "PATCH /api/classes/<sc_id> (there and back)": move,
+        "POST /api/semesters": create_semester,
+        "DegreeProgram.audit_program": audit_direct,
+    }
+    for case, fn in route_cases.items():
+        cases[case] = _time(fn, repeat)
+
+    # every route of the app should have a case, so new routes get noticed
+    covered = {tuple(case.split(" ")[:2]) for case in route_cases}
+    covered.add(("DELETE", "/api/classes/<sc_id>"))  # timed inside "POST /api/classes (+DELETE)"
+    out["uncovered_routes"] = sorted(
+        f"{method} {rule.rule}"
+        for rule in app.url_map.iter_rules() if rule.endpoint != "static"
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"})
+        if (method, re.sub(r"<(?:\w+:)?(\w+)>", r"<\1>", rule.rule)) not in covered
+    )
+    return out
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], threshold: float, min_ms: float) -> list[str]:
+    """Lines describing every case that got slower than the baseline allows."""
+    regressions = []
+    for scale, res in current["scales"].items():
+        base = baseline.get("scales", {}).get(scale)
+        if base is None:
+            continue
+        for case, cur in res["cases"].items():
+            old = base["cases"].get(case)
+            if old is None:
+                continue
+            delta = cur["median_ms"] - old["median_ms"]
+            if delta > min_ms and cur["median_ms"] > old["median_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{scale:<8} {case:<46} {old['median_ms']:>9.2f} -> {cur['median_ms']:>9.2f} ms "
+                    f"(+{delta / old['median_ms'] * 100 if old['median_ms'] else float('inf'):.0f}%)"
+                )
+    return regressions
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark every route at several synthetic data scales.")
+    ap.add_argument("--scales", default=DEFAULT_SCALES, help="comma-separated names from bench/synthetic.py SCALES")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--out", help="write results here as a JSON baseline")
+    ap.add_argument("--compare", help="baseline JSON to check this run against")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown of the median")
+    ap.add_argument("--min-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = ap.parse_args()
+
+    ctx = mp.get_context("spawn")
+    results: dict[str, Any] = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "scales": {},
+    }
+    for name in args.scales.split(","):
+        with ctx.Pool(1) as pool:
+            res = pool.apply(run_scale, (name, args.repeat))
+        results["scales"][name] = res
+        data = res["data"]
+        print(f"\n== {name}: {data['courses']} courses, {data['prereq_rules']} prereq rules, "
+              f"{data['students']} students, {data['enrollments']} enrollments (built in {data['seconds']:.1f} s)")
+        print(f"{'case':<46} {'median':>9} {'p90':>9} {'min':>9}")
+        for case, r in res["cases"].items():
+            print(f"{case:<46} {r['median_ms']:>7.2f}ms {r['p90_ms']:>7.2f}ms {r['min_ms']:>7.2f}ms")
+        if res["uncovered_routes"]:
+            print(f"routes without a case: {', '.join(res['uncovered_routes'])}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nbaseline written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            print("\n".join(regressions))
+            sys.exit(1)
+        print(f"\nno regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Seeded synthetic data for benchmarks: a catalog with a layered prereq DAG,
+degree programs, and students with multi-semester plans.
+
+Everything is sized by a Spec. The same Spec and seed always give the same
+rows. Rows go in through batched Core inserts (the FTS triggers still fire).
+The catalog version is bumped once at the end, so snapshots rebuild.
+
+    from bench.synthetic import SCALES, populate
+    populate(db.session, SCALES["small"])
+
+Course codes look like "S07 3012": department S07, layer 3. A course in
+layer L requires 1..fan_in courses of its own department, mostly from
+layer L-1, so prereq chains run `depth` layers deep. Students take lower
+layers first. Their first `completed` semesters are COMPLETED with grades,
+and the rest are PLANNED.
+"""
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Any
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from models.models import (
+    CourseCatalog,
+    CoursePrereq,
+    CourseTypicalOffering,
+    DegreeProgram,
+    ReqGroup,
+    ReqGroupCourse,
+    StudentCourse,
+    StudentSemester,
+    User,
+    ORDER_GAP,
+    TERM_BITS,
+    course_code_fields,
+)
+from models.catalog import bump_catalog_version
+
+GRADES = ["A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D", "F"]
+TERMS = ["FALL", "SPRING"]
+
+
+@dataclass(frozen=True)
+class Spec:
+    courses: int = 500
+    departments: int = 20
+    depth: int = 6  # prereq layers
+    fan_in: int = 2  # max prereqs per OR-group
+    or_groups: int = 2  # max OR-groups per course
+    concurrent: float = 0.2  # share of rules that allow the same term
+    programs: int = 2
+    groups: int = 12  # requirement groups per program
+    students: int = 50
+    semesters: int = 8
+    per_semester: int = 5
+    completed: int = 3  # leading semesters marked COMPLETED
+    seed: int = 1
+
+
+SCALES: dict[str, Spec] = {
+    "small": Spec(),
+    "medium": Spec(courses=3000, departments=60, depth=8, groups=24, students=300),
+    "large": Spec(courses=10000, departments=120, depth=10, fan_in=3, groups=48, students=1000, semesters=10),
+}
+
+
+def _batched(rows: list[dict[str, Any]], n: int = 1000):
+    it = iter(rows)
+    while chunk := list(islice(it, n)):
+        yield chunk
+
+
+def _insert(session: Session, model, rows: list[dict[str, Any]]) -> None:
+    for chunk in _batched(rows):
+        session.execute(insert(model), chunk)
+
+
+def populate(session: Session, spec: Spec) -> dict[str, Any]:
+    """Insert a synthetic catalog, programs and students; returns row counts and seconds."""
+    t0 = time.perf_counter()
+    rnd = random.Random(spec.seed)
+
+    # catalog: course i sits in department i % departments, layer by position
+    courses, layer_of, credits_of, by_dept_layer = [], {}, {}, {}
+    for i in range(spec.courses):
+        d = i % spec.departments
+        layer = min(spec.depth - 1, (i // spec.departments) * spec.depth // max(1, spec.courses // spec.departments))
+        code = f"S{d:02d} {layer}{i // spec.departments:03d}"
+        dept, num, level = course_code_fields(code)
+        terms = rnd.choice([["FALL"], ["SPRING"], ["FALL", "SPRING"], ["FALL", "SPRING", "SUMMER"]])
+        courses.append({
+            "code": code, "title": f"Synthetic course {i}", "description": f"Layer {layer} of department S{d:02d}.",
+            "credits": rnd.choice([3.0, 3.0, 3.0, 4.0, 1.0]), "department": dept, "number": num, "level": level,
+            "term_mask": sum(TERM_BITS[t] for t in terms), "_terms": terms, "_layer": layer, "_dept": d,
+        })
+    _insert(session, CourseCatalog, [{k: v for k, v in c.items() if not k.startswith("_")} for c in courses])
+    ids = dict(session.execute(select(CourseCatalog.code, CourseCatalog.id)).all())
+    for c in courses:
+        cid = ids[c["code"]]
+        layer_of[cid] = c["_layer"]
+        credits_of[cid] = c["credits"]
+        by_dept_layer.setdefault((c["_dept"], c["_layer"]), []).append(cid)
+    _insert(session, CourseTypicalOffering, [
+        {"course_id": ids[c["code"]], "term": t} for c in courses for t in c["_terms"]
+    ])
+
+    prereqs = []
+    for c in courses:
+        cid, d, layer = ids[c["code"]], c["_dept"], c["_layer"]
+        lower = [by_dept_layer[(d, k)] for k in range(layer) if (d, k) in by_dept_layer]
+        if not lower:
+            continue
+        for gk in range(1, rnd.randint(1, spec.or_groups) + 1):
+            src = lower[-1] if rnd.random() < 0.7 else rnd.choice(lower)
+            for p in rnd.sample(src, min(len(src), rnd.randint(1, spec.fan_in))):
+                prereqs.append({
+                    "course_id": cid, "prereq_course_id": p, "group_key": gk,
+                    "min_grade": rnd.choice([None, "C", "C-"]), "allow_concurrent": rnd.random() < spec.concurrent,
+                })
+    _insert(session, CoursePrereq, prereqs)
+
+    # programs: ALL / ANY_COUNT / FILTER groups in turn
+    all_ids = sorted(ids.values())
+    group_rows = 0
+    for p in range(spec.programs):
+        pid = session.execute(
+            insert(DegreeProgram).values(code=f"SYN-{p}", name=f"Synthetic program {p}", total_credits=120)
+        ).inserted_primary_key[0]
+        for gi in range(spec.groups):
+            kind = ("ALL", "ANY_COUNT", "FILTER")[gi % 3]
+            row = {
+                "program_id": pid, "title": f"Group {gi}", "kind": kind, "sort_order": gi,
+                "min_count": 0, "min_credits": 0, "allow_double_count": rnd.random() < 0.1,
+                "dept_prefix": None, "min_number": None,
+            }
+            if kind == "ANY_COUNT":
+                row["min_count"] = 2
+            elif kind == "FILTER":
+                row.update(min_count=2, dept_prefix=f"S{rnd.randrange(spec.departments):02d}", min_number=2000)
+            gid = session.execute(insert(ReqGroup).values(**row)).inserted_primary_key[0]
+            if kind != "FILTER":
+                listed = rnd.sample(all_ids, 4 if kind == "ALL" else 8)
+                _insert(session, ReqGroupCourse, [
+                    {"group_id": gid, "course_id": cid, "min_grade": rnd.choice([None, "C"])} for cid in listed
+                ])
+            group_rows += 1
+
+    # students: lower layers first, one layer band per semester
+    by_layer: dict[int, list[int]] = {}
+    for cid, layer in layer_of.items():
+        by_layer.setdefault(layer, []).append(cid)
+    enrollments = 0
+    for s in range(spec.students):
+        uid = session.execute(
+            insert(User).values(email=f"synthetic{s}@example.com", name=f"Student {s}", plan_version=0)
+        ).inserted_primary_key[0]
+        sem_rows = [
+            {"student_id": uid, "name": f"{TERMS[i % 2].title()} {2024 + (i + 1) // 2}", "term": TERMS[i % 2],
+             "year": 2024 + (i + 1) // 2, "order": i * ORDER_GAP}
+            for i in range(spec.semesters)
+        ]
+        _insert(session, StudentSemester, sem_rows)
+        sem_ids = [
+            sid for (sid,) in session.execute(
+                select(StudentSemester.id).where(StudentSemester.student_id == uid).order_by(StudentSemester.order)
+            )
+        ]
+        taken: set[int] = set()
+        rows = []
+        for i, sid in enumerate(sem_ids):
+            layer = min(spec.depth - 1, i * spec.depth // spec.semesters)
+            pool = [cid for cid in by_layer.get(layer, ()) if cid not in taken]
+            done = i < spec.completed
+            for pos, cid in enumerate(rnd.sample(pool, min(len(pool), spec.per_semester))):
+                taken.add(cid)
+                rows.append({
+                    "student_id": uid, "semester_id": sid, "course_id": cid, "credits": credits_of[cid],
+                    "position": pos * ORDER_GAP, "status": "COMPLETED" if done else "PLANNED",
+                    "grade": rnd.choice(GRADES) if done else None,
+                })
+        _insert(session, StudentCourse, rows)
+        enrollments += len(rows)
+
+    bump_catalog_version(session)
+    session.commit()
+    return {
+        "spec": asdict(spec),
+        "courses": len(courses),
+        "prereq_rules": len(prereqs),
+        "groups": group_rows,
+        "students": spec.students,
+        "enrollments": enrollments,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
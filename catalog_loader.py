@@ -0,0 +1,363 @@
+"""
+Bulk catalog loader: streams catalog files and upserts them in batches.
+
+A catalog directory may hold any of these files (.csv, .jsonl or .json,
+same column names either way); missing files are skipped:
+
+    courses        code, title, credits, description
+    offerings      code, term
+    prereqs        code, prereq_code, group_key, min_grade, allow_concurrent
+    programs       code, name, total_credits
+    groups         program_code, title, kind, sort_order, min_count, min_credits,
+                   allow_double_count, dept_prefix, min_number
+    group_courses  program_code, group_title, code, min_grade
+
+Every write is a batched INSERT ... ON CONFLICT DO UPDATE keyed on the
+table's unique constraint, so reloading the same files is a no-op and
+changed rows are updated in place. Course codes are resolved against one
+in-memory code -> id map; rows naming an unknown code are counted as
+skipped. So are malformed rows (say, a non-numeric credits or group_key),
+which are also listed by file and line instead of failing the load.
+Nothing is deleted.
+
+Run it with `flask --app app load-catalog DIR`.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from models.models import (
+    CourseCatalog,
+    CoursePrereq,
+    CourseTypicalOffering,
+    DegreeProgram,
+    ReqGroup,
+    ReqGroupCourse,
+    TERM_BITS,
+    course_code_fields,
+)
+from models.catalog import bump_catalog_version
+
+LOAD_BATCH = 1000
+
+FILES = ("courses", "offerings", "prereqs", "programs", "groups", "group_courses")
+GRADES = {"A", "A-", "B+", "B", "B-", "C+", "C", "C-", "D", "F"}
+
+
+@dataclass
+class LoadStats:
+    name: str
+    rows: int = 0
+    written: int = 0  # inserted or changed; unchanged rows don't count
+    skipped: int = 0
+    seconds: float = 0.0
+    malformed: list[str] = field(default_factory=list)  # "file:line: error", also counted in skipped
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name:<14} {self.rows:>8} rows  {self.written:>8} written  "
+            f"{self.skipped:>6} skipped  {self.seconds * 1000:>9.1f} ms  {self.rows_per_sec:>10.0f} rows/s"
+        )
+
+
+def norm_code(code: Any) -> str:
+    return " ".join(str(code or "").split()).upper()
+
+
+def _flag(v: Any, default: bool = False) -> bool:
+    if v is None or v == "":
+        return default
+    if isinstance(v, bool):
+        return v
+    return str(v).strip().lower() in {"1", "true", "yes", "y"}
+
+
+def _int(v: Any, default: int | None = None) -> int | None:
+    if v is None or v == "":
+        return default
+    return int(v)
+
+
+def _grade(v: Any) -> str | None:
+    g = str(v or "").strip().upper()
+    return g if g in GRADES else None
+
+
+class Row(dict):
+    """A file row plus the line it starts on, for error messages."""
+
+    __slots__ = ("line",)
+
+    def __init__(self, data: dict[str, Any], line: int):
+        super().__init__(data)
+        self.line = line
+
+
+def find_file(directory: Path, name: str) -> Path | None:
+    for ext in (".csv", ".jsonl", ".json"):
+        p = directory / f"{name}{ext}"
+        if p.exists():
+            return p
+    return None
+
+
+def read_rows(path: Path) -> Iterator[dict[str, Any]]:
+    """Yield one dict per row without loading the file (except plain .json arrays)."""
+    if path.suffix == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames is None:  # reads the header line; None for an empty file
+                return
+            line = reader.line_num + 1
+            for row in reader:
+                yield Row(row, line)
+                line = reader.line_num + 1
+    elif path.suffix == ".jsonl":
+        with path.open(encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                if line.strip():
+                    yield Row(json.loads(line), n)
+    else:
+        with path.open(encoding="utf-8") as f:
+            # a JSON array has no useful line numbers; number the rows instead
+            for n, row in enumerate(json.load(f), 1):
+                yield Row(row, n)
+
+
+def batched(rows: Iterable[Any], n: int) -> Iterator[list[Any]]:
+    it = iter(rows)
+    while chunk := list(islice(it, n)):
+        yield chunk
+
+
+def _insert(session: Session):
+    name = session.get_bind().dialect.name
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise ValueError(f"bulk upsert not supported on {name}")
+    return insert
+
+
+def upsert(session: Session, model, rows: list[dict[str, Any]], keys: list[str], update_cols: list[str]) -> int:
+    """Batched INSERT ... ON CONFLICT; returns how many rows were inserted or changed."""
+    if not rows:
+        return 0
+    table = model.__table__
+    stmt = _insert(session)(table)
+    if update_cols:
+        # only touch rows that actually change, so a reload doesn't rewrite
+        # (and re-index) the whole catalog
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={c: stmt.excluded[c] for c in update_cols},
+            where=or_(*(table.c[c].is_distinct_from(stmt.excluded[c]) for c in update_cols)),
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+    res = session.execute(stmt, rows)
+    return res.rowcount if res.rowcount >= 0 else len(rows)
+
+
+class CatalogLoader:
+    def __init__(self, session: Session, batch_size: int = LOAD_BATCH):
+        self.session = session
+        self.batch_size = batch_size
+        self.course_ids: dict[str, int] = {}
+        self.program_ids: dict[str, int] = {}
+        self.group_ids: dict[tuple[int, str], int] = {}
+        self.source: str | None = None  # file being loaded, for error messages
+
+    def _load_map(self) -> None:
+        self.course_ids = {
+            norm_code(code): cid for code, cid in self.session.execute(select(CourseCatalog.code, CourseCatalog.id))
+        }
+
+    def _run(self, name: str, rows: Iterable[dict[str, Any]], convert, model, keys, update_cols) -> LoadStats:
+        stats = LoadStats(name)
+        t0 = time.perf_counter()
+        for chunk in batched(rows, self.batch_size):
+            out = []
+            for raw in chunk:
+                stats.rows += 1
+                try:
+                    row = convert(raw)
+                except (ValueError, TypeError) as e:
+                    line = getattr(raw, "line", stats.rows)
+                    stats.malformed.append(f"{self.source or name}:{line}: {e}")
+                    row = None
+                if row is None:
+                    stats.skipped += 1
+                else:
+                    out.append(row)
+            stats.written += upsert(self.session, model, out, keys, update_cols)
+        stats.seconds = time.perf_counter() - t0
+        return stats
+
+    def courses(self, rows) -> LoadStats:
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return LoadStats("courses")
+        update_cols = ["title", "credits", "department", "number", "level"]
+        # without a description column, keep whatever description is stored
+        if "description" in first:
+            update_cols.append("description")
+
+        def convert(r):
+            code = norm_code(r.get("code"))
+            title = (r.get("title") or "").strip()
+            if not code or not title:
+                return None
+            dept, num, level = course_code_fields(code)
+            return {
+                "code": code, "title": title, "credits": float(r.get("credits") or 3.0),
+                "description": r.get("description") or None,
+                "department": dept, "number": num, "level": level, "term_mask": 0,
+            }
+
+        stats = self._run("courses", chain([first], rows), convert, CourseCatalog, ["code"], update_cols)
+        self._load_map()
+        return stats
+
+    def offerings(self, rows) -> LoadStats:
+        def convert(r):
+            cid = self.course_ids.get(norm_code(r.get("code")))
+            term = str(r.get("term") or "").strip().upper()
+            if cid is None or term not in TERM_BITS:
+                return None
+            return {"course_id": cid, "term": term}
+
+        stats = self._run("offerings", rows, convert, CourseTypicalOffering, ["course_id", "term"], [])
+        t0 = time.perf_counter()
+        if stats.written:
+            self._sync_term_masks()
+        stats.seconds += time.perf_counter() - t0
+        return stats
+
+    def _sync_term_masks(self) -> None:
+        # raw inserts skip the ORM flush hook, so rebuild every mask in one UPDATE;
+        # (course_id, term) is unique, so a SUM of the bits is their OR
+        o = CourseTypicalOffering.__table__
+        bits = case({t: b for t, b in TERM_BITS.items()}, value=o.c.term, else_=0)
+        mask = (
+            select(func.coalesce(func.sum(bits), 0))
+            .where(o.c.course_id == CourseCatalog.__table__.c.id)
+            .scalar_subquery()
+        )
+        t = CourseCatalog.__table__
+        self.session.execute(update(t).where(t.c.term_mask != mask).values(term_mask=mask))
+
+    def prereqs(self, rows) -> LoadStats:
+        def convert(r):
+            cid = self.course_ids.get(norm_code(r.get("code")))
+            pid = self.course_ids.get(norm_code(r.get("prereq_code")))
+            gk = _int(r.get("group_key"), 1)
+            if cid is None or pid is None or cid == pid or gk < 1:
+                return None
+            return {
+                "course_id": cid, "prereq_course_id": pid, "group_key": gk,
+                "min_grade": _grade(r.get("min_grade")),
+                "allow_concurrent": _flag(r.get("allow_concurrent")),
+            }
+
+        return self._run(
+            "prereqs", rows, convert, CoursePrereq,
+            ["course_id", "prereq_course_id", "group_key"], ["min_grade", "allow_concurrent"],
+        )
+
+    def programs(self, rows) -> LoadStats:
+        def convert(r):
+            code = (r.get("code") or "").strip()
+            if not code:
+                return None
+            return {"code": code, "name": (r.get("name") or code).strip(), "total_credits": _int(r.get("total_credits"), 0)}
+
+        stats = self._run("programs", rows, convert, DegreeProgram, ["code"], ["name", "total_credits"])
+        self.program_ids = dict(self.session.execute(select(DegreeProgram.code, DegreeProgram.id)).all())
+        return stats
+
+    def groups(self, rows) -> LoadStats:
+        def convert(r):
+            pid = self.program_ids.get((r.get("program_code") or "").strip())
+            title = (r.get("title") or "").strip()
+            kind = (r.get("kind") or "").strip().upper()
+            dept = (r.get("dept_prefix") or "").strip().upper() or None
+            min_number = _int(r.get("min_number"))
+            if pid is None or not title or kind not in {"ALL", "ANY_COUNT", "FILTER"}:
+                return None
+            if kind == "FILTER" and dept is None and min_number is None:
+                return None
+            return {
+                "program_id": pid, "title": title, "kind": kind,
+                "sort_order": _int(r.get("sort_order"), 0),
+                "min_count": _int(r.get("min_count"), 0),
+                "min_credits": _int(r.get("min_credits"), 0),
+                "allow_double_count": _flag(r.get("allow_double_count")),
+                "dept_prefix": dept, "min_number": min_number,
+            }
+
+        stats = self._run(
+            "groups", rows, convert, ReqGroup, ["program_id", "title"],
+            ["kind", "sort_order", "min_count", "min_credits", "allow_double_count", "dept_prefix", "min_number"],
+        )
+        self.group_ids = {
+            (pid, title): gid
+            for gid, pid, title in self.session.execute(select(ReqGroup.id, ReqGroup.program_id, ReqGroup.title))
+        }
+        return stats
+
+    def group_courses(self, rows) -> LoadStats:
+        def convert(r):
+            pid = self.program_ids.get((r.get("program_code") or "").strip())
+            gid = self.group_ids.get((pid, (r.get("group_title") or "").strip()))
+            cid = self.course_ids.get(norm_code(r.get("code")))
+            if gid is None or cid is None:
+                return None
+            return {"group_id": gid, "course_id": cid, "min_grade": _grade(r.get("min_grade"))}
+
+        return self._run("group_courses", rows, convert, ReqGroupCourse, ["group_id", "course_id"], ["min_grade"])
+
+    def load_dir(self, directory: str | Path) -> list[LoadStats]:
+        """Load every catalog file found in `directory` in dependency order, in one transaction."""
+        directory = Path(directory)
+        self._load_map()
+        self.program_ids = dict(self.session.execute(select(DegreeProgram.code, DegreeProgram.id)).all())
+        self.group_ids = {
+            (pid, title): gid
+            for gid, pid, title in self.session.execute(select(ReqGroup.id, ReqGroup.program_id, ReqGroup.title))
+        }
+        results = []
+        try:
+            for name in FILES:
+                path = find_file(directory, name)
+                if path is not None:
+                    self.source = path.name
+                    results.append(getattr(self, name)(read_rows(path)))
+            if any(s.written for s in results):
+                # raw statements bypass the catalog flush hook
+                bump_catalog_version(self.session)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return results
+
+
+def load_catalog(session: Session, directory: str | Path, batch_size: int = LOAD_BATCH) -> list[LoadStats]:
+    return CatalogLoader(session, batch_size).load_dir(directory)
@@ -0,0 +1,168 @@
+"""
+Cohort audit: run DegreeProgram audits for every student and write JSONL.
+
+The catalog snapshot and the compiled program are built once, in the
+parent process. Workers inherit them when the platform can fork;
+otherwise each worker builds its own copy once at startup. Enrollments
+are streamed in student order with yield_per and cut into batches. At
+most two batches per worker are in flight at a time, so memory stays
+flat however large the cohort is. Each output line is one student:
+
+    {"student_id": 7, "program": {...}, "groups": [...], "summary": {...}}
+
+Run it with `flask --app app audit-cohort PROGRAM_CODE -o out.jsonl`.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import groupby
+from typing import IO, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from sqlalchemy import and_, create_engine, select
+from sqlalchemy.orm import Session
+
+from models.models import User, StudentCourse
+from models.catalog import CatalogSnapshot, build_catalog_snapshot, current_catalog_version
+from models.audit import ProgramAudit, audit_grade, compile_program_audit, run_audit
+
+STREAM_CHUNK = 2000  # enrollment rows fetched per round trip
+STUDENTS_PER_TASK = 200
+
+# (snapshot, compiled program) for the current process
+_state: tuple[CatalogSnapshot, ProgramAudit] | None = None
+
+
+@dataclass
+class CohortStats:
+    students: int = 0
+    enrollments: int = 0
+    seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    peak_worker_rss_mb: float = 0.0  # largest single worker; 0 when run in-process
+
+    def __str__(self) -> str:
+        rate = self.students / self.seconds if self.seconds else 0.0
+        workers = f", worker peak RSS {self.peak_worker_rss_mb:.0f} MB" if self.peak_worker_rss_mb else ""
+        return (
+            f"{self.students} students ({self.enrollments} enrollments) in {self.seconds:.2f} s, "
+            f"{rate:.0f} students/s, peak RSS {self.peak_rss_mb:.0f} MB{workers}"
+        )
+
+
+def _peak_rss_mb(who: int) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def load_program(session: Session, program_code: str) -> tuple[CatalogSnapshot, ProgramAudit]:
+    snap = build_catalog_snapshot(session, current_catalog_version(session))
+    prog = snap.programs.get(program_code)
+    if prog is None:
+        raise LookupError(f"degree program {program_code!r} not found")
+    return snap, compile_program_audit(prog)
+
+
+def _init_worker(db_url: str, program_code: str) -> None:
+    global _state
+    if _state is not None:  # inherited through fork
+        return
+    engine = create_engine(db_url)
+    with Session(engine) as session:
+        _state = load_program(session, program_code)
+    engine.dispose()
+
+
+def audit_batch(batch: list[tuple[int, dict[int, str | None]]]) -> str:
+    """Audit a batch of (student_id, {course_id: grade}); returns their JSONL lines."""
+    snap, pa = _state
+    lines = []
+    for sid, taken in batch:
+        result = run_audit(pa, snap, taken)
+        lines.append(json.dumps({"student_id": sid, **result}, separators=(",", ":")))
+    return "\n".join(lines) + "\n"
+
+
+def stream_students(session: Session, include_planned: bool, stats: CohortStats) -> Iterator[tuple[int, dict[int, str | None]]]:
+    """Every student with their {course_id: grade}, read in chunks in student order."""
+    join_on = StudentCourse.student_id == User.id
+    if not include_planned:
+        join_on = and_(join_on, StudentCourse.status == "COMPLETED")
+    q = (
+        select(User.id, StudentCourse.course_id, StudentCourse.status, StudentCourse.grade)
+        .outerjoin(StudentCourse, join_on)
+        .order_by(User.id)
+        .execution_options(yield_per=STREAM_CHUNK)
+    )
+    for sid, rows in groupby(session.execute(q), key=lambda r: r[0]):
+        taken = {cid: audit_grade(status, grade) for _, cid, status, grade in rows if cid is not None}
+        stats.enrollments += len(taken)
+        yield sid, taken
+
+
+def _batches(students, size: int):
+    batch = []
+    for item in students:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def audit_cohort(
+    session: Session,
+    program_code: str,
+    out: IO[str],
+    workers: int | None = None,
+    include_planned: bool = True,
+    batch_size: int = STUDENTS_PER_TASK,
+) -> CohortStats:
+    global _state
+    stats = CohortStats()
+    t0 = time.perf_counter()
+    _state = load_program(session, program_code)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    batches = _batches(stream_students(session, include_planned, stats), batch_size)
+
+    def write(lines: str, n: int) -> None:
+        out.write(lines)
+        stats.students += n
+
+    if workers <= 1:
+        for batch in batches:
+            write(audit_batch(batch), len(batch))
+    else:
+        ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+        db_url = session.get_bind().url.render_as_string(hide_password=False)
+        with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker, initargs=(db_url, program_code)) as pool:
+            pending: deque[tuple[Future, int]] = deque()
+            for batch in batches:
+                pending.append((pool.submit(audit_batch, batch), len(batch)))
+                # bounded in-flight work keeps memory flat; output stays in student order
+                while len(pending) >= 2 * workers:
+                    fut, n = pending.popleft()
+                    write(fut.result(), n)
+            while pending:
+                fut, n = pending.popleft()
+                write(fut.result(), n)
+
+    stats.seconds = time.perf_counter() - t0
+    if resource is not None:
+        stats.peak_rss_mb = _peak_rss_mb(resource.RUSAGE_SELF)
+        # the pool has been shut down and its workers reaped, so they count here
+        stats.peak_worker_rss_mb = _peak_rss_mb(resource.RUSAGE_CHILDREN) if workers > 1 else 0.0
+    return stats
@@ -0,0 +1,195 @@
+# models/audit.py
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+from models.catalog import CatalogSnapshot, ProgramRow, matches_filter
+
+GRADE_RANK = {"A": 12, "A-": 11, "B+": 10, "B": 9, "B-": 8, "C+": 7, "C": 6, "C-": 5, "D": 3, "F": 0}
+
+# listed courses with no min_grade of their own need this
+DEFAULT_MIN_GRADE = "C"
+
+
+# stands in for the grade of a planned / in-progress course: it counts as
+# meeting any minimum, so include_planned audits project a passing plan
+PENDING = "PENDING"
+
+
+def audit_grade(status: str | None, grade: str | None) -> str | None:
+    if grade:
+        return grade
+    return None if status == "COMPLETED" else PENDING
+
+
+def meets_min(grade: str | None, min_grade: str | None) -> bool:
+    if min_grade is None or grade == PENDING:
+        return True
+    if not grade:
+        return False
+    return GRADE_RANK.get(grade.upper(), -1) >= GRADE_RANK.get(min_grade.upper(), 99)
+
+
+@dataclass(frozen=True, slots=True)
+class AuditGroup:
+    id: int
+    title: str
+    kind: str
+    need: int
+    double: bool  # allow_double_count: may reuse courses other groups applied
+    listed: tuple[int, ...]  # ALL / ANY_COUNT courses, in ReqGroupCourse order
+    min_grade: Mapping[int, str]  # listed course -> grade it needs
+    dept_prefix: str | None
+    min_number: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class ProgramAudit:
+    """
+    A program's groups compiled for auditing: per-group min grades as dicts
+    and, for every listed course, the groups that list it, so a student's
+    courses turn into candidate edges without scanning group lists.
+    """
+
+    program: ProgramRow
+    groups: tuple[AuditGroup, ...]
+    listed_in: Mapping[int, tuple[int, ...]]  # course_id -> indexes into groups
+
+
+def compile_program_audit(prog: ProgramRow) -> ProgramAudit:
+    groups = []
+    listed_in: dict[int, list[int]] = {}
+    for gi, g in enumerate(prog.groups):
+        listed = tuple(rc.course_id for rc in g.courses) if g.kind != "FILTER" else ()
+        need = len(listed) if g.kind == "ALL" else g.min_count
+        groups.append(AuditGroup(
+            id=g.id, title=g.title, kind=g.kind, need=need, double=g.allow_double_count,
+            listed=listed,
+            min_grade={rc.course_id: rc.min_grade or DEFAULT_MIN_GRADE for rc in g.courses},
+            dept_prefix=g.dept_prefix, min_number=g.min_number,
+        ))
+        for cid in listed:
+            listed_in.setdefault(cid, []).append(gi)
+    return ProgramAudit(prog, tuple(groups), {cid: tuple(gs) for cid, gs in listed_in.items()})
+
+
+_lock = threading.Lock()
+_compiled: dict[str, ProgramAudit] = {}
+_compiled_version: str | None = None
+
+
+def get_program_audit(snap: CatalogSnapshot, program_code: str) -> ProgramAudit | None:
+    """Compiled audit for a program, built once per catalog version."""
+    global _compiled_version
+    prog = snap.programs.get(program_code)
+    if prog is None:
+        return None
+    with _lock:
+        if _compiled_version != snap.version:
+            _compiled.clear()
+            _compiled_version = snap.version
+        pa = _compiled.get(program_code)
+        if pa is None or pa.program is not prog:
+            pa = _compiled[program_code] = compile_program_audit(prog)
+    return pa
+
+
+def candidates(pa: ProgramAudit, snap: CatalogSnapshot, taken: Mapping[int, str | None]) -> list[list[int]]:
+    """Per group, the student's courses that could count toward it, in the group's own order."""
+    out: list[list[int]] = [[] for _ in pa.groups]
+    for cid in sorted(taken):
+        for gi in pa.listed_in.get(cid, ()):
+            if meets_min(taken[cid], pa.groups[gi].min_grade[cid]):
+                out[gi].append(cid)
+    for gi, g in enumerate(pa.groups):
+        if g.kind == "FILTER":
+            # a FILTER group without a department never matches (same as the old greedy audit)
+            if g.dept_prefix:
+                out[gi] = [
+                    cid for cid in sorted(taken)
+                    if cid in snap.courses and matches_filter(snap.courses[cid], g.dept_prefix, g.min_number)
+                ]
+        else:
+            order = {cid: i for i, cid in enumerate(g.listed)}
+            out[gi].sort(key=order.__getitem__)
+    return out
+
+
+def assign(pa: ProgramAudit, cands: list[list[int]]) -> list[list[int]]:
+    """
+    Pick the courses each group applies.
+
+    Groups that can't double count share courses: each course goes to at
+    most one of them. That is a bipartite b-matching (course -> group, group
+    capacity = need), solved with augmenting paths: groups are filled in
+    program order, and filling a later group may move a course out of an
+    earlier group only if that group takes another course instead. The
+    result is a maximum matching that is also lexicographically best in
+    group order, so no group ends up with fewer courses than the greedy
+    in-order pass would have given it. Double-counting groups just take
+    their first `need` candidates.
+    """
+    owner: dict[int, int] = {}  # course -> exclusive group holding it
+    applied: list[list[int]] = [[] for _ in pa.groups]
+    exclusive = [gi for gi, g in enumerate(pa.groups) if not g.double and g.need > 0]
+
+    def augment(gi: int, seen: set[int]) -> bool:
+        # give group gi one more course, re-homing current owners if needed
+        for cid in cands[gi]:
+            if cid in seen:
+                continue
+            seen.add(cid)
+            holder = owner.get(cid)
+            if holder == gi:
+                continue
+            if holder is None or augment(holder, seen):
+                if holder is not None:
+                    applied[holder].remove(cid)
+                owner[cid] = gi
+                applied[gi].append(cid)
+                return True
+        return False
+
+    # once a group finds no augmenting path, later augmentations never
+    # create one for it (Kuhn), so a single pass in program order is enough
+    for gi in exclusive:
+        while len(applied[gi]) < pa.groups[gi].need and augment(gi, set()):
+            pass
+
+    for gi, g in enumerate(pa.groups):
+        if g.double:
+            applied[gi] = cands[gi][: g.need]
+        else:
+            order = {cid: i for i, cid in enumerate(cands[gi])}
+            applied[gi].sort(key=order.__getitem__)
+    return applied
+
+
+def run_audit(pa: ProgramAudit, snap: CatalogSnapshot, taken: Mapping[int, str | None]) -> dict[str, Any]:
+    """Audit one student's courses ({course_id: grade}) against a compiled program."""
+    applied = assign(pa, candidates(pa, snap, taken))
+    prog = pa.program
+    out: dict[str, Any] = {
+        "program": {"code": prog.code, "name": prog.name, "total_credits": prog.total_credits},
+        "groups": [],
+        "summary": {"credits_applied": 0, "courses_applied": 0},
+    }
+    for g, got in zip(pa.groups, applied):
+        missing = [cid for cid in g.listed if cid not in got] if g.kind == "ALL" else []
+        credits = sum(snap.courses[cid].credits for cid in got)
+        out["groups"].append({
+            "group_id": g.id,
+            "title": g.title,
+            "kind": g.kind,
+            "required_count": g.need,
+            "applied_course_ids": got,
+            "missing_course_ids": missing,
+            "options_course_ids": list(g.listed) if g.kind == "ANY_COUNT" else [],
+            "satisfied": len(got) >= g.need,
+            "credits_applied": credits,
+        })
+        out["summary"]["credits_applied"] += credits
+        out["summary"]["courses_applied"] += len(got)
+    return out
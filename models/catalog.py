@@ -0,0 +1,319 @@
+# models/catalog.py
+from __future__ import annotations
+
+import secrets
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.models import (
+    db,
+    AppMeta,
+    CourseCatalog,
+    CoursePrereq,
+    CourseTypicalOffering,
+    DegreeProgram,
+    ReqGroup,
+    ReqGroupCourse,
+    TERM_BITS,
+)
+from models.prereqs import PrereqGraph, PrereqIndex, compile_prereq_graph, compile_prereq_index
+
+CATALOG_VERSION_KEY = "catalog_version"
+
+# Any insert/update/delete of these tables changes what the read endpoints return.
+CATALOG_MODELS = (
+    CourseCatalog,
+    CoursePrereq,
+    CourseTypicalOffering,
+    DegreeProgram,
+    ReqGroup,
+    ReqGroupCourse,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CourseRow:
+    id: int
+    code: str
+    title: str
+    description: str | None
+    credits: float
+    department: str | None
+    level: str | None
+    number: int | None
+    term_mask: int
+
+
+@dataclass(frozen=True, slots=True)
+class PrereqRule:
+    prereq_course_id: int
+    min_grade: str | None
+    allow_concurrent: bool
+
+
+@dataclass(frozen=True, slots=True)
+class PrereqGroup:
+    group_key: int
+    rules: tuple[PrereqRule, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class GroupCourseRow:
+    course_id: int
+    min_grade: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class GroupRow:
+    id: int
+    title: str
+    kind: str
+    min_count: int
+    min_credits: int
+    allow_double_count: bool
+    sort_order: int
+    dept_prefix: str | None
+    min_number: int | None
+    courses: tuple[GroupCourseRow, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class ProgramRow:
+    id: int
+    code: str
+    name: str
+    total_credits: int
+    groups: tuple[GroupRow, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogSnapshot:
+    """Read-only copy of the catalog tables, tagged with the version it was built from."""
+
+    version: str
+    courses: Mapping[int, CourseRow]
+    courses_by_code: Mapping[str, CourseRow]
+    # department -> courses with a numeric code, sorted by number (FILTER groups)
+    courses_by_dept: Mapping[str, tuple[CourseRow, ...]]
+    prereqs: Mapping[int, tuple[PrereqGroup, ...]]
+    programs: Mapping[str, ProgramRow]
+    prereq_index: PrereqIndex
+    prereq_graph: PrereqGraph
+
+
+# mask -> sorted term names, e.g. 5 -> ("FALL", "SPRING")
+TERMS_BY_MASK = tuple(
+    tuple(sorted(t for t, bit in TERM_BITS.items() if mask & bit))
+    for mask in range(1 << len(TERM_BITS))
+)
+
+_lock = threading.Lock()
+_snapshot: CatalogSnapshot | None = None
+
+
+def current_catalog_version(session: Session) -> str:
+    """
+    Opaque catalog version, "<counter>-<random>". The random part keeps it
+    unique across databases: a recreated and reseeded database counts from 1
+    again, and must not match snapshots, cache keys or ETags from the old one.
+    """
+    row = session.get(AppMeta, CATALOG_VERSION_KEY)
+    return row.value if row else "0"
+
+
+def bump_catalog_version(session: Session) -> None:
+    """Mark the catalog as changed; every process rebuilds its snapshot on next read."""
+    with session.no_autoflush:
+        row = session.get(AppMeta, CATALOG_VERSION_KEY)
+        n = int(row.value.split("-")[0]) + 1 if row else 1
+        value = f"{n}-{secrets.token_hex(4)}"
+        if row is None:
+            session.add(AppMeta(key=CATALOG_VERSION_KEY, value=value))
+        else:
+            row.value = value
+
+
+def term_mask_of(terms) -> int:
+    mask = 0
+    for t in terms:
+        mask |= TERM_BITS.get(t, 0)
+    return mask
+
+
+def matches_filter(c: CourseRow, dept_prefix: str | None, min_number: int | None) -> bool:
+    if c.number is None:
+        return False
+    if dept_prefix and c.department != dept_prefix:
+        return False
+    return min_number is None or c.number >= min_number
+
+
+def filter_group_courses(snap: CatalogSnapshot, g: GroupRow) -> list[CourseRow]:
+    """Courses matching a FILTER group, sorted by code."""
+    if g.dept_prefix:
+        buckets = [snap.courses_by_dept.get(g.dept_prefix, ())]
+    else:
+        buckets = list(snap.courses_by_dept.values())
+    out: list[CourseRow] = []
+    for rows in buckets:
+        start = 0
+        if g.min_number is not None:
+            start = bisect_left(rows, g.min_number, key=lambda r: r.number)
+        out.extend(rows[start:])
+    out.sort(key=lambda x: x.code)
+    return out
+
+
+def build_catalog_snapshot(session: Session, version: str) -> CatalogSnapshot:
+    offered: dict[int, int] = {}
+    for course_id, term in session.query(CourseTypicalOffering.course_id, CourseTypicalOffering.term):
+        offered[course_id] = offered.get(course_id, 0) | TERM_BITS.get(term, 0)
+
+    courses = {
+        c.id: CourseRow(
+            c.id, c.code, c.title, c.description, float(c.credits or 0),
+            c.department, c.level, c.number, offered.get(c.id, 0),
+        )
+        for c in session.query(CourseCatalog).order_by(CourseCatalog.id.asc())
+    }
+    by_dept: dict[str, list[CourseRow]] = {}
+    for c in courses.values():
+        if c.department and c.number is not None:
+            by_dept.setdefault(c.department, []).append(c)
+
+    grouped: dict[int, dict[int, list[PrereqRule]]] = {}
+    for r in session.query(CoursePrereq).order_by(CoursePrereq.id.asc()):
+        grouped.setdefault(r.course_id, {}).setdefault(r.group_key, []).append(
+            PrereqRule(r.prereq_course_id, r.min_grade, bool(r.allow_concurrent))
+        )
+    prereqs = {
+        cid: tuple(PrereqGroup(gk, tuple(rules)) for gk, rules in sorted(groups.items()))
+        for cid, groups in grouped.items()
+    }
+
+    group_courses: dict[int, list[GroupCourseRow]] = {}
+    for rc in session.query(ReqGroupCourse).order_by(ReqGroupCourse.id.asc()):
+        group_courses.setdefault(rc.group_id, []).append(GroupCourseRow(rc.course_id, rc.min_grade))
+
+    groups_by_program: dict[int, list[GroupRow]] = {}
+    for g in session.query(ReqGroup).order_by(ReqGroup.sort_order.asc(), ReqGroup.id.asc()):
+        groups_by_program.setdefault(g.program_id, []).append(
+            GroupRow(
+                id=g.id,
+                title=g.title,
+                kind=g.kind,
+                min_count=int(g.min_count or 0),
+                min_credits=int(g.min_credits or 0),
+                allow_double_count=bool(g.allow_double_count),
+                sort_order=g.sort_order,
+                dept_prefix=g.dept_prefix,
+                min_number=g.min_number,
+                courses=tuple(group_courses.get(g.id, ())),
+            )
+        )
+
+    programs = {
+        p.code: ProgramRow(p.id, p.code, p.name, p.total_credits, tuple(groups_by_program.get(p.id, ())))
+        for p in session.query(DegreeProgram)
+    }
+
+    index = compile_prereq_index(courses.keys(), prereqs)
+    return CatalogSnapshot(
+        version=version,
+        courses=MappingProxyType(courses),
+        courses_by_code=MappingProxyType({c.code.strip().upper(): c for c in courses.values()}),
+        courses_by_dept=MappingProxyType(
+            {d: tuple(sorted(rows, key=lambda r: (r.number, r.id))) for d, rows in by_dept.items()}
+        ),
+        prereqs=MappingProxyType(prereqs),
+        programs=MappingProxyType(programs),
+        prereq_index=index,
+        prereq_graph=compile_prereq_graph(index, prereqs),
+    )
+
+
+def get_catalog_snapshot(session: Session | None = None) -> CatalogSnapshot:
+    """
+    Return the process-wide snapshot, rebuilding it only when the stored
+    catalog version differs from the one it was built from.
+    """
+    global _snapshot
+    session = session or db.session
+    version = current_catalog_version(session)
+    snap = _snapshot
+    if snap is not None and snap.version == version:
+        return snap
+    with _lock:
+        snap = _snapshot
+        if snap is None or snap.version != version:
+            snap = build_catalog_snapshot(session, version)
+            _snapshot = snap
+    return snap
+
+
+def reset_catalog_snapshot() -> None:
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def _touches_catalog(session: Session) -> bool:
+    if any(isinstance(obj, CATALOG_MODELS) for obj in session.new):
+        return True
+    if any(isinstance(obj, CATALOG_MODELS) for obj in session.deleted):
+        return True
+    return any(
+        isinstance(obj, CATALOG_MODELS) and session.is_modified(obj, include_collections=False)
+        for obj in session.dirty
+    )
+
+
+def _sync_term_masks(session: Session) -> None:
+    """Keep CourseCatalog.term_mask in step with CourseTypicalOffering rows."""
+    changes: list[tuple[CourseTypicalOffering, str | None, str | None]] = []
+    for obj in session.new:
+        if isinstance(obj, CourseTypicalOffering):
+            changes.append((obj, None, obj.term))
+    for obj in session.deleted:
+        if isinstance(obj, CourseTypicalOffering):
+            changes.append((obj, obj.term, None))
+    for obj in session.dirty:
+        if isinstance(obj, CourseTypicalOffering):
+            hist = inspect(obj).attrs.term.history
+            if hist.has_changes():
+                changes.append((obj, hist.deleted[0] if hist.deleted else None, obj.term))
+    if not changes:
+        return
+    with session.no_autoflush:
+        for obj, old, new in changes:
+            course = obj.course or session.get(CourseCatalog, obj.course_id)
+            if course is None:
+                continue
+            mask = course.term_mask or 0
+            if old:
+                mask &= ~TERM_BITS.get(old, 0)
+            if new:
+                mask |= TERM_BITS.get(new, 0)
+            course.term_mask = mask
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_catalog_write(session: Session, _flush_context, _instances) -> None:
+    _sync_term_masks(session)
+    # one bump per transaction is enough, however many flushes it takes
+    if session.info.get("catalog_bumped") or not _touches_catalog(session):
+        return
+    bump_catalog_version(session)
+    session.info["catalog_bumped"] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_soft_rollback")
+def _reset_bump_flag(session: Session, *_args) -> None:
+    session.info.pop("catalog_bumped", None)
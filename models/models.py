@@ -13,7 +13,8 @@ from sqlalchemy import (
     Boolean,
     Index,
 )
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import relationship, Mapped, mapped_column, validates
 
 db = SQLAlchemy()
 
@@ -21,12 +22,39 @@ TermEnum = SAEnum("SPRING", "SUMMER", "FALL", name="term_enum")
 ReqKind = SAEnum("ALL", "ANY_COUNT", "FILTER", name="req_kind")
 CourseStatus = SAEnum("PLANNED", "IN_PROGRESS", "COMPLETED", name="course_status")
 
+# StudentSemester.order and StudentCourse.position are sparse: new rows go
+# ORDER_GAP past the last one, moves take the midpoint of their neighbours.
+ORDER_GAP = 1024
+
+# one bit per term for CourseCatalog.term_mask
+TERM_BITS = {"SPRING": 1, "SUMMER": 2, "FALL": 4}
+
+
+def parse_course_code(code: str | None) -> tuple[str | None, int | None]:
+    """'CSCI 220' -> ('CSCI', 220); 'MATH 160A' -> ('MATH', None); anything else -> (None, None)."""
+    parts = (code or "").strip().upper().split()
+    if len(parts) != 2:
+        return None, None
+    dept, num_s = parts
+    try:
+        return dept, int(num_s)
+    except ValueError:
+        return dept, None
+
+
+def course_code_fields(code: str | None) -> tuple[str | None, int | None, str | None]:
+    """(department, number, level) as stored on CourseCatalog: 'CSCI 220' -> ('CSCI', 220, '200')."""
+    dept, num = parse_course_code(code)
+    return dept, num, (str(num // 100 * 100) if num is not None else None)
+
 
 class User(db.Model):
     __tablename__ = "user"
     id: Mapped[int] = mapped_column(primary_key=True)
     email: Mapped[str] = mapped_column(db.String(255), unique=True, nullable=False)
     name: Mapped[str] = mapped_column(db.String(120), nullable=False)
+    # bumped on every StudentSemester / StudentCourse write (see models/plan.py)
+    plan_version: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0)
 
     semesters: Mapped[list["StudentSemester"]] = relationship(
         back_populates="student",
@@ -39,6 +67,35 @@ class User(db.Model):
     )
 
 
+class AppMeta(db.Model):
+    __tablename__ = "app_meta"
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[str] = mapped_column(String(255), nullable=False)
+
+
+class PlanChange(db.Model):
+    """
+    Append-only log of plan writes, one row per semester/class touched in a
+    transaction, stamped with the plan_version that transaction produced.
+    Written by the flush hook in models/plan.py; read by /api/plan/changes.
+    Only the last PLAN_CHANGE_RETAIN versions per student are kept.
+    """
+    __tablename__ = "plan_change"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    student_id: Mapped[int] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    version: Mapped[int] = mapped_column(db.Integer, nullable=False)
+    entity: Mapped[str] = mapped_column(db.String(16), nullable=False)  # "semester" | "class"
+    entity_id: Mapped[int] = mapped_column(db.Integer, nullable=False)
+    op: Mapped[str] = mapped_column(db.String(8), nullable=False)  # "upsert" | "delete"
+
+    __table_args__ = (
+        Index("ix_plan_change_student_version", "student_id", "version"),
+    )
+
+
 class CourseCatalog(db.Model):
     __tablename__ = "course_catalog"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -48,6 +105,8 @@ class CourseCatalog(db.Model):
     credits: Mapped[float] = mapped_column(db.Float, nullable=False, default=3.0)
     department: Mapped[str | None] = mapped_column(db.String(64))
     level: Mapped[str | None] = mapped_column(db.String(16))
+    number: Mapped[int | None] = mapped_column(db.Integer)
+    term_mask: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0)
 
     prereq_rules: Mapped[list["CoursePrereq"]] = relationship(
         "CoursePrereq",
@@ -67,7 +126,15 @@ class CourseCatalog(db.Model):
         cascade="all, delete-orphan",
     )
 
-    __table_args__ = (UniqueConstraint("code", name="uq_catalog_code"),)
+    __table_args__ = (
+        UniqueConstraint("code", name="uq_catalog_code"),
+        Index("ix_catalog_dept_number", "department", "number"),
+    )
+
+    @validates("code")
+    def _parse_code(self, _key: str, code: str) -> str:
+        self.department, self.number, self.level = course_code_fields(code)
+        return code
 
 
 class StudentSemester(db.Model):
@@ -196,111 +263,25 @@ class DegreeProgram(db.Model):
 
     @staticmethod
     def audit_program(session, student_id: int, program_code: str, include_planned: bool = True) -> dict[str, Any]:
-        prog = session.query(DegreeProgram).filter_by(code=program_code).one()
-        q = session.query(StudentCourse).filter_by(student_id=student_id)
+        """
+        Which of the student's courses count toward each group. Courses are
+        assigned by maximum matching (see models/audit.py), so a course that
+        fits two groups lands where it satisfies the most. Planned and
+        in-progress courses have no grade yet and count as meeting minimums.
+        """
+        from models.catalog import get_catalog_snapshot
+        from models.audit import get_program_audit, run_audit, audit_grade
+
+        snap = get_catalog_snapshot(session)
+        pa = get_program_audit(snap, program_code)
+        if pa is None:
+            raise NoResultFound(f"degree program {program_code!r} not found")
+        q = session.query(StudentCourse.course_id, StudentCourse.status, StudentCourse.grade).filter_by(
+            student_id=student_id
+        )
         if not include_planned:
             q = q.filter(StudentCourse.status == "COMPLETED")
-        scs = q.all()
-
-        grade_rank = {"A": 12, "A-": 11, "B+": 10, "B": 9, "B-": 8, "C+": 7, "C": 6, "C-": 5, "D": 3, "F": 0}
-
-        def meets_min(sc: StudentCourse, min_grade: str | None) -> bool:
-            if min_grade is None:
-                return True
-            if not sc.grade:
-                return False
-            return grade_rank.get(sc.grade.upper(), -1) >= grade_rank.get(min_grade.upper(), 99)
-
-        by_course_id = {sc.course_id: sc for sc in scs}
-        taken_ids = set(by_course_id.keys())
-        used: set[int] = set()
-        catalog = {c.id: c for c in session.query(CourseCatalog).all()}
-
-        out = {
-            "program": {"code": prog.code, "name": prog.name, "total_credits": prog.total_credits},
-            "groups": [],
-            "summary": {"credits_applied": 0, "courses_applied": 0},
-        }
-
-        for g in prog.groups:
-            applied: list[int] = []
-            missing: list[int] = []
-            options: list[int] = []
-
-            if g.kind == "ALL":
-                listed = [rc.course_id for rc in g.courses]
-                for cid in listed:
-                    sc = by_course_id.get(cid)
-                    if sc and meets_min(sc, "C") and (cid not in used or g.allow_double_count):
-                        applied.append(cid)
-                        if not g.allow_double_count:
-                            used.add(cid)
-                    else:
-                        missing.append(cid)
-                satisfied = len(missing) == 0
-                need = len(listed)
-
-            elif g.kind == "ANY_COUNT":
-                listed = [rc.course_id for rc in g.courses]
-                options = list(listed)
-                eligible = []
-                for cid in listed:
-                    sc = by_course_id.get(cid)
-                    if not sc:
-                        continue
-                    rc = next((x for x in g.courses if x.course_id == cid), None)
-                    min_g = rc.min_grade if rc else None
-                    if (cid not in used or g.allow_double_count) and meets_min(sc, min_g or "C"):
-                        eligible.append(cid)
-                applied = eligible[: g.min_count]
-                for cid in applied:
-                    if not g.allow_double_count:
-                        used.add(cid)
-                satisfied = len(applied) >= g.min_count
-                need = g.min_count
-
-            else:  # FILTER
-                eligible = []
-                for cid in taken_ids:
-                    if cid in used and not g.allow_double_count:
-                        continue
-                    course = catalog[cid]
-                    code = course.code.strip().upper()
-                    parts = code.split()
-                    if len(parts) != 2:
-                        continue
-                    dept, num_s = parts
-                    try:
-                        num = int(num_s)
-                    except ValueError:
-                        continue
-                    if (g.dept_prefix and dept == g.dept_prefix) and (g.min_number is None or num >= g.min_number):
-                        eligible.append(cid)
-                applied = eligible[: g.min_count]
-                for cid in applied:
-                    if not g.allow_double_count:
-                        used.add(cid)
-                satisfied = len(applied) >= g.min_count
-                need = g.min_count
-
-            credits = sum(catalog[cid].credits for cid in applied)
-            out["groups"].append(
-                {
-                    "group_id": g.id,
-                    "title": g.title,
-                    "kind": g.kind,
-                    "required_count": need,
-                    "applied_course_ids": applied,
-                    "missing_course_ids": missing,
-                    "options_course_ids": options,
-                    "satisfied": satisfied,
-                    "credits_applied": credits,
-                }
-            )
-            out["summary"]["credits_applied"] += credits
-            out["summary"]["courses_applied"] += len(applied)
-
-        return out
+        return run_audit(pa, snap, {cid: audit_grade(status, grade) for cid, status, grade in q})
 
 
 class ReqGroup(db.Model):
@@ -329,6 +310,7 @@ class ReqGroup(db.Model):
             "(kind <> 'FILTER') OR (dept_prefix IS NOT NULL OR min_number IS NOT NULL)",
             name="ck_filter_params",
         ),
+        UniqueConstraint("program_id", "title", name="uq_req_group_title"),
     )
 
 
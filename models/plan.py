@@ -0,0 +1,208 @@
+# models/plan.py
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm import Session
+
+from models.models import User, StudentSemester, StudentCourse, PlanChange
+from models.catalog import CatalogSnapshot
+from models.prereqs import revalidate, validate_plan
+
+PLAN_MODELS = (StudentSemester, StudentCourse)
+
+ENTITY_OF = {StudentSemester: "semester", StudentCourse: "class"}
+
+# the change log keeps at least the last PLAN_CHANGE_RETAIN versions per
+# student; anything asking from further back must reload the whole plan.
+# Old rows are pruned on every PLAN_CHANGE_PRUNE_EVERY-th version.
+PLAN_CHANGE_RETAIN = 256
+PLAN_CHANGE_PRUNE_EVERY = 32
+
+
+def _touched_students(session: Session) -> set[int]:
+    ids: set[int] = set()
+    for obj in session.new:
+        if isinstance(obj, PLAN_MODELS):
+            ids.add(obj.student_id or (obj.student and obj.student.id))
+    for obj in session.deleted:
+        if isinstance(obj, PLAN_MODELS):
+            ids.add(obj.student_id)
+    for obj in session.dirty:
+        if isinstance(obj, PLAN_MODELS) and session.is_modified(obj, include_collections=False):
+            ids.add(obj.student_id)
+    ids.discard(None)
+    return ids
+
+
+def bump_plan_version(session: Session, student_id: int) -> None:
+    with session.no_autoflush:
+        user = session.get(User, student_id)
+        if user is not None and user not in session.new:
+            # SQL-side increment, so concurrent writers never hand out the same version
+            user.plan_version = User.plan_version + 1
+
+
+def _flushed_changes(session: Session) -> list[tuple[int, str, int, str]]:
+    """(student_id, entity, entity_id, op) for every plan row the flush just wrote."""
+    out = []
+    for obj in session.new:
+        if isinstance(obj, PLAN_MODELS):
+            out.append((obj.student_id, ENTITY_OF[type(obj)], obj.id, "upsert"))
+    for obj in session.dirty:
+        if isinstance(obj, PLAN_MODELS) and session.is_modified(obj, include_collections=False):
+            out.append((obj.student_id, ENTITY_OF[type(obj)], obj.id, "upsert"))
+    for obj in session.deleted:
+        if isinstance(obj, PLAN_MODELS):
+            out.append((obj.student_id, ENTITY_OF[type(obj)], obj.id, "delete"))
+    return out
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_plan_write(session: Session, _flush_context, _instances) -> None:
+    # once per student per transaction
+    bumped: set[int] = session.info.setdefault("plan_bumped", set())
+    for sid in _touched_students(session) - bumped:
+        bump_plan_version(session, sid)
+        bumped.add(sid)
+
+
+@event.listens_for(Session, "after_flush")
+def _log_plan_changes(session: Session, _flush_context) -> None:
+    # ids are assigned by now; new/dirty/deleted still describe this flush
+    logged: set[tuple[int, str, int, str]] = session.info.setdefault("plan_logged", set())
+    rows = []
+    versions: dict[int, int] = {}
+    for change in _flushed_changes(session):
+        if change in logged:
+            continue
+        logged.add(change)
+        sid, entity, entity_id, op = change
+        if sid not in versions:
+            # reloads the incremented value inside this transaction
+            user = session.get(User, sid)
+            versions[sid] = int(user.plan_version or 0) if user is not None else 0
+        rows.append({
+            "student_id": sid, "version": versions[sid],
+            "entity": entity, "entity_id": entity_id, "op": op,
+        })
+    if rows:
+        session.connection().execute(insert(PlanChange), rows)
+    for sid, version in versions.items():
+        if version % PLAN_CHANGE_PRUNE_EVERY == 0:
+            session.connection().execute(
+                delete(PlanChange).where(
+                    PlanChange.student_id == sid, PlanChange.version <= version - PLAN_CHANGE_RETAIN
+                )
+            )
+
+
+def changes_retained_since(since: int, version: int) -> bool:
+    """Whether the log still holds every change after `since` (at plan version `version`)."""
+    return since >= version - PLAN_CHANGE_RETAIN
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_soft_rollback")
+def _reset_plan_bumps(session: Session, *_args) -> None:
+    session.info.pop("plan_bumped", None)
+    session.info.pop("plan_logged", None)
+
+
+# past this many changed rows a fresh sweep is cheaper than catching up
+CATCH_UP_MAX = 64
+
+
+@dataclass(frozen=True)
+class PlanCheck:
+    """
+    Prereq validity of a student's whole plan at one plan/catalog version,
+    kept so later edits only recheck the courses they touch.
+    """
+
+    version: int
+    catalog_version: str
+    orders: dict[int, int]  # semester id -> order
+    classes: dict[int, tuple[int, int]]  # StudentCourse id -> (course_id, semester_id)
+    placed: dict[int, tuple[int, str]]  # course_id -> (semester order, status)
+    unmet: dict[int, list[int]]  # course_id -> unmet prereq ids, invalid courses only
+    checked: int = 0  # courses evaluated to produce this check
+    incremental: bool = False
+
+
+def check_plan(session: Session, student_id: int, version: int, snap: CatalogSnapshot) -> PlanCheck:
+    """Validate every class of the plan in one sweep."""
+    orders = dict(
+        session.execute(
+            select(StudentSemester.id, StudentSemester.order).where(StudentSemester.student_id == student_id)
+        ).all()
+    )
+    classes: dict[int, tuple[int, int]] = {}
+    placed: dict[int, tuple[int, str]] = {}
+    q = select(StudentCourse.id, StudentCourse.course_id, StudentCourse.semester_id, StudentCourse.status).where(
+        StudentCourse.student_id == student_id
+    )
+    for sc_id, cid, sem_id, status in session.execute(q):
+        classes[sc_id] = (cid, sem_id)
+        placed[cid] = (orders[sem_id], status)
+    unmet = validate_plan(snap.prereq_index, placed)
+    return PlanCheck(version, snap.version, orders, classes, placed, unmet, checked=len(placed))
+
+
+def catch_up(session: Session, prev: PlanCheck, student_id: int, version: int, snap: CatalogSnapshot) -> PlanCheck:
+    """
+    Bring an older check up to `version` from the plan change log: reload
+    only the classes and semesters that changed since, then recheck the
+    moved courses and their direct dependents. Falls back to a full sweep
+    when the catalog changed, too much of the plan did, or the log no longer
+    reaches back to the older check.
+    """
+    if prev.catalog_version != snap.version or not changes_retained_since(prev.version, version):
+        return check_plan(session, student_id, version, snap)
+    changes = session.execute(
+        select(PlanChange.entity, PlanChange.entity_id)
+        .where(PlanChange.student_id == student_id, PlanChange.version > prev.version)
+        .distinct()
+    ).all()
+    if len(changes) > CATCH_UP_MAX:
+        return check_plan(session, student_id, version, snap)
+
+    sem_ids = {eid for entity, eid in changes if entity == "semester"}
+    class_ids = {eid for entity, eid in changes if entity == "class"}
+    orders = dict(prev.orders)
+    classes = dict(prev.classes)
+    placed = dict(prev.placed)
+    unmet = {cid: ids for cid, ids in prev.unmet.items()}
+    if sem_ids:
+        # a moved semester moves every class in it
+        for sem_id in sem_ids:
+            orders.pop(sem_id, None)
+        orders.update(
+            session.execute(
+                select(StudentSemester.id, StudentSemester.order).where(
+                    StudentSemester.student_id == student_id, StudentSemester.id.in_(sem_ids)
+                )
+            ).all()
+        )
+        class_ids.update(sc_id for sc_id, (_, sem_id) in classes.items() if sem_id in sem_ids)
+
+    changed: set[int] = set()
+    for sc_id in class_ids:
+        old = classes.pop(sc_id, None)
+        if old is not None:
+            placed.pop(old[0], None)
+            changed.add(old[0])
+    if class_ids:
+        q = select(StudentCourse.id, StudentCourse.course_id, StudentCourse.semester_id, StudentCourse.status).where(
+            StudentCourse.student_id == student_id, StudentCourse.id.in_(class_ids)
+        )
+        for sc_id, cid, sem_id, status in session.execute(q):
+            classes[sc_id] = (cid, sem_id)
+            placed[cid] = (orders[sem_id], status)
+            changed.add(cid)
+    checked = revalidate(snap.prereq_index, snap.prereq_graph, placed, unmet, changed)
+    return replace(
+        prev, version=version, orders=orders, classes=classes, placed=placed, unmet=unmet,
+        checked=checked, incremental=True,
+    )
@@ -0,0 +1,289 @@
+# models/plan_solver.py
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Mapping
+
+from models.audit import PENDING, ProgramAudit, assign, candidates
+from models.catalog import CatalogSnapshot, matches_filter
+
+DEFAULT_BUDGET_MS = 200
+MAX_BUDGET_MS = 2000
+MAX_PASSES = 500
+# randomized passes pick each course among this many best-ranked candidates
+TOP_K = 3
+
+
+@dataclass(frozen=True, slots=True)
+class OpenSlot:
+    """A semester the generator may add to, with what the caps still allow."""
+
+    semester_id: int
+    order: int
+    term_bit: int  # 0: the semester has no term, any offering fits
+    classes: int
+    credits: float
+
+
+@dataclass
+class GeneratedPlan:
+    placements: list[tuple[int, int]] = field(default_factory=list)  # (slot index, course_id)
+    short: dict[int, int] = field(default_factory=dict)  # group index -> courses still missing
+    unscheduled: list[int] = field(default_factory=list)  # wanted but found no semester
+    span: int = -1  # last slot index used
+    passes: int = 0
+    elapsed_ms: float = 0.0
+    timed_out: bool = False
+    partial: bool = False  # the budget ran out inside pass 0: only part of it was done
+
+    def score(self) -> tuple[int, int, int]:
+        return sum(self.short.values()), self.span, len(self.placements)
+
+
+def group_deficits(pa: ProgramAudit, snap: CatalogSnapshot, taken: Mapping[int, str | None]) -> dict[int, int]:
+    """Group index -> how many more courses the group needs, after the audit's matching."""
+    applied = assign(pa, candidates(pa, snap, taken))
+    return {gi: g.need - len(got) for gi, (g, got) in enumerate(zip(pa.groups, applied)) if len(got) < g.need}
+
+
+class PlanSearch:
+    """
+    Fill open semesters so a program's groups are satisfied.
+
+    Each pass has two steps. First it picks courses for the short groups,
+    cheapest first: the fewest new courses once their prereqs are pulled
+    in. Then it list-schedules them semester by semester. A course goes in
+    the first open semester where one of its prereq groups is met (strict
+    rules in an earlier term, concurrent rules in the same term or
+    earlier), the term matches its typical offerings, and the class and
+    credit caps still allow it. Courses with the longest chain of
+    dependents go first. Pass 0 is deterministic; later passes break ties
+    at random and keep the best plan found so far. The score is
+    (courses still missing, last semester used, courses added). A pass is
+    pruned as soon as it can't beat the best plan, and the search stops
+    when the time budget runs out. The budget is checked between groups
+    and between semesters too, so pass 0 can't overrun it either: cut
+    short, it returns what it had scheduled, flagged partial.
+    """
+
+    def __init__(
+        self,
+        snap: CatalogSnapshot,
+        pa: ProgramAudit,
+        placed: Mapping[int, int],
+        taken: Mapping[int, str | None],
+        slots: list[OpenSlot],
+    ):
+        self.snap = snap
+        self.pa = pa
+        self.placed = placed  # course_id -> semester order, for every course already in the plan
+        self.taken = taken
+        self.slots = sorted(slots, key=lambda s: s.order)
+        graph = snap.prereq_graph
+        self.topo_pos = {cid: i for i, cid in enumerate(graph.topo_order)}
+        self.deficit = group_deficits(pa, snap, taken)
+        self.pools = {gi: self._pool(gi) for gi in self.deficit}
+        self._closure: dict[int, frozenset[int]] = {}
+        self.deadline: float | None = None  # perf_counter() value, set by run()
+
+    def _expired(self) -> bool:
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def _pool(self, gi: int) -> list[int]:
+        g = self.pa.groups[gi]
+        if g.kind == "FILTER":
+            if not g.dept_prefix:
+                return []
+            ids = [c.id for c in self.snap.courses_by_dept.get(g.dept_prefix, ()) if matches_filter(c, g.dept_prefix, g.min_number)]
+        else:
+            ids = [cid for cid in g.listed if cid in self.snap.courses]
+        blocked = self.snap.prereq_graph.blocked_by_cycle
+        return [cid for cid in ids if cid not in self.placed and cid not in blocked]
+
+    def require(self, cid: int, need: set[int]) -> None:
+        """Add cid and, for each new course, its prereq group needing the fewest new courses."""
+        graph = self.snap.prereq_graph
+        stack = [cid]
+        while stack:
+            c = stack.pop()
+            if c in need or c in self.placed:
+                continue
+            need.add(c)
+            best = None
+            for pg in self.snap.prereqs.get(c, ()):
+                ids = [r.prereq_course_id for r in pg.rules]
+                if any(p in graph.blocked_by_cycle for p in ids):
+                    continue
+                key = (
+                    sum(1 for p in ids if p not in need and p not in self.placed),
+                    max((graph.term_depth[p] for p in ids), default=0),
+                )
+                if best is None or key < best[0]:
+                    best = (key, ids)
+            if best is not None:
+                stack.extend(best[1])
+
+    def closure(self, cid: int) -> frozenset[int]:
+        got = self._closure.get(cid)
+        if got is None:
+            need: set[int] = set()
+            self.require(cid, need)
+            got = self._closure[cid] = frozenset(need)
+        return got
+
+    def choose(self, rnd: random.Random | None) -> tuple[set[int], int, bool]:
+        """
+        New courses to add (prereqs included), how many group slots no pool
+        could fill, and whether the deadline cut the choice short (groups
+        not reached count as unfillable).
+        """
+        need: set[int] = set()
+        claimed: set[int] = set()  # counted by a group that can't share
+        unfillable = 0
+        cut = False
+        courses = self.snap.courses
+        depth = self.snap.prereq_graph.term_depth
+        for gi, short in self.deficit.items():
+            if cut or self._expired():
+                cut = True
+                unfillable += short
+                continue
+            g = self.pa.groups[gi]
+            pool = [c for c in self.pools[gi] if g.double or c not in claimed]
+            pool.sort(key=lambda c: (c not in need, len(self.closure(c) - need), depth[c], courses[c].code))
+            picks = []
+            while pool and len(picks) < short:
+                i = rnd.randrange(min(TOP_K, len(pool))) if rnd else 0
+                picks.append(pool.pop(i))
+            unfillable += short - len(picks)
+            for cid in picks:
+                if not g.double:
+                    claimed.add(cid)
+                self.require(cid, need)
+        return need, unfillable, cut
+
+    def ready(self, cid: int, order: int, pos: Mapping[int, int]) -> bool:
+        pgs = self.snap.prereqs.get(cid, ())
+        if not pgs:
+            return True
+        for pg in pgs:
+            for r in pg.rules:
+                at = pos.get(r.prereq_course_id)
+                if at is None or at > order or (at == order and not r.allow_concurrent):
+                    break
+            else:
+                return True
+        return False
+
+    def schedule(self, need: set[int], rnd: random.Random | None, best: GeneratedPlan | None) -> GeneratedPlan | None:
+        """
+        List-schedule `need` into the open slots; None when pruned by `best`
+        or out of time with `best` to fall back on. Out of time without one,
+        the rest of `need` is left unscheduled and the plan flagged partial.
+        """
+        courses = self.snap.courses
+        dependents = self.snap.prereq_graph.dependents
+        height: dict[int, int] = {}
+        for cid in sorted(need, key=self.topo_pos.__getitem__, reverse=True):
+            height[cid] = max((height[d] + 1 for d in dependents.get(cid, ()) if d in need), default=0)
+        jitter = {cid: rnd.random() for cid in need} if rnd else {}
+
+        def prio(cid: int):
+            return (-height[cid], jitter.get(cid, 0.0), courses[cid].code)
+
+        pos = dict(self.placed)
+        remaining = set(need)
+        out = GeneratedPlan()
+        stop_after = best.span if best is not None and not best.short else None
+        for si, slot in enumerate(self.slots):
+            if not remaining:
+                break
+            if stop_after is not None and si > stop_after:
+                return None  # can only tie on missing courses and lose on length
+            if self._expired():
+                if best is not None:
+                    return None
+                out.partial = True
+                break
+            classes, credits = slot.classes, slot.credits
+            progress = True
+            while progress and classes > 0:
+                progress = False
+                # concurrent prereqs placed this round can unlock more courses in the same term
+                for cid in sorted((c for c in remaining if self.ready(c, slot.order, pos)), key=prio):
+                    c = courses[cid]
+                    if classes == 0:
+                        break
+                    if slot.term_bit and c.term_mask and not c.term_mask & slot.term_bit:
+                        continue
+                    if c.credits > credits + 1e-9:
+                        continue
+                    pos[cid] = slot.order
+                    remaining.discard(cid)
+                    out.placements.append((si, cid))
+                    out.span = si
+                    classes -= 1
+                    credits -= c.credits
+                    progress = True
+        out.unscheduled = sorted(remaining, key=lambda c: courses[c].code)
+        taken = dict(self.taken)
+        taken.update((cid, PENDING) for _, cid in out.placements)
+        out.short = group_deficits(self.pa, self.snap, taken)
+        return out
+
+    def run(self, budget_ms: float = DEFAULT_BUDGET_MS, seed: int = 0) -> GeneratedPlan:
+        t0 = time.perf_counter()
+        deadline = self.deadline = t0 + budget_ms / 1000
+        best: GeneratedPlan | None = None
+        rnd = random.Random(seed)
+        passes = 0
+        timed_out = False
+        while passes < MAX_PASSES:
+            if passes and time.perf_counter() >= deadline:
+                timed_out = True
+                break
+            r = rnd if passes else None
+            passes += 1
+            need, unfillable, cut = self.choose(r)
+            if cut and best is not None:
+                timed_out = True
+                break
+            if best is not None and unfillable > sum(best.short.values()):
+                continue
+            plan = self.schedule(need, r, best)
+            if plan is not None and cut:
+                plan.partial = True
+            if plan is not None and (best is None or plan.score() < best.score()):
+                best = plan
+            if not self.deficit or (best is not None and not best.short and best.span <= self._span_bound(best)):
+                break  # nothing to do, or no plan can finish earlier
+        best.passes = passes
+        best.timed_out = timed_out or best.partial
+        best.elapsed_ms = (time.perf_counter() - t0) * 1000
+        return best
+
+    def _span_bound(self, plan: GeneratedPlan) -> int:
+        """The earliest slot index by which the plan's courses could fit under the caps at all."""
+        n = len(plan.placements)
+        credits = sum(self.snap.courses[cid].credits for _, cid in plan.placements)
+        room = room_credits = 0.0
+        for si, slot in enumerate(self.slots):
+            room += slot.classes
+            room_credits += slot.credits
+            if room >= n and room_credits + 1e-9 >= credits:
+                return si
+        return len(self.slots) - 1
+
+
+def generate_plan(
+    snap: CatalogSnapshot,
+    pa: ProgramAudit,
+    placed: Mapping[int, int],
+    taken: Mapping[int, str | None],
+    slots: list[OpenSlot],
+    budget_ms: float = DEFAULT_BUDGET_MS,
+    seed: int = 0,
+) -> GeneratedPlan:
+    return PlanSearch(snap, pa, placed, taken, slots).run(budget_ms, seed)
@@ -0,0 +1,336 @@
+# models/prereqs.py
+from __future__ import annotations
+
+import heapq
+import logging
+from dataclasses import dataclass
+from typing import Mapping
+
+log = logging.getLogger(__name__)
+
+PLACED_STATUSES = frozenset({"PLANNED", "IN_PROGRESS", "COMPLETED"})
+
+
+@dataclass(frozen=True, slots=True)
+class PrereqIndex:
+    """
+    CoursePrereq OR-of-AND groups compiled to integer bitmasks.
+
+    Every catalog course gets one bit; bits are assigned in ascending course id
+    so decoding a mask yields ids already sorted. Each group of a course is a
+    pair of masks: rules that must be in an earlier term, and rules that may
+    also sit in the anchor term (allow_concurrent).
+    """
+
+    bit_of: Mapping[int, int]
+    course_ids: tuple[int, ...]
+    groups: Mapping[int, tuple[tuple[int, int], ...]]
+
+
+def compile_prereq_index(course_ids, prereqs) -> PrereqIndex:
+    ids = tuple(sorted(course_ids))
+    bit_of = {cid: i for i, cid in enumerate(ids)}
+    groups: dict[int, tuple[tuple[int, int], ...]] = {}
+    for cid, pgs in prereqs.items():
+        compiled = []
+        for pg in pgs:
+            strict = concurrent = 0
+            for r in pg.rules:
+                bit = 1 << bit_of[r.prereq_course_id]
+                if r.allow_concurrent:
+                    concurrent |= bit
+                else:
+                    strict |= bit
+            compiled.append((strict, concurrent))
+        groups[cid] = tuple(compiled)
+    return PrereqIndex(bit_of=bit_of, course_ids=ids, groups=groups)
+
+
+def placement_masks(index: PrereqIndex, placed: Mapping[int, tuple[int | None, str | None]], anchor: int) -> tuple[int, int]:
+    """
+    Return (before, at) masks for a student's plan: courses placed in a term
+    earlier than the anchor, and courses placed in the anchor term itself.
+    `placed` maps course_id -> (semester order, status).
+    """
+    before = at = 0
+    bit_of = index.bit_of
+    for cid, (order, status) in placed.items():
+        if order is None or (status or "PLANNED") not in PLACED_STATUSES:
+            continue
+        bit = bit_of.get(cid)
+        if bit is None:
+            continue
+        if order < anchor:
+            before |= 1 << bit
+        elif order == anchor:
+            at |= 1 << bit
+    return before, at
+
+
+def mask_to_ids(index: PrereqIndex, mask: int) -> list[int]:
+    out = []
+    ids = index.course_ids
+    while mask:
+        low = mask & -mask
+        out.append(ids[low.bit_length() - 1])
+        mask ^= low
+    return out
+
+
+def evaluate_prereqs(index: PrereqIndex, placed: Mapping[int, tuple[int | None, str | None]], anchor: int) -> dict[int, list[int]]:
+    """
+    Evaluate every course's prereqs against one anchor term in a single pass.
+
+    Returns {course_id: sorted unmet prereq ids} for blocked courses only; a
+    course missing from the result is eligible. When no group is satisfied the
+    unmet list is the union over all groups, same as the modal has always shown.
+    """
+    before, at = placement_masks(index, placed, anchor)
+    with_concurrent = before | at
+    blocked: dict[int, list[int]] = {}
+    for cid, groups in index.groups.items():
+        missing = _unmet_mask(groups, before, with_concurrent)
+        if missing:
+            blocked[cid] = mask_to_ids(index, missing)
+    return blocked
+
+
+def _unmet_mask(groups: tuple[tuple[int, int], ...], before: int, with_concurrent: int) -> int:
+    """0 when some group is met, else the union of every group's gaps."""
+    missing = 0
+    for strict, concurrent in groups:
+        gap = (strict & ~before) | (concurrent & ~with_concurrent)
+        if not gap:
+            return 0
+        missing |= gap
+    return missing
+
+
+def _counts(entry: tuple[int | None, str | None] | None) -> bool:
+    return entry is not None and entry[0] is not None and (entry[1] or "PLANNED") in PLACED_STATUSES
+
+
+def validate_plan(index: PrereqIndex, placed: Mapping[int, tuple[int | None, str | None]]) -> dict[int, list[int]]:
+    """
+    Check every placed course against its own semester in one sweep.
+
+    Semesters are visited in order while the "placed before" mask grows, so
+    each course is checked with the same rule as evaluate_prereqs uses for
+    its anchor. Returns {course_id: unmet prereq ids} for invalid courses only.
+    """
+    bit_of = index.bit_of
+    by_order: dict[int, list[int]] = {}
+    for cid, entry in placed.items():
+        if _counts(entry) and cid in bit_of:
+            by_order.setdefault(entry[0], []).append(cid)
+    unmet: dict[int, list[int]] = {}
+    before = 0
+    for order in sorted(by_order):
+        cids = by_order[order]
+        at = 0
+        for cid in cids:
+            at |= 1 << bit_of[cid]
+        with_concurrent = before | at
+        for cid in cids:
+            groups = index.groups.get(cid)
+            if groups:
+                missing = _unmet_mask(groups, before, with_concurrent)
+                if missing:
+                    unmet[cid] = mask_to_ids(index, missing)
+        before = with_concurrent
+    return unmet
+
+
+def course_unmet(index: PrereqIndex, cid: int, placed: Mapping[int, tuple[int | None, str | None]]) -> list[int]:
+    """Unmet prereqs of one placed course; looks only at that course's own prereqs."""
+    groups = index.groups.get(cid)
+    entry = placed.get(cid)
+    if not groups or not _counts(entry):
+        return []
+    order = entry[0]
+    wanted = 0
+    for strict, concurrent in groups:
+        wanted |= strict | concurrent
+    before = at = 0
+    bit_of = index.bit_of
+    for p in mask_to_ids(index, wanted):
+        pe = placed.get(p)
+        if not _counts(pe):
+            continue
+        if pe[0] < order:
+            before |= 1 << bit_of[p]
+        elif pe[0] == order:
+            at |= 1 << bit_of[p]
+    return mask_to_ids(index, _unmet_mask(groups, before, before | at))
+
+
+def revalidate(
+    index: PrereqIndex,
+    graph: PrereqGraph,
+    placed: Mapping[int, tuple[int | None, str | None]],
+    unmet: dict[int, list[int]],
+    changed,
+) -> int:
+    """
+    Update `unmet` (from validate_plan) after the courses in `changed` were
+    added, removed or moved. A course's validity depends only on where its
+    direct prereqs sit, so only the changed courses and their direct
+    dependents are rechecked. Returns how many courses were checked.
+    """
+    todo: set[int] = set()
+    for cid in changed:
+        todo.add(cid)
+        todo.update(graph.dependents.get(cid, ()))
+    checked = 0
+    for cid in todo:
+        unmet.pop(cid, None)
+        if not _counts(placed.get(cid)):
+            continue
+        checked += 1
+        missing = course_unmet(index, cid, placed)
+        if missing:
+            unmet[cid] = missing
+    return checked
+
+
+@dataclass(frozen=True, slots=True)
+class PrereqGraph:
+    """
+    The prereq rules as a DAG (edge: prereq -> course, from any group),
+    analysed once per catalog version.
+
+    Closures are bitmasks over PrereqIndex bits. Depths follow the OR-of-AND
+    groups: a course takes its cheapest group, and a group costs as much as
+    its most expensive rule. `term_depth` honours allow_concurrent, so
+    term_depth + 1 is the fewest terms needed to reach a course.
+    `chain_depth` counts every prereq as an earlier term: the length of the
+    longest chain you can't avoid. Courses on or behind a cycle have no depth.
+    """
+
+    topo_order: tuple[int, ...]  # acyclic courses, prereqs before dependents
+    cyclic: frozenset[int]  # courses on a prereq cycle
+    blocked_by_cycle: frozenset[int]  # courses on or downstream of a cycle
+    dependents: Mapping[int, tuple[int, ...]]  # course -> courses that list it
+    ancestors: Mapping[int, int]  # course -> mask of every possible prereq, transitively
+    descendants: Mapping[int, int]  # course -> mask of everything it leads to
+    term_depth: Mapping[int, int]
+    chain_depth: Mapping[int, int]
+    best_group: Mapping[int, int]  # group index behind term_depth
+    chain_prev: Mapping[int, int]  # prereq on the longest unavoidable chain
+
+
+def compile_prereq_graph(index: PrereqIndex, prereqs) -> PrereqGraph:
+    bit_of = index.bit_of
+    edges: dict[int, set[int]] = {}  # prereq -> dependents
+    needs: dict[int, set[int]] = {}  # course -> prereqs
+    for cid, pgs in prereqs.items():
+        for pg in pgs:
+            for r in pg.rules:
+                edges.setdefault(r.prereq_course_id, set()).add(cid)
+                needs.setdefault(cid, set()).add(r.prereq_course_id)
+
+    # Kahn: whatever never reaches in-degree 0 sits on or behind a cycle
+    indeg = {cid: len(needs.get(cid, ())) for cid in index.course_ids}
+    ready = [cid for cid in index.course_ids if indeg[cid] == 0]  # sorted, so already a heap
+    topo: list[int] = []
+    while ready:
+        cid = heapq.heappop(ready)
+        topo.append(cid)
+        for d in edges.get(cid, ()):
+            indeg[d] -= 1
+            if indeg[d] == 0:
+                heapq.heappush(ready, d)
+    rest = {cid for cid, n in indeg.items() if n > 0}
+    # trim courses that are merely downstream: the cycles are what's left after
+    # repeatedly dropping courses nothing else in `rest` depends on
+    on_cycle = set(rest)
+    out_deg = {cid: sum(1 for d in edges.get(cid, ()) if d in on_cycle) for cid in on_cycle}
+    leaves = [cid for cid, n in out_deg.items() if n == 0]
+    while leaves:
+        cid = leaves.pop()
+        on_cycle.discard(cid)
+        for p in needs.get(cid, ()):
+            if p in on_cycle:
+                out_deg[p] -= 1
+                if out_deg[p] == 0:
+                    leaves.append(p)
+    if on_cycle:
+        log.warning("prereq cycle among course ids %s", sorted(on_cycle))
+
+    anc: dict[int, int] = {}
+    for cid in topo:
+        m = 0
+        for p in needs.get(cid, ()):
+            m |= (1 << bit_of[p]) | anc[p]
+        anc[cid] = m
+    # cyclic part: iterate to a fixpoint (only runs on bad data)
+    changed = bool(rest)
+    while changed:
+        changed = False
+        for cid in rest:
+            m = anc.get(cid, 0)
+            for p in needs.get(cid, ()):
+                m |= (1 << bit_of[p]) | anc.get(p, 0)
+            if m != anc.get(cid):
+                anc[cid] = m
+                changed = True
+
+    desc: dict[int, int] = {}
+    for cid in reversed(topo):
+        m = 0
+        for d in edges.get(cid, ()):
+            m |= (1 << bit_of[d]) | desc.get(d, 0)
+        desc[cid] = m
+    changed = bool(rest)
+    while changed:
+        changed = False
+        for cid in list(rest) + topo:
+            m = desc.get(cid, 0)
+            for d in edges.get(cid, ()):
+                m |= (1 << bit_of[d]) | desc.get(d, 0)
+            if m != desc.get(cid):
+                desc[cid] = m
+                changed = True
+
+    term_depth: dict[int, int] = {}
+    chain_depth: dict[int, int] = {}
+    best_group: dict[int, int] = {}
+    chain_prev: dict[int, int] = {}
+    for cid in topo:
+        pgs = prereqs.get(cid, ())
+        if not pgs:
+            term_depth[cid] = chain_depth[cid] = 0
+            continue
+        best_t = best_c = None
+        for gi, pg in enumerate(pgs):
+            t = c = 0
+            prev = None
+            for r in pg.rules:
+                p = r.prereq_course_id
+                t = max(t, term_depth[p] + (0 if r.allow_concurrent else 1))
+                if chain_depth[p] + 1 > c:
+                    c, prev = chain_depth[p] + 1, p
+            if best_t is None or t < best_t:
+                best_t = t
+                best_group[cid] = gi
+            if best_c is None or c < best_c:
+                best_c = c
+                if prev is None:
+                    chain_prev.pop(cid, None)
+                else:
+                    chain_prev[cid] = prev
+        term_depth[cid] = best_t
+        chain_depth[cid] = best_c
+
+    return PrereqGraph(
+        topo_order=tuple(topo),
+        cyclic=frozenset(on_cycle),
+        blocked_by_cycle=frozenset(rest),
+        dependents={p: tuple(sorted(ds)) for p, ds in edges.items()},
+        ancestors=anc,
+        descendants=desc,
+        term_depth=term_depth,
+        chain_depth=chain_depth,
+        best_group=best_group,
+        chain_prev=chain_prev,
+    )
@@ -0,0 +1,118 @@
+# models/search.py
+from __future__ import annotations
+
+import logging
+import re
+
+from sqlalchemy import text, table, column, literal_column, select, func, literal
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+
+FTS_TABLE = "course_catalog_fts"
+
+# code columns outweigh the title, which outweighs the description
+RANK_EXPR = f"bm25({FTS_TABLE}, 10.0, 10.0, 4.0, 1.0)"
+
+# Ranking costs one bm25() call per match, so only queries with at most this
+# many matches get ranked. Broader ones (a letter or two typed so far) are
+# narrowed to code/title and listed in code order straight off the code index.
+RANK_WINDOW = 1000
+
+fts = table(FTS_TABLE, column("rowid"))
+
+# A regular (not external-content) FTS5 table so it can also index the code
+# without its space ("CSCI220"). Triggers keep it in step with every write to
+# course_catalog, ORM or raw SQL.
+_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        code, code_compact, title, description,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '1 2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS course_catalog_fts_ai AFTER INSERT ON course_catalog BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, code, code_compact, title, description)
+        VALUES (new.id, new.code, replace(new.code, ' ', ''), new.title, coalesce(new.description, ''));
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS course_catalog_fts_ad AFTER DELETE ON course_catalog BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS course_catalog_fts_au AFTER UPDATE OF code, title, description ON course_catalog BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, code, code_compact, title, description)
+        VALUES (new.id, new.code, replace(new.code, ' ', ''), new.title, coalesce(new.description, ''));
+    END
+    """,
+]
+
+
+def ensure_course_search(engine: Engine) -> bool:
+    """
+    Create the FTS5 index and its sync triggers if missing, backfilling it
+    from course_catalog the first time. Returns False when the database
+    can't do FTS5 (not SQLite, or SQLite built without it); search then
+    falls back to LIKE.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+    try:
+        with engine.begin() as conn:
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": FTS_TABLE}
+            ).first()
+            for stmt in _DDL:
+                conn.execute(text(stmt))
+            if not existed:
+                conn.execute(text(
+                    f"INSERT INTO {FTS_TABLE}(rowid, code, code_compact, title, description) "
+                    "SELECT id, code, replace(code, ' ', ''), title, coalesce(description, '') FROM course_catalog"
+                ))
+    except OperationalError:
+        # e.g. "no such module: fts5"; anything else is a real error and propagates
+        log.warning("course search index unavailable, falling back to LIKE", exc_info=True)
+        return False
+    return True
+
+
+def fts_match_expr(q: str) -> str | None:
+    """
+    Turn free text into an FTS5 query: every token must match, each as a
+    prefix, so "data str" finds "Data Structures" and "csci 22" finds CSCI 220.
+    """
+    tokens = re.findall(r"\w+", q)
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def match_clause(match: str):
+    return literal_column(FTS_TABLE).op("MATCH")(match)
+
+
+def rank_clause():
+    return literal_column(RANK_EXPR)
+
+
+def match_is_broad(session: Session, match: str) -> bool:
+    probe = select(literal(1)).select_from(fts).where(match_clause(match)).limit(RANK_WINDOW + 1)
+    n = session.execute(select(func.count()).select_from(probe.subquery())).scalar()
+    return n > RANK_WINDOW
+
+
+def code_title_only(match: str) -> str:
+    return f"{{code code_compact title}} : ({match})"
+
+
+def id_in_matches(match: str):
+    # unary + keeps SQLite from driving the query off the id list, so it walks
+    # the code index in order and stops at LIMIT instead of sorting every match
+    return literal_column("+course_catalog.id").in_(select(fts.c.rowid).where(match_clause(match)))
@@ -0,0 +1,103 @@
+# models/storage.py
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Mapping
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """
+    How the app talks to its database: PRAGMAs run on every new SQLite
+    connection, plus SQLAlchemy engine/pool options.
+    """
+
+    name: str
+    pragmas: Mapping[str, Any] = field(default_factory=dict)
+    engine_options: Mapping[str, Any] = field(default_factory=dict)
+
+
+PROFILES: dict[str, StorageProfile] = {
+    # SQLite defaults: rollback journal, readers and the writer block each other
+    "legacy": StorageProfile("legacy"),
+    # WAL: readers never block the writer (or each other); NORMAL sync is
+    # durable across app crashes, only an OS crash can drop the last commits
+    "wal": StorageProfile(
+        "wal",
+        pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -16000,  # KiB, so ~16 MB of page cache per connection
+            "mmap_size": 128 * 1024 * 1024,
+            "temp_store": "MEMORY",
+        },
+        engine_options={"pool_size": 10, "max_overflow": 10},
+    ),
+    # bulk loads and benchmarks only: no fsync at all
+    "bulk": StorageProfile(
+        "bulk",
+        pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "OFF",
+            "busy_timeout": 5000,
+            "cache_size": -64000,
+            "mmap_size": 256 * 1024 * 1024,
+            "temp_store": "MEMORY",
+        },
+        engine_options={"pool_size": 10, "max_overflow": 10},
+    ),
+    # a pooled server database (PostgreSQL etc.) from DATABASE_URL
+    "server": StorageProfile(
+        "server",
+        engine_options={"pool_size": 10, "max_overflow": 20, "pool_pre_ping": True, "pool_recycle": 1800},
+    ),
+}
+
+DEFAULT_SQLITE_PROFILE = "wal"
+
+
+def database_url(default: str) -> str:
+    """DATABASE_URL wins over the built-in SQLite file; old postgres:// URLs are accepted."""
+    url = os.environ.get("DATABASE_URL") or default
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def pick_profile(url: str, name: str | None = None) -> StorageProfile:
+    """
+    The named profile (PLANNER_DB_PROFILE), else "wal" for SQLite files and
+    "server" for anything else. PLANNER_DB_POOL_SIZE overrides the pool size.
+    """
+    name = name or os.environ.get("PLANNER_DB_PROFILE")
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    if not name:
+        name = DEFAULT_SQLITE_PROFILE if is_sqlite else "server"
+    if name not in PROFILES:
+        raise ValueError(f"unknown storage profile {name!r} (choose from {', '.join(PROFILES)})")
+    profile = PROFILES[name]
+    if not is_sqlite and profile.pragmas:
+        raise ValueError(f"storage profile {name!r} is SQLite-only")
+    pool_size = os.environ.get("PLANNER_DB_POOL_SIZE")
+    if pool_size:
+        opts = dict(profile.engine_options, pool_size=int(pool_size))
+        profile = StorageProfile(profile.name, profile.pragmas, opts)
+    return profile
+
+
+def install_pragmas(engine: Engine, profile: StorageProfile) -> None:
+    """Run the profile's PRAGMAs on every new DBAPI connection of a SQLite engine."""
+    if engine.dialect.name != "sqlite" or not profile.pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        for key, value in profile.pragmas.items():
+            cur.execute(f"PRAGMA {key}={value}")
+        cur.close()
@@ -0,0 +1,88 @@
+# routes/cache.py
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+# every LRUCache registers here so /api/cache/stats can report them all
+CACHES: dict[str, "LRUCache"] = {}
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU for computed payloads, with hit/miss/eviction
+    counters. Entries carry the user they belong to so a plan write can
+    drop that user's entries without touching anyone else's.
+    """
+
+    def __init__(self, name: str, maxsize: int = 256):
+        self.name = name
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[int | None, Any]] = OrderedDict()
+        self._by_user: dict[int, set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        CACHES[name] = self
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, user_id: int | None = None) -> None:
+        with self._lock:
+            if key in self._data:
+                self._forget(key)
+            self._data[key] = (user_id, value)
+            if user_id is not None:
+                self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._data) > self.maxsize:
+                oldest = next(iter(self._data))
+                self._forget(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in self._by_user.pop(user_id, set()):
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+
+    def _forget(self, key: Hashable) -> None:
+        user_id, _ = self._data.pop(key)
+        if user_id is not None:
+            keys = self._by_user.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_user[user_id]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user's entries from every cache (call after a plan write)."""
+    for cache in CACHES.values():
+        cache.invalidate_user(user_id)
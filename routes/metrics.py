@@ -0,0 +1,224 @@
+# routes/metrics.py
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+
+from flask import Blueprint, Flask, Response, g, has_app_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from routes.cache import CACHES
+
+log = logging.getLogger("planner.slow")
+
+metrics_bp = Blueprint("metrics", __name__)
+
+# request latency buckets, seconds (Prometheus "le" bounds; +Inf is implicit)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+SLOW_REQUEST_MS = 500.0
+SLOW_QUERY_MS = 100.0
+
+
+@dataclass
+class RequestStats:
+    """What one request spent, filled in by the engine and JSON hooks."""
+
+    start: float
+    queries: int = 0
+    db_ms: float = 0.0
+    ser_ms: float = 0.0
+
+
+def current_stats() -> RequestStats | None:
+    return g.get("req_stats") if has_app_context() else None
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        out = []
+        running = 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            out.append(f'{name}_bucket{{{labels},le="{bound}"}} {running}')
+        running += self.counts[-1]
+        out.append(f'{name}_bucket{{{labels},le="+Inf"}} {running}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {running}")
+        return out
+
+
+class Metrics:
+    """Per-process request metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.queries: dict[tuple[str, str], Histogram] = {}
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.db_seconds: dict[tuple[str, str], float] = {}
+        self.slow_requests = 0
+        self.slow_queries = 0
+
+    def observe(self, route: str, method: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (route, method)
+        with self._lock:
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.queries.setdefault(key, Histogram(QUERY_BUCKETS)).observe(stats.queries)
+            self.requests[(route, method, status)] = self.requests.get((route, method, status), 0) + 1
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + stats.db_ms / 1000
+
+    def count_slow(self, what: str) -> None:
+        with self._lock:
+            if what == "request":
+                self.slow_requests += 1
+            else:
+                self.slow_queries += 1
+
+    def render(self) -> str:
+        out = []
+        with self._lock:
+            out.append("# HELP planner_request_duration_seconds Request latency by route, streaming included.")
+            out.append("# TYPE planner_request_duration_seconds histogram")
+            for (route, method), h in sorted(self.latency.items()):
+                out.extend(h.lines("planner_request_duration_seconds", _labels(route=route, method=method)))
+            out.append("# HELP planner_request_db_queries SQL statements per request by route.")
+            out.append("# TYPE planner_request_db_queries histogram")
+            for (route, method), h in sorted(self.queries.items()):
+                out.extend(h.lines("planner_request_db_queries", _labels(route=route, method=method)))
+            out.append("# HELP planner_request_db_seconds_total Time spent in SQL by route.")
+            out.append("# TYPE planner_request_db_seconds_total counter")
+            for (route, method), secs in sorted(self.db_seconds.items()):
+                out.append(f"planner_request_db_seconds_total{{{_labels(route=route, method=method)}}} {secs:.6f}")
+            out.append("# HELP planner_requests_total Requests by route and status.")
+            out.append("# TYPE planner_requests_total counter")
+            for (route, method, status), n in sorted(self.requests.items()):
+                out.append(f"planner_requests_total{{{_labels(route=route, method=method, status=status)}}} {n}")
+            out.append("# TYPE planner_slow_requests_total counter")
+            out.append(f"planner_slow_requests_total {self.slow_requests}")
+            out.append("# TYPE planner_slow_queries_total counter")
+            out.append(f"planner_slow_queries_total {self.slow_queries}")
+        for field in ("hits", "misses", "evictions", "invalidations"):
+            out.append(f"# TYPE planner_cache_{field}_total counter")
+            for name, cache in sorted(CACHES.items()):
+                out.append(f"planner_cache_{field}_total{{{_labels(cache=name)}}} {cache.stats()[field]}")
+        out.append("# TYPE planner_cache_size gauge")
+        for name, cache in sorted(CACHES.items()):
+            out.append(f"planner_cache_size{{{_labels(cache=name)}}} {cache.stats()['size']}")
+        return "\n".join(out) + "\n"
+
+
+def _labels(**kw) -> str:
+    def esc(v) -> str:
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{k}="{esc(v)}"' for k, v in kw.items())
+
+
+metrics = Metrics()
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, charging dumps() time to the request's serialization bucket."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        t0 = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            stats = current_stats()
+            if stats is not None:
+                stats.ser_ms += (time.perf_counter() - t0) * 1000
+
+
+def _install_engine_hooks(engine: Engine, slow_query_ms: float) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(_conn, _cursor, _statement, _params, context, _executemany):
+        context._planner_t0 = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(_conn, _cursor, statement, _params, context, _executemany):
+        ms = (time.perf_counter() - context._planner_t0) * 1000
+        stats = current_stats()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_ms += ms
+        if ms >= slow_query_ms:
+            metrics.count_slow("query")
+            log.warning("slow query %.1f ms: %s", ms, " ".join(statement.split())[:500])
+
+
+def server_timing(stats: RequestStats, total_ms: float) -> str:
+    """DB / evaluation / serialization split of the time spent so far in this request."""
+    eval_ms = max(0.0, total_ms - stats.db_ms - stats.ser_ms)
+    return (
+        f'db;dur={stats.db_ms:.1f};desc="{stats.queries} queries", '
+        f"eval;dur={eval_ms:.1f}, ser;dur={stats.ser_ms:.1f}, total;dur={total_ms:.1f}"
+    )
+
+
+def install_metrics(app: Flask, engine: Engine) -> None:
+    """
+    Per-request instrumentation: SQL statements are counted and timed
+    through engine events, JSON encoding through the app's JSON provider,
+    and each response gets a Server-Timing header. Requests and queries
+    over PLANNER_SLOW_REQUEST_MS / PLANNER_SLOW_QUERY_MS are logged to
+    "planner.slow". Latency histograms are served at /metrics.
+    """
+    slow_request_ms = float(os.environ.get("PLANNER_SLOW_REQUEST_MS", SLOW_REQUEST_MS))
+    slow_query_ms = float(os.environ.get("PLANNER_SLOW_QUERY_MS", SLOW_QUERY_MS))
+    app.config["SLOW_REQUEST_MS"] = slow_request_ms
+    app.config["SLOW_QUERY_MS"] = slow_query_ms
+    app.json = TimedJSONProvider(app)
+    _install_engine_hooks(engine, slow_query_ms)
+
+    @app.before_request
+    def _start_request():
+        g.req_stats = RequestStats(time.perf_counter())
+
+    @app.after_request
+    def _finish_request(resp: Response) -> Response:
+        stats = current_stats()
+        if stats is None:
+            return resp
+        total_ms = (time.perf_counter() - stats.start) * 1000
+        # a streamed body is encoded after this point: its rows count in
+        # /metrics but not in the header, which is already on its way out
+        resp.headers["Server-Timing"] = server_timing(stats, total_ms)
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        method, path, status = request.method, request.full_path.rstrip("?"), resp.status_code
+
+        def record():
+            seconds = time.perf_counter() - stats.start
+            metrics.observe(route, method, status, seconds, stats)
+            if seconds * 1000 >= slow_request_ms:
+                metrics.count_slow("request")
+                log.warning(
+                    "slow request %s %s -> %s in %.1f ms (%d queries, db %.1f ms, ser %.1f ms)",
+                    method, path, status, seconds * 1000, stats.queries, stats.db_ms, stats.ser_ms,
+                )
+
+        resp.call_on_close(record)
+        return resp
+
+    app.register_blueprint(metrics_bp)
+
+
+@metrics_bp.get("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
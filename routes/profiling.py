@@ -0,0 +1,121 @@
+# routes/profiling.py
+from __future__ import annotations
+
+import cProfile
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import Flask, Response, g, request
+
+log = logging.getLogger("planner.profile")
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_PARAM = "profile"
+PROFILE_KEEP = 50
+
+_seq = itertools.count()
+# one profiled request at a time: newer Pythons allow a single active
+# profiler per process, and overlapping profiles would blur each other anyway
+_active = threading.Lock()
+
+
+def _wants_profile(token: str | None) -> bool:
+    asked = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM)
+    if not asked:
+        return False
+    return asked == token if token else asked not in ("0", "false")
+
+
+def _rotate(directory: str, keep: int) -> None:
+    names = sorted(f for f in os.listdir(directory) if f.endswith(".prof"))
+    for name in names[: max(0, len(names) - keep)]:
+        for path in (name, name[: -len(".prof")] + ".json"):
+            try:
+                os.remove(os.path.join(directory, path))
+            except FileNotFoundError:
+                pass
+
+
+def install_profiling(app: Flask, directory: str, keep: int = PROFILE_KEEP, token: str | None = None) -> None:
+    """
+    Opt-in cProfile of single requests. A request with an X-Profile header
+    or ?profile= (equal to PLANNER_PROFILE_TOKEN when one is set) runs under
+    the profiler, streamed body included. The stats go to `directory` as
+    <time>-<method>-<route>-u<user>.prof, with a .json next to it holding
+    the route, user, status, timings and query counts. Only the newest
+    `keep` profiles are kept. The response names its file in X-Profile-Id.
+    Without PLANNER_PROFILE_DIR none of this is installed.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    def finish(meta: dict) -> None:
+        prof: cProfile.Profile = meta.pop("profiler")
+        prof.disable()
+        _active.release()
+        meta["elapsed_ms"] = round((time.perf_counter() - meta.pop("t0")) * 1000, 2)
+        stats = meta.pop("stats")
+        if stats is not None:
+            meta.update(queries=stats.queries, db_ms=round(stats.db_ms, 2), ser_ms=round(stats.ser_ms, 2))
+        base = os.path.join(directory, meta["id"])
+        try:
+            prof.dump_stats(base + ".prof")
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+            _rotate(directory, keep)
+        except OSError:
+            log.exception("could not save profile %s", meta["id"])
+            return
+        log.info("profiled %s %s in %.1f ms -> %s.prof", meta["method"], meta["path"], meta["elapsed_ms"], base)
+
+    @app.before_request
+    def _start_profile():
+        if not _wants_profile(token):
+            return
+        if not _active.acquire(blocking=False):
+            g.profile_busy = True
+            return
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        user_id = request.args.get("user_id", type=int)
+        now = datetime.now(timezone.utc)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        g.profile = {
+            "id": f"{now:%Y%m%dT%H%M%S.%f}-{next(_seq) % 1000:03d}-{request.method}-{slug}-u{user_id or 'demo'}",
+            "route": route,
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "user_id": user_id,  # None: the demo user
+            "started": now.isoformat(timespec="milliseconds"),
+            "t0": time.perf_counter(),
+            "stats": g.get("req_stats"),  # set by routes/metrics.py when it's on
+        }
+        prof = cProfile.Profile()
+        g.profile["profiler"] = prof
+        prof.enable()
+
+    @app.after_request
+    def _stop_profile(resp: Response) -> Response:
+        if g.pop("profile_busy", False):
+            resp.headers["X-Profile-Id"] = "busy"
+            return resp
+        meta = g.pop("profile", None)
+        if meta is None:
+            return resp
+        meta["status"] = resp.status_code
+        resp.headers["X-Profile-Id"] = meta["id"]
+        # stop once a streamed body has been written too
+        resp.call_on_close(lambda: finish(meta))
+        return resp
+
+    @app.teardown_request
+    def _abandon_profile(_exc):
+        # the view raised and after_request never ran: don't leave the profiler on
+        meta = g.pop("profile", None)
+        if meta is not None:
+            meta["status"] = 500
+            finish(meta)
@@ -1,20 +1,62 @@
 # routes/routes.py
 from __future__ import annotations
 
-from typing import Any
-from flask import Blueprint, render_template, jsonify, request, abort
-from sqlalchemy import func, or_
+import base64
+import functools
+import json
+import random
+import time
+from dataclasses import replace
+from typing import Any, Callable, Iterable
+from flask import (
+    Blueprint,
+    Response,
+    render_template,
+    jsonify,
+    request,
+    abort,
+    current_app,
+    stream_with_context,
+)
+from sqlalchemy import func, or_, tuple_, update
+from sqlalchemy.exc import IntegrityError, NoResultFound, OperationalError
+from sqlalchemy.orm import selectinload
 
 from models.models import (
     db,
     User,
+    DegreeProgram,
     CourseCatalog,
     StudentSemester,
     StudentCourse,
-    DegreeProgram,
-    CoursePrereq,
-    CourseTypicalOffering,
-    ReqGroup,
+    PlanChange,
+    TERM_BITS,
+    ORDER_GAP,
+)
+from models.catalog import (
+    get_catalog_snapshot,
+    current_catalog_version,
+    CatalogSnapshot,
+    CourseRow,
+    ProgramRow,
+    filter_group_courses,
+    matches_filter,
+    GroupRow,
+    TERMS_BY_MASK,
+)
+from models.prereqs import evaluate_prereqs, mask_to_ids
+from models.audit import audit_grade, get_program_audit
+from models.plan_solver import DEFAULT_BUDGET_MS, MAX_BUDGET_MS, OpenSlot, generate_plan
+from models.plan import catch_up, changes_retained_since, check_plan  # importing it registers the plan_version flush hook
+from routes.cache import CACHES, LRUCache, invalidate_user
+from models.search import (
+    fts,
+    fts_match_expr,
+    match_clause,
+    rank_clause,
+    match_is_broad,
+    code_title_only,
+    id_in_matches,
 )
 
 bp = Blueprint("routes", __name__)
@@ -22,6 +64,19 @@ bp = Blueprint("routes", __name__)
 MAX_CLASSES_PER_SEM = 8
 MAX_CREDITS_PER_SEM = 18.0
 
+# a write that loses a race is rolled back and rerun from scratch this many times
+WRITE_RETRIES = 3
+
+COURSE_PAGE_DEFAULT = 50
+COURSE_PAGE_MAX = 200
+
+# computed /api/requirements groups, keyed on the request plus plan/catalog versions
+requirements_cache = LRUCache("requirements", maxsize=256)
+# DegreeProgram.audit_program results, keyed on (user, program, include_planned, plan/catalog versions)
+audit_cache = LRUCache("audit", maxsize=256)
+# user id -> last PlanCheck; caught up from the change log instead of dropped on writes
+validation_cache = LRUCache("validation", maxsize=256)
+
 
 def get_current_user() -> User:
     uid = request.args.get("user_id", type=int)
@@ -38,37 +93,178 @@ def get_current_user() -> User:
     return u
 
 
-def _term_weight(term: str | None) -> int:
-    t = (term or "").upper()
-    return 1 if t == "SPRING" else 2 if t == "SUMMER" else 3 if t == "FALL" else 0
+def lock_plan(user_id: int) -> None:
+    """
+    Start the write transaction by touching the student's row, so plan
+    writes for one student run one at a time and every cap check after this
+    sees the last committed plan. On SQLite this takes the write lock up
+    front (pysqlite only opens a transaction at the first write); on a
+    server database it row-locks the user until commit.
+    """
+    db.session.execute(
+        update(User).where(User.id == user_id).values(plan_version=User.plan_version),
+        execution_options={"synchronize_session": False},
+    )
+
 
+def _is_lock_error(e: OperationalError) -> bool:
+    msg = str(e.orig).lower()
+    return "locked" in msg or "busy" in msg or "deadlock" in msg or "could not serialize" in msg
 
-def normalize_semester_orders(student_id: int) -> None:
+
+def retry_on_conflict(view: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Rerun a write view when it loses a race: a unique constraint hit by a
+    concurrent writer, or a lock/serialization failure. Each attempt starts
+    from a rolled-back session, so all checks run again against fresh data.
+    After WRITE_RETRIES the client gets 409 (constraint) or 503 (lock), never a 500.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                return view(*args, **kwargs)
+            except IntegrityError:
+                db.session.rollback()
+                if attempt == WRITE_RETRIES:
+                    abort(409, "conflicting concurrent write, try again")
+            except OperationalError as e:
+                db.session.rollback()
+                if not _is_lock_error(e):
+                    raise
+                if attempt == WRITE_RETRIES:
+                    abort(503, "database busy, try again")
+            time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+    return wrapper
+
+
+def order_between(lo: int | None, hi: int | None) -> int | None:
+    """
+    Pick a sparse order/position strictly between two neighbours (None = open
+    end). Returns None when the gap is used up and the list needs respacing.
+    """
+    if lo is None and hi is None:
+        return 0
+    if hi is None:
+        return lo + ORDER_GAP
+    if lo is None:
+        return hi - ORDER_GAP
+    if hi - lo < 2:
+        return None
+    return (lo + hi) // 2
+
+
+def respace_positions(semester_id: int) -> None:
+    """Spread a semester's positions back out to multiples of ORDER_GAP (only when a gap runs out)."""
     rows = (
-        db.session.query(StudentSemester)
-        .filter(StudentSemester.student_id == student_id)
+        db.session.query(StudentCourse)
+        .filter(StudentCourse.semester_id == semester_id)
+        .order_by(StudentCourse.position.asc(), StudentCourse.id.asc())
         .all()
     )
-    if not rows:
-        return
-    sortable = []
-    for s in rows:
-        if s.order is not None:
-            sortable.append((0, int(s.order), 0, 0, s.id, s))
-        else:
-            sortable.append((1, 0, int(s.year or 0), _term_weight(s.term), s.id, s))
-    sortable.sort()
-    changed = False
-    for new_order, (_, _, _, _, _sid, s) in enumerate(sortable):
-        if s.order != new_order:
-            s.order = new_order
-            changed = True
-    if changed:
-        db.session.commit()
-
-
-def sc_to_dict(sc: StudentCourse):
-    c = sc.course
+    # park below both the live positions and the final ones (all >= 0) first,
+    # so uq_semester_position never sees a duplicate
+    base = min(min((row.position for row in rows), default=0), 0) - len(rows) - 1
+    for i, row in enumerate(rows):
+        row.position = base - i
+    db.session.flush()
+    for i, row in enumerate(rows):
+        row.position = i * ORDER_GAP
+    db.session.flush()
+
+
+def next_position(semester_id: int) -> int:
+    maxpos = (
+        db.session.query(func.max(StudentCourse.position))
+        .filter(StudentCourse.semester_id == semester_id)
+        .scalar()
+    )
+    return order_between(maxpos, None)
+
+
+def plan_etag(user: User) -> str:
+    """Strong validator for anything derived from one student's plan plus the catalog."""
+    return f"u{user.id}-p{user.plan_version or 0}-c{current_catalog_version(db.session)}"
+
+
+def not_modified(etag: str) -> Response | None:
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
+    return None
+
+
+def with_etag(resp: Response, etag: str) -> Response:
+    resp.set_etag(etag)
+    # let the browser keep the body but revalidate every time
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+def encode_cursor(key: list[Any]) -> str:
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> list[Any]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        abort(400, "bad cursor")
+    if not isinstance(key, list):
+        abort(400, "bad cursor")
+    return key
+
+
+def json_object() -> dict[str, Any]:
+    """The request body as a JSON object (an empty one for `null`); anything else is a 400."""
+    data = request.get_json(force=True)
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        abort(400, "body must be a JSON object")
+    return data
+
+
+def _compact_dumps() -> Callable[[Any], str]:
+    # same bytes as jsonify's compact output; the provider's default adds spaces
+    return functools.partial(current_app.json.dumps, separators=(",", ":"))
+
+
+def stream_json_array(rows: Iterable[Any]) -> Response:
+    dumps = _compact_dumps()
+
+    def gen():
+        yield "["
+        for i, row in enumerate(rows):
+            yield ("," if i else "") + dumps(row)
+        yield "]"
+
+    return Response(stream_with_context(gen()), mimetype="application/json")
+
+
+def stream_json_object(head: dict[str, Any], key: str, rows: Iterable[Any]) -> Response:
+    """
+    Stream {key: [rows...], **head}, encoding one row at a time. This saves
+    holding the encoded body; the rows themselves may already be in memory
+    (/api/requirements builds and caches its groups in full).
+    """
+    dumps = _compact_dumps()
+
+    def gen():
+        yield "{" + dumps(key) + ":["
+        for i, row in enumerate(rows):
+            yield ("," if i else "") + dumps(row)
+        yield ("]," + dumps(head)[1:]) if head else "]}"
+
+    return Response(stream_with_context(gen()), mimetype="application/json")
+
+
+def sc_to_dict(sc: StudentCourse, course: CourseCatalog | CourseRow | None = None):
+    # pass the course (a snapshot row will do) when it's already at hand, to skip the lazy load
+    c = course or sc.course
     return {
         "id": sc.id,
         "code": c.code,
@@ -94,24 +290,29 @@ def sc_to_dict(sc: StudentCourse):
     }
 
 
-def sem_to_dict(s: StudentSemester):
-    return {
+def sem_to_dict(s: StudentSemester, with_classes: bool = True):
+    out = {
         "id": s.id,
         "name": s.name,
         "term": s.term,
         "year": s.year,
         "order": s.order,
-        "classes": [sc_to_dict(sc) for sc in s.courses],
     }
+    if with_classes:
+        out["classes"] = [sc_to_dict(sc) for sc in s.courses]
+    return out
 
 
-def semester_load_for_user(user_id: int):
-    normalize_semester_orders(user_id)
-    return (
-        StudentSemester.query.filter_by(student_id=user_id)
-        .order_by(StudentSemester.order.asc(), StudentSemester.id.asc())
-        .all()
-    )
+def semester_load_for_user(user_id: int, with_classes: bool = True) -> list[StudentSemester]:
+    """
+    Load a student's semesters in a fixed number of queries: one for the
+    semesters and, with classes, one each for their StudentCourse rows and
+    catalog courses, whatever the plan size.
+    """
+    q = StudentSemester.query.filter_by(student_id=user_id)
+    if with_classes:
+        q = q.options(selectinload(StudentSemester.courses).selectinload(StudentCourse.course))
+    return q.order_by(StudentSemester.order.asc(), StudentSemester.id.asc()).all()
 
 
 def semester_credits(semester_id: int, exclude_id: int | None = None) -> float:
@@ -153,45 +354,152 @@ def planner():
     return render_template("planner.html")
 
 
+@bp.get("/api/cache/stats")
+def api_cache_stats():
+    return jsonify({name: cache.stats() for name, cache in CACHES.items()})
+
+
 @bp.get("/api/semesters")
 def api_list_semesters():
     user = get_current_user()
+    etag = plan_etag(user)
+    cached = not_modified(etag)
+    if cached:
+        return cached
     items = semester_load_for_user(user.id)
-    return jsonify([sem_to_dict(s) for s in items])
+    resp = with_etag(jsonify([sem_to_dict(s) for s in items]), etag)
+    # starting point for /api/plan/changes?since=
+    resp.headers["X-Plan-Version"] = str(user.plan_version or 0)
+    return resp
+
+
+@bp.get("/api/plan/changes")
+def api_plan_changes():
+    """
+    Delta sync: what changed in the plan since a version the client holds.
+    Returns current rows for semesters/classes created or moved since then,
+    ids of the deleted ones, and the version to ask from next time. A
+    `since` ahead of the server (e.g. after a DB reset), or too far behind
+    it for the pruned change log to cover, comes back with "reset": true
+    and the client should refetch /api/semesters.
+    """
+    user = get_current_user()
+    since = request.args.get("since", type=int)
+    if since is None or since < 0:
+        abort(400, "since must be a non-negative integer")
+    version = int(user.plan_version or 0)
+    out: dict[str, Any] = {
+        "version": version,
+        "semesters": [],
+        "classes": [],
+        "deleted_semesters": [],
+        "deleted_classes": [],
+    }
+    if since > version or not changes_retained_since(since, version):
+        out["reset"] = True
+        return jsonify(out)
+    if since == version:
+        return jsonify(out)
+
+    # last op per row wins; the log is in write order
+    last: dict[tuple[str, int], str] = {}
+    changes = (
+        db.session.query(PlanChange.entity, PlanChange.entity_id, PlanChange.op)
+        .filter(PlanChange.student_id == user.id, PlanChange.version > since)
+        .order_by(PlanChange.id.asc())
+    )
+    for entity, entity_id, op in changes:
+        last[(entity, entity_id)] = op
+    upserted = {"semester": [], "class": []}
+    for (entity, entity_id), op in last.items():
+        if op == "upsert":
+            upserted[entity].append(entity_id)
+
+    sems = {}
+    if upserted["semester"]:
+        sems = {
+            s.id: s
+            for s in StudentSemester.query.filter(
+                StudentSemester.student_id == user.id, StudentSemester.id.in_(upserted["semester"])
+            )
+        }
+    classes = {}
+    if upserted["class"]:
+        classes = {
+            sc.id: sc
+            for sc in StudentCourse.query.options(selectinload(StudentCourse.course)).filter(
+                StudentCourse.student_id == user.id, StudentCourse.id.in_(upserted["class"])
+            )
+        }
+    for (entity, entity_id), op in sorted(last.items()):
+        if entity == "semester":
+            s = sems.get(entity_id) if op == "upsert" else None
+            if s is None:
+                out["deleted_semesters"].append(entity_id)
+            else:
+                out["semesters"].append(sem_to_dict(s, with_classes=False))
+        else:
+            sc = classes.get(entity_id) if op == "upsert" else None
+            if sc is None:
+                out["deleted_classes"].append(entity_id)
+            else:
+                out["classes"].append(sc_to_dict(sc))
+    return jsonify(out)
 
 
 @bp.post("/api/semesters")
+@retry_on_conflict
 def api_create_semester():
     user = get_current_user()
-    data = request.get_json(force=True) or {}
-    name = (data.get("name") or "").trim()
+    lock_plan(user.id)
+    data = json_object()
+    name = (data.get("name") or "").strip()
     term = (data.get("term") or "").strip() or None
     year = data.get("year")
     if not name:
         abort(400, "name required")
+    if StudentSemester.query.filter_by(student_id=user.id, name=name).first():
+        abort(409, "a semester with that name already exists")
 
-    normalize_semester_orders(user.id)
     max_order = (
-        db.session.query(func.coalesce(func.max(StudentSemester.order), -1))
+        db.session.query(func.max(StudentSemester.order))
         .filter_by(student_id=user.id)
         .scalar()
     )
     s = StudentSemester(
-        student_id=user.id, name=name, term=term, year=year, order=int(max_order) + 1
+        student_id=user.id, name=name, term=term, year=year, order=order_between(max_order, None)
     )
     db.session.add(s)
     db.session.commit()
+    invalidate_user(user.id)
     return jsonify(sem_to_dict(s)), 201
 
 
 @bp.get("/api/courses")
 def api_search_courses():
+    """
+    Search the catalog one page at a time. The body stays a plain list; when
+    there is more, X-Next-Cursor holds the token to pass back as ?cursor=.
+    Code-ordered listings page by keyset on (code, id). Ranked FTS results are
+    capped at RANK_WINDOW matches, so they page by a bounded offset.
+    """
     user = get_current_user()
     q = (request.args.get("q") or "").strip()
     unassigned = request.args.get("unassigned", "1") != "0"
+    limit = max(1, min(request.args.get("limit", COURSE_PAGE_DEFAULT, type=int), COURSE_PAGE_MAX))
+    cursor = request.args.get("cursor")
+    after = decode_cursor(cursor) if cursor else None
 
     base = CourseCatalog.query
-    if q:
+    match = fts_match_expr(q) if current_app.config.get("COURSE_FTS") else None
+    ranked = False
+    if match:
+        if match_is_broad(db.session, match):
+            base = base.filter(id_in_matches(code_title_only(match)))
+        else:
+            base = base.join(fts, fts.c.rowid == CourseCatalog.id).filter(match_clause(match))
+            ranked = True
+    elif q:
         like = f"%{q}%"
         base = base.filter(
             or_(CourseCatalog.code.ilike(like), CourseCatalog.title.ilike(like))
@@ -204,22 +512,136 @@ def api_search_courses():
         )
         base = base.filter(~CourseCatalog.id.in_(sub))
 
-    items = base.order_by(CourseCatalog.code.asc()).limit(50).all()
-    return jsonify(
-        [{"id": c.id, "code": c.code, "title": c.title, "credits": c.credits} for c in items]
+    offset = 0
+    if ranked:
+        base = base.order_by(rank_clause(), CourseCatalog.code.asc(), CourseCatalog.id.asc())
+        if after:
+            if len(after) != 1 or not isinstance(after[0], int) or after[0] < 0:
+                abort(400, "bad cursor")
+            offset = after[0]
+            base = base.offset(offset)
+    else:
+        if after:
+            if len(after) != 2 or not isinstance(after[0], str) or not isinstance(after[1], int):
+                abort(400, "bad cursor")
+            base = base.filter(tuple_(CourseCatalog.code, CourseCatalog.id) > tuple(after))
+        base = base.order_by(CourseCatalog.code.asc(), CourseCatalog.id.asc())
+
+    items = base.limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([offset + limit] if ranked else [last.code, last.id])
+
+    resp = stream_json_array(
+        {"id": c.id, "code": c.code, "title": c.title, "credits": c.credits} for c in items
+    )
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+    return resp
+
+
+def course_ref(c) -> dict[str, Any]:
+    return {"id": c.id, "code": c.code, "title": c.title, "credits": c.credits}
+
+
+def snapshot_course(snap: CatalogSnapshot, course_id: int):
+    c = snap.courses.get(course_id)
+    if c is None:
+        abort(404, "course not found")
+    return c
+
+
+@bp.get("/api/courses/<int:course_id>/unlocks")
+def api_course_unlocks(course_id: int):
+    """
+    What a course leads to: courses that list it as a prereq directly, and
+    everything reachable from it through the prereq graph. Read straight
+    off the snapshot's PrereqGraph, so the cost is the size of the answer.
+    """
+    etag = f"c{current_catalog_version(db.session)}"
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    snap = get_catalog_snapshot()
+    c = snapshot_course(snap, course_id)
+    graph = snap.prereq_graph
+    courses = snap.courses
+    all_ids = mask_to_ids(snap.prereq_index, graph.descendants.get(course_id, 0))
+    return with_etag(jsonify({
+        "course": course_ref(c),
+        "direct": [course_ref(courses[d]) for d in graph.dependents.get(course_id, ())],
+        "all": [course_ref(courses[d]) for d in all_ids],
+    }), etag)
+
+
+@bp.get("/api/courses/<int:course_id>/path")
+def api_course_path(course_id: int):
+    """
+    How soon a course can be reached from an empty plan. min_terms honours
+    allow_concurrent; `terms` lays out one cheapest set of prereqs by the
+    earliest term each can sit in. critical_path is the longest chain of
+    prereqs that no group choice avoids, in the order they must be taken.
+    Courses on or behind a prereq cycle come back with min_terms null.
+    """
+    etag = f"c{current_catalog_version(db.session)}"
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    snap = get_catalog_snapshot()
+    c = snapshot_course(snap, course_id)
+    graph = snap.prereq_graph
+    courses = snap.courses
+    out: dict[str, Any] = {"course": course_ref(c), "min_terms": None, "terms": [], "critical_path": []}
+    if course_id in graph.blocked_by_cycle:
+        out["blocked_by_cycle"] = True
+        return with_etag(jsonify(out), etag)
+
+    # walk the cheapest group of each course back to courses with no prereqs
+    needed = {course_id}
+    stack = [course_id]
+    while stack:
+        cid = stack.pop()
+        gi = graph.best_group.get(cid)
+        if gi is None:
+            continue
+        for r in snap.prereqs[cid][gi].rules:
+            if r.prereq_course_id not in needed:
+                needed.add(r.prereq_course_id)
+                stack.append(r.prereq_course_id)
+    depth = graph.term_depth[course_id]
+    terms: list[list[dict[str, Any]]] = [[] for _ in range(depth + 1)]
+    for cid in sorted(needed, key=lambda i: courses[i].code):
+        terms[graph.term_depth[cid]].append(course_ref(courses[cid]))
+
+    chain = [course_id]
+    while chain[-1] in graph.chain_prev:
+        chain.append(graph.chain_prev[chain[-1]])
+    out.update(
+        min_terms=depth + 1,
+        terms=terms,
+        critical_path=[course_ref(courses[cid]) for cid in reversed(chain)],
     )
+    return with_etag(jsonify(out), etag)
 
 
 @bp.post("/api/classes")
+@retry_on_conflict
 def api_add_class():
     user = get_current_user()
-    data = request.get_json(force=True) or {}
+    lock_plan(user.id)
+    data = json_object()
     course_id = data.get("course_id")
     semester_id = data.get("semester_id")
     section = data.get("section")
 
     if not course_id or not semester_id:
         abort(400, "course_id and semester_id required")
+    try:
+        course_id, semester_id = int(course_id), int(semester_id)
+    except (TypeError, ValueError):
+        abort(400, "course_id and semester_id must be integers")
 
     sem = StudentSemester.query.filter_by(id=semester_id, student_id=user.id).first()
     if not sem:
@@ -242,27 +664,150 @@ def api_add_class():
     if cur + float(cat.credits or 0) > MAX_CREDITS_PER_SEM:
         abort(409, f"credit limit {MAX_CREDITS_PER_SEM} would be exceeded")
 
-    maxpos = (
-        db.session.query(func.coalesce(func.max(StudentCourse.position), -1))
-        .filter(StudentCourse.semester_id == semester_id)
-        .scalar()
-    )
     sc = StudentCourse(
         student_id=user.id,
         semester_id=semester_id,
         course_id=course_id,
         credits=float(cat.credits or 0),
         section=section,
-        position=int(maxpos) + 1,
+        position=next_position(semester_id),
     )
     db.session.add(sc)
     db.session.commit()
+    invalidate_user(user.id)
     return jsonify(sc_to_dict(sc)), 201
 
 
+@bp.post("/api/classes/batch")
+@retry_on_conflict
+def api_batch_classes():
+    """
+    Apply many add/remove operations in one transaction.
+    Body: {"ops": [{"op": "add", "course_id", "semester_id", "section"?},
+                   {"op": "remove", "id"}],
+           "atomic": false}
+    Everything is validated against one load of the plan: removes first (so
+    they free room), then adds in order against MAX_CLASSES_PER_SEM and
+    MAX_CREDITS_PER_SEM. Each op gets its own result; the ones that passed
+    say whether they were "applied". With atomic=true any failure rejects
+    the whole batch with 409, nothing is written, and the ops that would
+    have gone through come back ok with "applied": false.
+    """
+    user = get_current_user()
+    lock_plan(user.id)
+    data = json_object()
+    ops = data.get("ops")
+    if not isinstance(ops, list) or not ops:
+        abort(400, "ops must be a non-empty list")
+    atomic = bool(data.get("atomic"))
+
+    snap = get_catalog_snapshot()
+    sem_ids = {
+        sid for (sid,) in db.session.query(StudentSemester.id).filter_by(student_id=user.id)
+    }
+    rows = {sc.id: sc for sc in db.session.query(StudentCourse).filter_by(student_id=user.id)}
+    planned = {sc.course_id for sc in rows.values()}
+    count: dict[int, int] = {}
+    credits: dict[int, float] = {}
+    last_pos: dict[int, int] = {}
+    for sc in rows.values():
+        count[sc.semester_id] = count.get(sc.semester_id, 0) + 1
+        credits[sc.semester_id] = credits.get(sc.semester_id, 0.0) + float(sc.credits or 0)
+        last_pos[sc.semester_id] = max(last_pos.get(sc.semester_id, sc.position), sc.position)
+
+    results: list[dict[str, Any] | None] = [None] * len(ops)
+    added: list[tuple[int, StudentCourse]] = []
+
+    def fail(i: int, status: int, error: str) -> None:
+        results[i] = {"index": i, "ok": False, "status": status, "error": error}
+
+    for i, op in enumerate(ops):
+        if not isinstance(op, dict) or op.get("op") != "remove":
+            continue
+        try:
+            sc = rows.get(int(op.get("id")))
+        except (TypeError, ValueError):
+            fail(i, 400, "id must be an integer")
+            continue
+        if not sc:
+            fail(i, 404, "class not found")
+            continue
+        db.session.delete(sc)
+        del rows[sc.id]
+        planned.discard(sc.course_id)
+        count[sc.semester_id] -= 1
+        credits[sc.semester_id] -= float(sc.credits or 0)
+        results[i] = {"index": i, "ok": True, "status": 204, "id": sc.id}
+    # deletes go out first so a batch can drop and re-add the same course
+    db.session.flush()
+
+    for i, op in enumerate(ops):
+        if not isinstance(op, dict) or op.get("op") not in ("add", "remove"):
+            fail(i, 400, "op must be 'add' or 'remove'")
+            continue
+        if op["op"] != "add":
+            continue
+        course_id, semester_id = op.get("course_id"), op.get("semester_id")
+        if not course_id or not semester_id:
+            fail(i, 400, "course_id and semester_id required")
+            continue
+        try:
+            course_id, semester_id = int(course_id), int(semester_id)
+        except (TypeError, ValueError):
+            fail(i, 400, "course_id and semester_id must be integers")
+            continue
+        if semester_id not in sem_ids:
+            fail(i, 404, "semester not found")
+        elif course_id in planned:
+            fail(i, 409, "course already planned for this student")
+        elif count.get(semester_id, 0) >= MAX_CLASSES_PER_SEM:
+            fail(i, 409, f"target semester is full ({MAX_CLASSES_PER_SEM})")
+        elif course_id not in snap.courses:
+            fail(i, 404, "course not found")
+        elif credits.get(semester_id, 0.0) + snap.courses[course_id].credits > MAX_CREDITS_PER_SEM:
+            fail(i, 409, f"credit limit {MAX_CREDITS_PER_SEM} would be exceeded")
+        else:
+            pos = order_between(last_pos.get(semester_id), None)
+            sc = StudentCourse(
+                student_id=user.id,
+                semester_id=semester_id,
+                course_id=course_id,
+                credits=snap.courses[course_id].credits,
+                section=op.get("section"),
+                position=pos,
+            )
+            db.session.add(sc)
+            added.append((i, sc))
+            results[i] = {"index": i, "ok": True, "status": 201}
+            planned.add(course_id)
+            count[semester_id] = count.get(semester_id, 0) + 1
+            credits[semester_id] = credits.get(semester_id, 0.0) + sc.credits
+            last_pos[semester_id] = pos
+
+    if atomic and any(not r["ok"] for r in results):
+        db.session.rollback()
+        for r in results:
+            if r["ok"]:
+                r["applied"] = False
+        return jsonify({"results": results, "semesters": None}), 409
+
+    db.session.flush()
+    for i, sc in added:
+        results[i]["class"] = sc_to_dict(sc, snap.courses[sc.course_id])
+    for r in results:
+        if r["ok"]:
+            r["applied"] = True
+    db.session.commit()
+    invalidate_user(user.id)
+    semesters = [sem_to_dict(x) for x in semester_load_for_user(user.id)]
+    return jsonify({"results": results, "semesters": semesters})
+
+
 @bp.delete("/api/classes/<int:sc_id>")
+@retry_on_conflict
 def api_delete_class(sc_id: int):
     user = get_current_user()
+    lock_plan(user.id)
     sc = (
         db.session.query(StudentCourse)
         .filter_by(id=sc_id, student_id=user.id)
@@ -271,49 +816,104 @@ def api_delete_class(sc_id: int):
     if not sc:
         abort(404, "class not found")
 
-    sem_id = sc.semester_id
+    # positions are sparse, so the remaining rows keep theirs
     db.session.delete(sc)
-    db.session.flush()
-
-    rows = (
-        db.session.query(StudentCourse)
-        .filter_by(semester_id=sem_id, student_id=user.id)
-        .order_by(StudentCourse.position.asc(), StudentCourse.id.asc())
-        .all()
-    )
-    for i, row in enumerate(rows):
-        row.position = i
-
     db.session.commit()
+    invalidate_user(user.id)
     return ("", 204)
 
 
-@bp.get("/api/requirements")
-def api_requirements():
+@bp.patch("/api/classes/<int:sc_id>")
+@retry_on_conflict
+def api_move_class(sc_id: int):
     """
-    Prereq policy used for gating:
-      - Earlier terms (< anchor): any status {PLANNED, IN_PROGRESS, COMPLETED} counts.
-      - Same term (== anchor): counts only if allow_concurrent=True.
-      - Later terms (> anchor): does not count.
-      - Grade is ignored entirely.
+    Move a class to another semester and/or reorder it.
+    Body: {"semester_id": target (default: its current one),
+           "before_id": class to land in front of (default: append at the end)}
     """
     user = get_current_user()
-    program_code = request.args.get("program") or "BS-CS-Core-2025"
-    q = (request.args.get("q") or "").strip().lower()
-    current_term = (request.args.get("current_term") or "").strip().upper()
+    lock_plan(user.id)
+    data = json_object()
+    sc = (
+        db.session.query(StudentCourse)
+        .filter_by(id=sc_id, student_id=user.id)
+        .first()
+    )
+    if not sc:
+        abort(404, "class not found")
 
-    normalize_semester_orders(user.id)
+    try:
+        semester_id = int(data.get("semester_id") or sc.semester_id)
+        before_id = int(data["before_id"]) if data.get("before_id") else None
+    except (TypeError, ValueError):
+        abort(400, "semester_id and before_id must be integers")
 
-    current_sem_id = request.args.get("current_semester_id", type=int)
-    current_order = request.args.get("current_order", type=int)
+    sem = StudentSemester.query.filter_by(id=semester_id, student_id=user.id).first()
+    if not sem:
+        abort(404, "semester not found")
 
-    prog = db.session.query(DegreeProgram).filter_by(code=program_code).first()
-    if not prog:
-        abort(404, "degree program not found")
+    if semester_id != sc.semester_id:
+        if semester_count(semester_id) >= MAX_CLASSES_PER_SEM:
+            abort(409, f"target semester is full ({MAX_CLASSES_PER_SEM})")
+        if semester_credits(semester_id) + float(sc.credits or 0) > MAX_CREDITS_PER_SEM:
+            abort(409, f"credit limit {MAX_CREDITS_PER_SEM} would be exceeded")
+
+    if before_id:
+        if before_id == sc.id:
+            return jsonify(sc_to_dict(sc))
+        before = (
+            db.session.query(StudentCourse)
+            .filter_by(id=before_id, semester_id=semester_id, student_id=user.id)
+            .first()
+        )
+        if not before:
+            abort(400, "before_id must be a class in the target semester")
+
+        def neighbour_gap() -> int | None:
+            prev = (
+                db.session.query(func.max(StudentCourse.position))
+                .filter(
+                    StudentCourse.semester_id == semester_id,
+                    StudentCourse.position < before.position,
+                    StudentCourse.id != sc.id,
+                )
+                .scalar()
+            )
+            return order_between(prev, before.position)
+
+        new_pos = neighbour_gap()
+        if new_pos is None:
+            respace_positions(semester_id)
+            new_pos = neighbour_gap()
+    else:
+        new_pos = next_position(semester_id)
 
+    sc.semester_id = semester_id
+    sc.position = new_pos
+    db.session.commit()
+    invalidate_user(user.id)
+    return jsonify(sc_to_dict(sc))
+
+
+def requirement_sort_key(it: dict[str, Any]) -> tuple[int, int, str]:
+    has_pr = (it.get("prereq_complexity") or 0) > 0
+    tier = 2 if has_pr else 0
+    return (tier, it.get("prereq_complexity") or 0, it.get("code") or "")
+
+
+def compute_requirement_groups(
+    user: User,
+    prog: ProgramRow,
+    snap: CatalogSnapshot,
+    current_sem_id: int | None,
+    current_order: int | None,
+    current_term: str,
+    q: str,
+) -> list[dict[str, Any]]:
+    """Every group of a program with its full, sorted course list for one anchor term."""
     sc_rows = db.session.query(StudentCourse).filter_by(student_id=user.id).all()
 
-    user_sems = semester_load_for_user(user.id)
+    user_sems = semester_load_for_user(user.id, with_classes=False)
     ranks_by_id: dict[int, int] = {s.id: int(s.order) for s in user_sems}
     if current_sem_id and current_sem_id in ranks_by_id:
         anchor_rank = ranks_by_id[current_sem_id]
@@ -333,79 +933,20 @@ def api_requirements():
             "order": rk,
         }
 
-    off_rows = db.session.query(CourseTypicalOffering).all()
-    off_map: dict[int, set[str]] = {}
-    for o in off_rows:
-        off_map.setdefault(o.course_id, set()).add(o.term)
-
-    prereq_rows = db.session.query(CoursePrereq).all()
-    req_map: dict[int, dict[int, list[CoursePrereq]]] = {}
-    for r in prereq_rows:
-        req_map.setdefault(r.course_id, {}).setdefault(r.group_key, []).append(r)
-
-    cat_rows = db.session.query(CourseCatalog.id, CourseCatalog.code, CourseCatalog.title, CourseCatalog.credits).all()
-    id_to_code = {cid: code for cid, code, _, _ in cat_rows}
-    catalog_by_id = {cid: (code, title, credits) for cid, code, title, credits in cat_rows}
-
-    def prereq_rule_satisfied(rule: CoursePrereq) -> bool:
-        st = course_state.get(rule.prereq_course_id)
-        if not st:
-            return False
-        ord_ = st.get("order")
-        if ord_ is None:
-            return False
-        status = st.get("status") or "PLANNED"
-        if ord_ < anchor_rank:
-            return status in {"PLANNED", "IN_PROGRESS", "COMPLETED"}
-        if ord_ == anchor_rank:
-            return bool(rule.allow_concurrent) and status in {"PLANNED", "IN_PROGRESS", "COMPLETED"}
-        return False
-
-    def prereq_eval_for_course(course_id: int) -> tuple[bool, list[int], bool, list[int]]:
-        groups = req_map.get(course_id, {})
-        if not groups:
-            return True, [], True, []
-        satisfied = False
-        missing: list[int] = []
-        for _gk, rules in groups.items():
-            if all(prereq_rule_satisfied(r) for r in rules):
-                satisfied = True
-                missing = []
-                break
-            else:
-                for r in rules:
-                    if not prereq_rule_satisfied(r):
-                        missing.append(r.prereq_course_id)
-        missing = sorted(set(missing))
-        return satisfied, missing, satisfied, missing
+    req_map = snap.prereqs
+    id_to_code = {cid: c.code for cid, c in snap.courses.items()}
+    blocked = evaluate_prereqs(
+        snap.prereq_index,
+        {cid: (st["order"], st["status"]) for cid, st in course_state.items()},
+        anchor_rank,
+    )
 
-    groups_out = []
-    for g in prog.groups:
+    def build_group(g: GroupRow) -> dict[str, Any]:
         if g.kind in ("ALL", "ANY_COUNT"):
-            listed_ids = [rc.course_id for rc in g.courses]
-            cats = (
-                db.session.query(CourseCatalog)
-                .filter(CourseCatalog.id.in_(listed_ids))
-                .order_by(CourseCatalog.code.asc())
-                .all()
-            )
-        else:
-            cats = []
-            for c in db.session.query(CourseCatalog).all():
-                parts = (c.code or "").strip().upper().split()
-                if len(parts) != 2:
-                    continue
-                dept, num_s = parts
-                try:
-                    num = int(num_s)
-                except ValueError:
-                    continue
-                if g.dept_prefix and dept != g.dept_prefix:
-                    continue
-                if g.min_number is not None and num < g.min_number:
-                    continue
-                cats.append(c)
+            cats = [snap.courses[rc.course_id] for rc in g.courses if rc.course_id in snap.courses]
             cats.sort(key=lambda x: x.code)
+        else:
+            cats = filter_group_courses(snap, g)
 
         if q:
             ql = q.lower()
@@ -413,13 +954,13 @@ def api_requirements():
 
         items = []
         for c in cats:
-            ok_completed, missing_completed, ok_planned, missing_planned = prereq_eval_for_course(c.id)
+            missing_planned = blocked.get(c.id, [])
+            ok_planned = c.id not in blocked
 
-            offered_terms_set = off_map.get(c.id, set())
-            offered_terms = sorted(list(offered_terms_set))
+            offered_terms = list(TERMS_BY_MASK[c.term_mask])
             taken = (course_state.get(c.id, {}).get("status") == "COMPLETED")
             assigned = c.id in course_state
-            offered_this_term = bool(current_term and offered_terms_set and current_term in offered_terms_set)
+            offered_this_term = bool(c.term_mask & TERM_BITS.get(current_term, 0))
 
             items.append(
                 {
@@ -436,23 +977,18 @@ def api_requirements():
                     "prereq_ok_planned": ok_planned,
                     "unmet_prereqs_planned": [id_to_code.get(i, f"ID {i}") for i in missing_planned],
                     "prereq_groups": [
-                        [id_to_code.get(r.prereq_course_id, f"ID {r.prereq_course_id}") for r in sorted(rules, key=lambda x: x.prereq_course_id)]
-                        for _gk, rules in sorted(req_map.get(c.id, {}).items(), key=lambda x: x[0])
+                        [id_to_code.get(r.prereq_course_id, f"ID {r.prereq_course_id}") for r in sorted(pg.rules, key=lambda x: x.prereq_course_id)]
+                        for pg in req_map.get(c.id, ())
                     ],
                     "prereq_complexity": min(
-                        (len(group_rules) for group_rules in req_map.get(c.id, {}).values()),
+                        (len(pg.rules) for pg in req_map.get(c.id, ())),
                         default=0
                     ),
                     "disabled": taken or assigned or (not ok_planned),
                 }
             )
 
-        def sort_key(it):
-            has_pr = (it.get("prereq_complexity") or 0) > 0
-            tier = 2 if has_pr else 0
-            return (tier, it.get("prereq_complexity") or 0, it.get("code") or "")
-
-        items.sort(key=sort_key)
+        items.sort(key=requirement_sort_key)
 
         if g.kind == "ALL":
             required_count = len(items)
@@ -461,18 +997,83 @@ def api_requirements():
             required_count = g.min_count or 0
             completed_count = min(sum(1 for x in items if x["taken"]), required_count)
 
-        groups_out.append(
-            {
-                "group_id": g.id,
-                "title": g.title,
-                "kind": g.kind,
-                "required_count": required_count,
-                "completed_count": completed_count,
-                "courses": items,
-            }
+        return {
+            "group_id": g.id,
+            "title": g.title,
+            "kind": g.kind,
+            "required_count": required_count,
+            "completed_count": completed_count,
+            "courses": items,
+        }
+
+    return [build_group(g) for g in prog.groups]
+
+
+@bp.get("/api/requirements")
+def api_requirements():
+    """
+    Prereq policy used for gating:
+      - Earlier terms (< anchor): any status {PLANNED, IN_PROGRESS, COMPLETED} counts.
+      - Same term (== anchor): counts only if allow_concurrent=True.
+      - Later terms (> anchor): does not count.
+      - Grade is ignored entirely.
+    """
+    user = get_current_user()
+    program_code = request.args.get("program") or "BS-CS-Core-2025"
+    q = (request.args.get("q") or "").strip().lower()
+    current_term = (request.args.get("current_term") or "").strip().upper()
+
+    # optional per-group paging: ?limit=N pages every group; ?group_id=&cursor=
+    # fetches the next page of one group
+    page_size = request.args.get("limit", type=int)
+    only_group = request.args.get("group_id", type=int)
+    cursor = request.args.get("cursor")
+    after = tuple(decode_cursor(cursor)) if cursor else None
+    if after is not None:
+        if not only_group:
+            abort(400, "cursor requires group_id")
+        if len(after) != 3 or not isinstance(after[0], int) or not isinstance(after[1], int) or not isinstance(after[2], str):
+            abort(400, "bad cursor")
+
+    current_sem_id = request.args.get("current_semester_id", type=int)
+    current_order = request.args.get("current_order", type=int)
+
+    etag = plan_etag(user)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    snap = get_catalog_snapshot()
+    prog = snap.programs.get(program_code)
+    if not prog:
+        abort(404, "degree program not found")
+
+    key = (user.id, prog.code, current_sem_id, current_order, current_term, q, user.plan_version, snap.version)
+    groups_full = requirements_cache.get(key)
+    if groups_full is None:
+        groups_full = compute_requirement_groups(
+            user, prog, snap, current_sem_id, current_order, current_term, q
         )
+        requirements_cache.put(key, groups_full, user_id=user.id)
+
+    def page(group: dict[str, Any]) -> dict[str, Any]:
+        items = group["courses"]
+        if after is not None:
+            items = [it for it in items if requirement_sort_key(it) > after]
+        if not page_size:
+            return group if after is None else dict(group, courses=items)
+        next_cursor = (
+            encode_cursor(list(requirement_sort_key(items[page_size - 1]))) if len(items) > page_size else None
+        )
+        return dict(group, courses=items[:page_size], next_cursor=next_cursor)
 
-    return jsonify({"program": {"code": prog.code, "name": prog.name}, "groups": groups_out})
+    groups = [g for g in groups_full if not only_group or g["group_id"] == only_group]
+    resp = stream_json_object(
+        {"program": {"code": prog.code, "name": prog.name}},
+        "groups",
+        (page(g) for g in groups),
+    )
+    return with_etag(resp, etag)
 
 
 @bp.get("/api/requirements/progress")
@@ -486,7 +1087,13 @@ def api_requirements_progress():
     if not program_code:
         abort(400, "program required")
 
-    prog = db.session.query(DegreeProgram).filter_by(code=program_code).first()
+    etag = plan_etag(user)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    snap = get_catalog_snapshot()
+    prog = snap.programs.get(program_code)
     if not prog:
         abort(404, "degree program not found")
 
@@ -495,25 +1102,11 @@ def api_requirements_progress():
         .filter(StudentCourse.student_id == user.id)
         .all()
     }
-    catalog = {c.id: c for c in db.session.query(CourseCatalog).all()}
+    catalog = snap.courses
 
-    def code_ok_for_filter(course_id: int, g: ReqGroup) -> bool:
+    def code_ok_for_filter(course_id: int, g: GroupRow) -> bool:
         c = catalog.get(course_id)
-        if not c or not c.code:
-            return False
-        parts = c.code.strip().upper().split()
-        if len(parts) != 2:
-            return False
-        dept, num_s = parts
-        try:
-            num = int(num_s)
-        except ValueError:
-            return False
-        if g.dept_prefix and dept != g.dept_prefix:
-            return False
-        if g.min_number is not None and num < g.min_number:
-            return False
-        return True
+        return bool(c) and matches_filter(c, g.dept_prefix, g.min_number)
 
     groups_out = []
     for g in prog.groups:
@@ -535,4 +1128,168 @@ def api_requirements_progress():
             "planned_count": planned,
         })
 
-    return jsonify({"program": {"code": prog.code}, "groups": groups_out})
+    return with_etag(jsonify({"program": {"code": prog.code}, "groups": groups_out}), etag)
+
+
+@bp.get("/api/audit")
+def api_audit():
+    """
+    Degree audit for the current student: which courses count toward each
+    group (grades, min grades and double counting honoured, see
+    models/audit.py). include_planned=0 counts COMPLETED courses only.
+    Memoized per plan and catalog version, so repeat calls between plan
+    changes are a cache lookup.
+    """
+    user = get_current_user()
+    program_code = request.args.get("program")
+    if not program_code:
+        abort(400, "program required")
+    include_planned = request.args.get("include_planned", "1") != "0"
+
+    etag = plan_etag(user)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    snap = get_catalog_snapshot()
+    key = (user.id, program_code, include_planned, user.plan_version or 0, snap.version)
+    result = audit_cache.get(key)
+    if result is None:
+        try:
+            result = DegreeProgram.audit_program(db.session, user.id, program_code, include_planned)
+        except NoResultFound:
+            abort(404, "degree program not found")
+        audit_cache.put(key, result, user_id=user.id)
+    return with_etag(jsonify(result), etag)
+
+
+@bp.get("/api/plan/generate")
+def api_plan_generate():
+    """
+    Propose courses for the student's remaining semesters so a program's
+    groups are all satisfied (see models/plan_solver.py). Remaining means
+    after the last semester holding a COMPLETED or IN_PROGRESS class.
+    Nothing is written: the client applies the proposal through
+    /api/classes/batch. budget_ms caps the search (default 200, max 2000);
+    the best plan found by then is returned. If the budget runs out before
+    even the first pass finishes, what that pass had is returned with
+    "partial": true (and "complete": false unless it happened to be enough).
+    """
+    user = get_current_user()
+    program_code = request.args.get("program")
+    if not program_code:
+        abort(400, "program required")
+    budget_ms = max(1, min(request.args.get("budget_ms", DEFAULT_BUDGET_MS, type=int), MAX_BUDGET_MS))
+
+    snap = get_catalog_snapshot()
+    pa = get_program_audit(snap, program_code)
+    if pa is None:
+        abort(404, "degree program not found")
+
+    sems = semester_load_for_user(user.id, with_classes=False)
+    order_of = {s.id: s.order for s in sems}
+    rows = (
+        db.session.query(
+            StudentCourse.course_id, StudentCourse.semester_id, StudentCourse.status,
+            StudentCourse.grade, StudentCourse.credits,
+        )
+        .filter(StudentCourse.student_id == user.id)
+        .all()
+    )
+    placed = {cid: order_of[sid] for cid, sid, _, _, _ in rows}
+    taken = {cid: audit_grade(status, grade) for cid, _, status, grade, _ in rows}
+    started = [order_of[sid] for _, sid, status, _, _ in rows if status in ("COMPLETED", "IN_PROGRESS")]
+    first_open = max(started) + 1 if started else None
+    used: dict[int, tuple[int, float]] = {}
+    for _, sid, _, _, credits in rows:
+        n, cr = used.get(sid, (0, 0.0))
+        used[sid] = (n + 1, cr + float(credits or 0))
+    slots = [
+        OpenSlot(
+            s.id, s.order, TERM_BITS.get((s.term or "").upper(), 0),
+            MAX_CLASSES_PER_SEM - used.get(s.id, (0, 0.0))[0],
+            MAX_CREDITS_PER_SEM - used.get(s.id, (0, 0.0))[1],
+        )
+        for s in sems
+        if first_open is None or s.order >= first_open
+    ]
+
+    plan = generate_plan(snap, pa, placed, taken, slots, budget_ms)
+    courses = snap.courses
+    by_slot: dict[int, list[int]] = {}
+    for si, cid in plan.placements:
+        by_slot.setdefault(si, []).append(cid)
+    sem_by_id = {s.id: s for s in sems}
+    return jsonify({
+        "program": {"code": pa.program.code, "name": pa.program.name},
+        "semesters": [
+            {
+                "id": slot.semester_id,
+                "name": sem_by_id[slot.semester_id].name,
+                "add": [course_ref(courses[cid]) for cid in sorted(by_slot.get(si, ()), key=lambda c: courses[c].code)],
+            }
+            for si, slot in enumerate(sorted(slots, key=lambda s: s.order))
+        ],
+        "unmet_groups": [
+            {"group_id": pa.groups[gi].id, "title": pa.groups[gi].title, "short": n}
+            for gi, n in sorted(plan.short.items())
+        ],
+        "unscheduled": [course_ref(courses[cid]) for cid in plan.unscheduled],
+        "complete": not plan.short,
+        "search": {
+            "passes": plan.passes,
+            "elapsed_ms": round(plan.elapsed_ms, 1),
+            "budget_ms": budget_ms,
+            "timed_out": plan.timed_out,
+            "partial": plan.partial,
+        },
+    })
+
+
+@bp.get("/api/plan/validate")
+def api_plan_validate():
+    """
+    Check every class in the plan against its own semester (same rule as
+    /api/requirements: earlier terms count, the same term only for
+    concurrent rules). The last check is kept per student across writes;
+    after an add, delete or move only the changed courses and their direct
+    dependents are rechecked ("checked" in the response says how many).
+    """
+    user = get_current_user()
+    etag = plan_etag(user)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    snap = get_catalog_snapshot()
+    version = int(user.plan_version or 0)
+    prev = validation_cache.get(user.id)
+    if prev is not None and prev.version == version and prev.catalog_version == snap.version:
+        check = replace(prev, checked=0, incremental=True)
+    elif prev is not None and prev.version < version:
+        check = catch_up(db.session, prev, user.id, version, snap)
+    else:
+        check = check_plan(db.session, user.id, version, snap)
+    # stored without a user tag: writes must not drop it, catching up is the point
+    validation_cache.put(user.id, check)
+
+    courses = snap.courses
+    sem_of = {cid: sem_id for sc_id, (cid, sem_id) in check.classes.items()}
+    sc_of = {cid: sc_id for sc_id, (cid, _) in check.classes.items()}
+    invalid = [
+        {
+            "id": sc_of[cid],
+            "semester_id": sem_of[cid],
+            "course": course_ref(courses[cid]),
+            "unmet_prereq_ids": ids,
+            "unmet_prereqs": [courses[i].code for i in ids],
+        }
+        for cid, ids in sorted(check.unmet.items(), key=lambda kv: (check.placed[kv[0]][0], courses[kv[0]].code))
+    ]
+    return with_etag(jsonify({
+        "version": version,
+        "valid": not invalid,
+        "invalid": invalid,
+        "checked": check.checked,
+        "mode": "incremental" if check.incremental else "full",
+    }), etag)
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import hashlib
+import json
+
 from sqlalchemy import text, func
 
 from models.models import (
     db,
     User,
+    AppMeta,
     CourseCatalog,
     StudentSemester,
     CoursePrereq,
@@ -12,7 +16,9 @@ from models.models import (
     DegreeProgram,
     ReqGroup,
     ReqGroupCourse,
+    ORDER_GAP,
 )
+from models.catalog import bump_catalog_version
 
 # -----------------------------
 # Planner semesters
@@ -287,13 +293,40 @@ SCI_LECTURE_LAB_PAIRS = [
 ]
 
 
+SEED_FINGERPRINT_KEY = "seed_fingerprint"
+
+# Bump when the seeding code itself changes (group titles, kinds, min counts in
+# _seed_core/_seed_foundations) so existing databases get reseeded.
+SEED_REVISION = 1
+
+
+def seed_fingerprint() -> str:
+    """Hash of everything seed() writes, so an unchanged seed can be skipped."""
+    data = {
+        "revision": SEED_REVISION,
+        "semesters": SEMESTERS,
+        "courses": COURSES,
+        "offerings": {k: sorted(v) for k, v in TYPICAL_OFFERINGS.items()},
+        "prereqs": PREREQS,
+        "programs": [
+            (CORE_CODE, CORE_NAME, CSCI_CORE_ALL, ADV_ELECTIVES_PICK_THREE),
+            (FOUND_CODE, FOUND_NAME, SCI_LECTURE_LAB_PAIRS),
+        ],
+    }
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=list)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
 def _get_catalog_map(session):
     rows = session.query(CourseCatalog).all()
     return {c.code.strip().upper(): c for c in rows}
 
 
 def _purge_invalid_offerings(session):
-    session.execute(text("DELETE FROM course_typical_offering WHERE term NOT IN ('SPRING','SUMMER','FALL')"))
+    res = session.execute(text("DELETE FROM course_typical_offering WHERE term NOT IN ('SPRING','SUMMER','FALL')"))
+    if res.rowcount:
+        # raw DELETE bypasses the flush hook, so bump the catalog version by hand
+        bump_catalog_version(session)
     session.flush()
 
 
@@ -468,7 +501,17 @@ def _seed_foundations(session, prog):
     _ensure_req_group(session, prog.id, "Communication • Pick one", "ANY_COUNT", order, min_count=1, course_codes=["COMM 140", "ENGL 290", "ENGL 390"]); order += 1
 
 
-def seed(session):
+def seed(session, force: bool = False) -> bool:
+    """
+    Load the demo data. Skipped (one primary-key lookup) when the stored
+    fingerprint matches this file's data, unless force is set.
+    Returns True when the seed actually ran.
+    """
+    fingerprint = seed_fingerprint()
+    stored = session.get(AppMeta, SEED_FINGERPRINT_KEY)
+    if not force and stored is not None and stored.value == fingerprint:
+        return False
+
     # Ensure demo user
     user = session.query(User).filter_by(email="demo@example.com").first()
     if not user:
@@ -476,52 +519,21 @@ def seed(session):
         session.add(user)
         session.flush()
 
-    # --- Insert missing semesters with unique temporary orders (avoid NULL + UNIQUE collisions) ---
+    # --- Append missing semesters after the last one (orders are sparse, see ORDER_GAP) ---
     max_order = session.query(func.max(StudentSemester.order)).filter_by(student_id=user.id).scalar()
-    max_order = int(max_order) if max_order is not None else -1
-    TEMP_OFFSET = 1000  # keep temp orders disjoint from final 0..N-1
 
     existing = {(s.term, s.year) for s in session.query(StudentSemester.term, StudentSemester.year).filter_by(student_id=user.id)}
     to_insert = []
     for name, term, year in SEMESTERS:
         if (term, year) not in existing:
-            max_order += 1
+            max_order = 0 if max_order is None else int(max_order) + ORDER_GAP
             to_insert.append(
-                StudentSemester(
-                    student_id=user.id,
-                    name=name,
-                    term=term,
-                    year=year,
-                    order=max_order + TEMP_OFFSET,  # unique temp slot
-                )
+                StudentSemester(student_id=user.id, name=name, term=term, year=year, order=max_order)
             )
     if to_insert:
         session.add_all(to_insert)
         session.flush()
 
-    # --- Normalize per-student order to dense 0..N-1 using two-phase disjoint assignment ---
-    rows = session.query(StudentSemester).filter(StudentSemester.student_id == user.id).all()
-
-    def tweight(t: str | None) -> int:
-        t = (t or "").upper()
-        return 1 if t == "SPRING" else 2 if t == "SUMMER" else 3 if t == "FALL" else 0
-
-    # Sort: prefer existing explicit order; else by (year, term, id)
-    sortable = sorted(
-        rows,
-        key=lambda s: (0 if s.order is not None else 1, s.order or 0, int(s.year or 0), tweight(s.term), s.id),
-    )
-
-    # Phase A: move all orders into a far-away band to ensure no collisions when assigning 0..N-1
-    for s in rows:
-        s.order = (s.order or 0) + TEMP_OFFSET
-    session.flush()
-
-    # Phase B: assign canonical 0..N-1
-    for idx, s in enumerate(sortable):
-        s.order = idx
-    session.flush()
-
     # --- Catalog (idempotent) ---
     existing_codes = {code for (code,) in session.query(CourseCatalog.code).all()}
     to_add = [CourseCatalog(code=code, title=title, credits=credits) for code, title, credits in COURSES if code not in existing_codes]
@@ -541,4 +553,9 @@ def seed(session):
     _seed_core(session, core)
     _seed_foundations(session, found)
 
+    if stored is None:
+        session.add(AppMeta(key=SEED_FINGERPRINT_KEY, value=fingerprint))
+    else:
+        stored.value = fingerprint
     session.commit()
+    return True
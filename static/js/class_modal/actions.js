@@ -2,7 +2,7 @@
 import {
   addModal, searchInput, searchBtn, addOpen, addClose, addCancel, addConfirm,
   results, getSemesters, remainingCredits, toNum,
-  fetchSemesters, addClass, setSemesters
+  fetchSemesters, applyClassBatch, setSemesters
 } from "../semesters/state_nav.js";
 import { selectedCourseIds, loadAndRenderModal } from "./search.js";
 import { showError } from "../context_menu/toast.js";
@@ -284,25 +284,38 @@ export async function addSelectedToCurrentSemester(currentIndex) {
   if (!ids.length) { closeAddModal(); return; }
 
   let remaining = remainingCredits(sem);
-  let added = 0, blockedCredits = false, blockedAssigned = false;
+  let added = 0, blockedCredits = false, blockedAssigned = false, otherError = null;
+  const ops = [], lookupFailed = [];
 
   for (const catalogId of ids) {
     const catKey = catalogKey(catalogId);
     if (isCourseAssignedByCatalog(catKey)) { blockedAssigned = true; continue; }
+    // one bad lookup skips that course, not the whole add
+    let credits;
     try {
-      const { credits } = await fetchCourseLocalOrServerByCatalogId(catalogId);
-      const need = toNum(credits);
-      if (need <= 0) continue;
-      if (need > remaining) { blockedCredits = true; continue; }
-      await addClass(Number(catalogId), Number(sem.id));
-      remaining -= need;
-      added++;
-    } catch (e) { /* no-op */ }
+      ({ credits } = await fetchCourseLocalOrServerByCatalogId(catalogId));
+    } catch (e) {
+      console.warn(`[${LOG_NS}] course lookup failed`, catalogId, e);
+      lookupFailed.push(catalogId);
+      continue;
+    }
+    const need = toNum(credits);
+    if (need <= 0) continue;
+    if (need > remaining) { blockedCredits = true; continue; }
+    ops.push({ op: "add", course_id: Number(catalogId), semester_id: Number(sem.id) });
+    remaining -= need;
   }
 
   try {
-    const data = await fetchSemesters();
-    setSemesters(data);
+    // one round trip: the server re-checks the caps and sends back the semesters
+    const data = ops.length ? await applyClassBatch(ops) : { results: [], semesters: await fetchSemesters() };
+    for (const res of data.results || []) {
+      if (res.ok) added++;
+      else if (/credit/i.test(res.error || "")) blockedCredits = true;
+      else if (/already planned/i.test(res.error || "")) blockedAssigned = true;
+      else otherError = res.error || "Some courses could not be added.";
+    }
+    setSemesters(data.semesters);
     await hydrateModal();
     window.dispatchEvent(new Event("planner:render"));
     window.dispatchEvent(new Event("planner:reload"));
@@ -313,7 +326,9 @@ export async function addSelectedToCurrentSemester(currentIndex) {
   closeAddModal();
   if (blockedAssigned) showError("Some courses are already scheduled.");
   if (blockedCredits)  showError("Credit limit exceeded. Max 18 per semester.");
-  if (!added && !blockedAssigned && !blockedCredits) showError("No courses were added.");
+  if (otherError) showError(otherError);
+  if (lookupFailed.length) showError(`Could not load ${lookupFailed.length} course(s); they were skipped.`);
+  if (!added && !blockedAssigned && !blockedCredits && !otherError && !lookupFailed.length) showError("No courses were added.");
 }
 
 /* ---------------- bind ---------------- */
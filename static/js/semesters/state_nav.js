@@ -18,6 +18,7 @@ export const selectedCount = document.getElementById("modal-selected-count");
 // State
 let semesters = [];
 let current = 0;
+let planVersion = null;   // plan_version the local copy matches (null = unknown)
 
 export const getSemesters = () => semesters;
 export const setSemesters = (arr) => { semesters = Array.isArray(arr) ? arr : []; };
@@ -28,8 +29,54 @@ export const setCurrent = (i) => { current = i; };
 export async function fetchSemesters() {
   const r = await fetch("/api/semesters");
   if (!r.ok) throw new Error("failed");
+  const v = r.headers.get("X-Plan-Version");
+  planVersion = v === null ? null : Number(v);
   return r.json();
 }
+
+// Changes since a plan version: { version, semesters, classes, deleted_semesters, deleted_classes, reset? }
+export async function fetchPlanChanges(since) {
+  const r = await fetch(`/api/plan/changes?since=${encodeURIComponent(since)}`);
+  if (!r.ok) throw new Error("changes failed");
+  return r.json();
+}
+
+// Patch the local semesters in place from a /api/plan/changes payload
+export function applyPlanChanges(delta) {
+  const gone = new Set(delta.deleted_classes || []);
+  (delta.classes || []).forEach(c => gone.add(c.id));
+  const dropSem = new Set(delta.deleted_semesters || []);
+  let next = semesters
+    .filter(s => !dropSem.has(s.id))
+    .map(s => ({ ...s, classes: (s.classes || []).filter(c => !gone.has(c.id)) }));
+  const byId = new Map(next.map(s => [s.id, s]));
+  (delta.semesters || []).forEach(meta => {
+    const old = byId.get(meta.id);
+    const sem = { ...meta, classes: old ? old.classes : [] };
+    byId.set(sem.id, sem);
+  });
+  (delta.classes || []).forEach(c => {
+    const sem = byId.get(c.semester_id);
+    if (sem) sem.classes.push(c);
+  });
+  next = Array.from(byId.values()).sort((a, b) => a.order - b.order || a.id - b.id);
+  next.forEach(s => s.classes.sort((a, b) => a.position - b.position || a.id - b.id));
+  semesters = next;
+  planVersion = delta.version;
+}
+
+// Bring local state up to date: a delta when we know our version, else a full fetch
+export async function syncPlan() {
+  if (planVersion !== null) {
+    const delta = await fetchPlanChanges(planVersion);
+    if (!delta.reset) {
+      applyPlanChanges(delta);
+      return semesters;
+    }
+  }
+  setSemesters(await fetchSemesters());
+  return semesters;
+}
 export async function searchCourses(q) {
   const r = await fetch(`/api/courses?unassigned=1&q=${encodeURIComponent(q || "")}`);
   if (!r.ok) throw new Error("search failed");
@@ -47,6 +94,17 @@ export async function addClass(course_id, semester_id, section = null) {
   return r.json();
 }
 
+// Add/remove many classes in one request; returns { results, semesters }
+export async function applyClassBatch(ops) {
+  const r = await fetch(`/api/classes/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ ops })
+  });
+  if (!r.ok) throw new Error(await r.text());
+  return r.json();
+}
+
 // Move an existing StudentCourse to another semester (route may be defined elsewhere)
 export async function moveClass(studentCourseId, semester_id) {
   const r = await fetch(`/api/classes/${studentCourseId}`, {
@@ -1,7 +1,7 @@
 import {
   maxCreditsPerSem,
   track, dots, viewport,
-  fetchSemesters, deleteClass,
+  fetchSemesters, deleteClass, syncPlan,
   getSemesters, setSemesters, getCurrent, setCurrent,
   semCredits, escapeHTML,
   scrollToIndex, updateDotsAndHighlight, updateCenteredSemester,
@@ -195,8 +195,7 @@ function attachClassMenu(btn, cls) {
       { label: "Delete",  colorClass: "text-red-600",   icon: "trash", onClick: async () => {
           try {
             await deleteClass(cls.id);
-            const data = await fetchSemesters();
-            setSemesters(data);
+            await syncPlan();
             window.dispatchEvent(new Event("planner:render"));
           } catch {
             showError("Delete failed.");
@@ -296,8 +295,7 @@ function bindNavOnce() {
 
   window.addEventListener("planner:render", () => render());
   window.addEventListener("planner:reload", async () => {
-    const data = await fetchSemesters();
-    setSemesters(data);
+    await syncPlan();
     render();
   });
 
@@ -0,0 +1,56 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, text
+
+# app.py builds the app at import time: point it at a scratch database first
+_tmp = tempfile.mkdtemp(prefix="planner-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["PLANNER_SEED_ON_STARTUP"] = "0"
+
+from app import app as flask_app  # noqa: E402
+from models.models import db  # noqa: E402
+from models.search import FTS_TABLE, ensure_course_search  # noqa: E402
+from seed_courses import seed  # noqa: E402
+
+
+def reset_database() -> None:
+    """Fresh schema plus the demo seed, as a new deployment would have it."""
+    db.session.remove()
+    with db.engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    db.drop_all()
+    db.create_all()
+    ensure_course_search(db.engine)
+    seed(db.session)
+    db.session.commit()
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture()
+def app():
+    flask_app.config.update(TESTING=True)
+    with flask_app.app_context():
+        reset_database()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
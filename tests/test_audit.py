@@ -0,0 +1,141 @@
+"""
+models/audit.py: which courses each group applies. assign() against the
+greedy in-order pass it replaced and against brute force on small programs.
+"""
+import itertools
+import random
+from types import MappingProxyType
+
+import pytest
+
+from models.audit import PENDING, assign, audit_grade, candidates, compile_program_audit, run_audit
+from models.catalog import CatalogSnapshot, CourseRow, GroupCourseRow, GroupRow, ProgramRow
+
+COURSES = range(1, 9)
+
+
+def snapshot(prog: ProgramRow) -> CatalogSnapshot:
+    courses = {i: CourseRow(i, f"AUD {100 + i}", "t", None, 3.0, "AUD", None, 100 + i, 7) for i in COURSES}
+    return CatalogSnapshot(
+        "1", MappingProxyType(courses), MappingProxyType({}), MappingProxyType({}),
+        MappingProxyType({}), MappingProxyType({prog.code: prog}), None, None,
+    )
+
+
+def group(gid: int, kind: str, courses, count: int = 0, double: bool = False) -> GroupRow:
+    rows = tuple(c if isinstance(c, GroupCourseRow) else GroupCourseRow(c, None) for c in courses)
+    return GroupRow(gid, f"Group {gid}", kind, count, 0, double, gid, None, None, rows)
+
+
+def program(*groups: GroupRow) -> ProgramRow:
+    return ProgramRow(1, "AUD", "Audit", 120, tuple(groups))
+
+
+def greedy_assign(pa, cands):
+    """The old audit: groups in order, each takes its first unused candidates."""
+    used: set[int] = set()
+    out = []
+    for g, cs in zip(pa.groups, cands):
+        got = [c for c in cs if g.double or c not in used][: g.need]
+        if not g.double:
+            used.update(got)
+        out.append(got)
+    return out
+
+
+def test_matching_moves_a_shared_course_to_the_group_that_needs_it():
+    # course 1 fits both groups, course 2 only the first: greedy gives
+    # course 1 to the first group and leaves the second one empty
+    prog = program(group(1, "ANY_COUNT", [1, 2], count=1), group(2, "ANY_COUNT", [1], count=1))
+    pa = compile_program_audit(prog)
+    taken = {1: "A", 2: "A"}
+    cands = candidates(pa, snapshot(prog), taken)
+
+    assert greedy_assign(pa, cands) == [[1], []]
+    assert assign(pa, cands) == [[2], [1]]
+    result = run_audit(pa, snapshot(prog), taken)
+    assert [g["satisfied"] for g in result["groups"]] == [True, True]
+    assert result["summary"]["courses_applied"] == 2
+
+
+def test_double_counting_group_reuses_courses():
+    prog = program(
+        group(1, "ALL", [1, 2]),
+        group(2, "ANY_COUNT", [1, 3], count=1, double=True),
+        group(3, "ANY_COUNT", [1, 2], count=1),
+    )
+    pa = compile_program_audit(prog)
+    applied = assign(pa, candidates(pa, snapshot(prog), {1: "B", 2: "B"}))
+    # the ALL group keeps both; the double-counting group still applies course 1;
+    # the last exclusive group has nothing left
+    assert applied == [[1, 2], [1], []]
+
+
+def test_min_grades():
+    prog = program(
+        group(1, "ANY_COUNT", [GroupCourseRow(1, None), GroupCourseRow(2, "B"), GroupCourseRow(3, "D")], count=3),
+    )
+    pa = compile_program_audit(prog)
+    snap = snapshot(prog)
+
+    def applied(taken):
+        return assign(pa, candidates(pa, snap, taken))[0]
+
+    # no min_grade means the default C
+    assert applied({1: "C", 2: "B", 3: "D"}) == [1, 2, 3]
+    assert applied({1: "C-", 2: "B-", 3: "F"}) == []
+    # planned / in-progress courses count as passing; a COMPLETED one with no grade doesn't
+    assert applied({1: audit_grade("PLANNED", None), 2: PENDING, 3: audit_grade("COMPLETED", None)}) == [1, 2]
+
+
+def best_by_brute_force(pa, cands):
+    """Every way to give each course to at most one exclusive group that lists it."""
+    exclusive = [gi for gi, g in enumerate(pa.groups) if not g.double]
+    courses = sorted({c for gi in exclusive for c in cands[gi]})
+    options = [[None] + [gi for gi in exclusive if c in cands[gi]] for c in courses]
+    best_total, best_counts = -1, None
+    for choice in itertools.product(*options):
+        counts = [0] * len(pa.groups)
+        for gi in choice:
+            if gi is not None:
+                counts[gi] += 1
+        if any(counts[gi] > pa.groups[gi].need for gi in exclusive):
+            continue
+        best_total = max(best_total, sum(counts))
+        if best_counts is None or counts > best_counts:
+            best_counts = counts
+    return best_total, best_counts
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_assign_is_optimal_against_brute_force(seed):
+    rnd = random.Random(seed)
+    groups = [
+        group(
+            gid, kind, rnd.sample(COURSES, rnd.randint(1, 4)),
+            count=rnd.randint(1, 3), double=rnd.random() < 0.2,
+        )
+        for gid, kind in enumerate(rnd.choices(["ALL", "ANY_COUNT", "ANY_COUNT"], k=rnd.randint(1, 4)), start=1)
+    ]
+    prog = program(*groups)
+    pa = compile_program_audit(prog)
+    taken = {c: rnd.choice(["A", "C", "D", PENDING]) for c in rnd.sample(COURSES, rnd.randint(1, 6))}
+    cands = candidates(pa, snapshot(prog), taken)
+
+    applied = assign(pa, cands)
+    best_total, best_counts = best_by_brute_force(pa, cands)
+    exclusive = [gi for gi, g in enumerate(pa.groups) if not g.double]
+    counts = [len(applied[gi]) if gi in exclusive else 0 for gi in range(len(pa.groups))]
+    # as many courses as any assignment applies, and the best possible for
+    # each group in program order, so never worse than greedy for any group
+    assert sum(counts) == best_total, seed
+    assert counts == best_counts, seed
+    greedy = greedy_assign(pa, cands)
+    assert all(len(applied[gi]) >= len(greedy[gi]) for gi in exclusive), seed
+    # each course applied at most once across exclusive groups, only where it's a candidate
+    used = [c for gi in exclusive for c in applied[gi]]
+    assert len(used) == len(set(used)), seed
+    for gi, g in enumerate(pa.groups):
+        assert set(applied[gi]) <= set(cands[gi]), seed
+        if g.double:
+            assert applied[gi] == cands[gi][: g.need], seed
@@ -0,0 +1,57 @@
+from models.models import db, User
+from routes.cache import CACHES, LRUCache
+from routes.routes import requirements_cache
+
+
+def test_lru_hits_evicts_oldest_and_invalidates_per_user():
+    cache = LRUCache("test-lru", maxsize=3)
+    try:
+        cache.put("a", 1, user_id=1)
+        cache.put("b", 2, user_id=2)
+        cache.put("c", 3, user_id=1)
+        assert cache.get("a") == 1  # now the most recently used
+        assert cache.get("zz") is None
+        cache.put("d", 4, user_id=3)  # over capacity: "b" is the oldest
+        assert cache.get("b") is None
+        assert [cache.get(k) for k in "acd"] == [1, 3, 4]
+
+        cache.invalidate_user(1)
+        assert cache.get("a") is None and cache.get("c") is None
+        assert cache.get("d") == 4
+        assert cache.stats() == {
+            "size": 1, "maxsize": 3, "hits": 5, "misses": 4, "evictions": 1, "invalidations": 2,
+        }
+        # replacing a key moves it to its new owner
+        cache.put("d", 5, user_id=4)
+        cache.invalidate_user(3)
+        assert cache.get("d") == 5
+    finally:
+        CACHES.pop("test-lru", None)
+
+
+def test_plan_write_drops_only_that_users_requirements(client):
+    other = User(email="cache@example.com", name="Cache")
+    db.session.add(other)
+    db.session.commit()
+    other_id = other.id
+    requirements_cache.clear()
+
+    def fetch(user_id: int | None = None) -> dict[str, int]:
+        before = requirements_cache.stats()
+        url = "/api/requirements" + (f"?user_id={user_id}" if user_id else "")
+        assert client.get(url).status_code == 200
+        after = requirements_cache.stats()
+        return {k: after[k] - before[k] for k in ("hits", "misses", "invalidations")}
+
+    assert fetch() == {"hits": 0, "misses": 1, "invalidations": 0}
+    assert fetch(other_id) == {"hits": 0, "misses": 1, "invalidations": 0}
+    assert fetch() == {"hits": 1, "misses": 0, "invalidations": 0}
+    assert requirements_cache.stats()["size"] == 2
+
+    before = requirements_cache.stats()["invalidations"]
+    assert client.post("/api/semesters", json={"name": "Cache", "term": "FALL", "year": 2032}).status_code == 201
+    assert requirements_cache.stats()["invalidations"] == before + 1
+    assert requirements_cache.stats()["size"] == 1
+
+    assert fetch(other_id) == {"hits": 1, "misses": 0, "invalidations": 0}
+    assert fetch() == {"hits": 0, "misses": 1, "invalidations": 0}
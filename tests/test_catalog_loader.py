@@ -0,0 +1,51 @@
+from catalog_loader import load_catalog
+from models.catalog import current_catalog_version, get_catalog_snapshot
+from models.models import db, CourseCatalog, CoursePrereq
+
+
+def write_catalog(tmp_path, prereq_rows: str) -> None:
+    (tmp_path / "courses.csv").write_text(
+        "code,title,credits,description\n"
+        "LDR 101,Loader One,3,First\n"
+        'LDR 102,"Loader\nTwo",4,Second\n'
+        "LDR 201,Loader Three,lots,Bad credits\n"
+        "LDR 202,Loader Four,3,\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "offerings.jsonl").write_text(
+        '{"code": "LDR 101", "term": "FALL"}\n\n{"code": "LDR 102", "term": "spring"}\n', encoding="utf-8"
+    )
+    (tmp_path / "prereqs.csv").write_text("code,prereq_code,group_key,allow_concurrent\n" + prereq_rows, encoding="utf-8")
+
+
+def test_load_is_idempotent_and_skips_malformed_rows(client, tmp_path):
+    write_catalog(tmp_path, "LDR 102,LDR 101,1,no\nLDR 202,LDR 101,first,no\nLDR 202,NOPE 999,1,no\n")
+    version = current_catalog_version(db.session)
+
+    stats = {s.name: s for s in load_catalog(db.session, tmp_path)}
+    assert (stats["courses"].rows, stats["courses"].written, stats["courses"].skipped) == (4, 3, 1)
+    # the quoted title spans two lines, so the bad row starts on line 5
+    assert stats["courses"].malformed == ["courses.csv:5: could not convert string to float: 'lots'"]
+    assert (stats["offerings"].written, stats["offerings"].skipped) == (2, 0)
+    # a bad group_key is malformed; an unknown code is just skipped
+    assert (stats["prereqs"].written, stats["prereqs"].skipped) == (1, 2)
+    assert stats["prereqs"].malformed == ["prereqs.csv:3: invalid literal for int() with base 10: 'first'"]
+
+    after_first = current_catalog_version(db.session)
+    assert after_first != version
+    snap = get_catalog_snapshot()
+    ldr = {c.code: c for c in db.session.query(CourseCatalog).filter(CourseCatalog.code.like("LDR %"))}
+    assert sorted(ldr) == ["LDR 101", "LDR 102", "LDR 202"]
+    assert snap.courses[ldr["LDR 101"].id].term_mask and snap.courses[ldr["LDR 102"].id].term_mask
+    assert db.session.query(CoursePrereq).filter_by(course_id=ldr["LDR 102"].id).count() == 1
+
+    # the same files again: nothing written, no catalog bump
+    again = load_catalog(db.session, tmp_path)
+    assert [s.written for s in again] == [0, 0, 0]
+    assert current_catalog_version(db.session) == after_first
+
+    # a changed row is updated in place
+    write_catalog(tmp_path, "LDR 102,LDR 101,1,yes\n")
+    stats = {s.name: s for s in load_catalog(db.session, tmp_path)}
+    assert (stats["courses"].written, stats["offerings"].written, stats["prereqs"].written) == (0, 0, 1)
+    assert db.session.query(CoursePrereq).filter_by(course_id=ldr["LDR 102"].id).one().allow_concurrent is True
@@ -0,0 +1,96 @@
+import models.plan
+from models.audit import get_program_audit
+from models.catalog import current_catalog_version, get_catalog_snapshot
+from models.models import db, CourseCatalog, CoursePrereq, PlanChange, User
+
+from models.plan_solver import OpenSlot, generate_plan, group_deficits
+
+from seed_courses import seed
+
+from conftest import count_statements, reset_database
+
+
+def test_recreated_database_gets_new_catalog_version(client):
+    course = db.session.query(CourseCatalog).filter_by(code="CSCI 135").one()
+    before = current_catalog_version(db.session)
+    snap = get_catalog_snapshot()
+    etag = client.get(f"/api/courses/{course.id}/unlocks").headers["ETag"]
+
+    # same process, same seed: the version counter starts over at the same number
+    reset_database()
+    after = current_catalog_version(db.session)
+
+    assert after != before
+    assert get_catalog_snapshot() is not snap
+    r = client.get(f"/api/courses/{course.id}/unlocks", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+
+def test_plan_change_log_is_pruned_to_the_retained_window(client, monkeypatch):
+    monkeypatch.setattr(models.plan, "PLAN_CHANGE_RETAIN", 8)
+    monkeypatch.setattr(models.plan, "PLAN_CHANGE_PRUNE_EVERY", 4)
+    sems = [
+        client.post("/api/semesters", json={"name": name, "term": "FALL", "year": 2030}).get_json()
+        for name in ("Log A", "Log B")
+    ]
+    course = client.get("/api/courses?unassigned=1&limit=1").get_json()[0]
+    sc = client.post("/api/classes", json={"course_id": course["id"], "semester_id": sems[0]["id"]}).get_json()
+    start = int(client.get("/api/semesters").headers["X-Plan-Version"])
+    client.get("/api/plan/validate")  # kept check at `start`
+
+    for i in range(20):
+        r = client.patch(f"/api/classes/{sc['id']}", json={"semester_id": sems[(i + 1) % 2]["id"]})
+        assert r.status_code == 200
+    version = int(client.get("/api/semesters").headers["X-Plan-Version"])
+    assert version == start + 20
+
+    db.session.expire_all()
+    demo = db.session.query(User).filter_by(email="demo@example.com").one()
+    kept = [v for (v,) in db.session.query(PlanChange.version).filter_by(student_id=demo.id)]
+    assert min(kept) > version - 8 - 4  # pruned on the last multiple of 4
+    assert len(kept) < 20
+
+    # inside the window: a delta; past it: reset, and the kept check is redone in full
+    assert "reset" not in client.get(f"/api/plan/changes?since={version - 8}").get_json()
+    assert client.get(f"/api/plan/changes?since={start}").get_json()["reset"] is True
+    assert client.get("/api/plan/validate").get_json()["mode"] == "full"
+
+
+def test_plan_generator_budget_binds_inside_the_first_pass(client):
+    snap = get_catalog_snapshot()
+    pa = get_program_audit(snap, "BS-CS-Core-2025")
+    slots = [OpenSlot(i + 1, i * 1024, 0, 8, 18.0) for i in range(8)]
+
+    full = generate_plan(snap, pa, {}, {}, slots, budget_ms=2000)
+    assert not full.partial and not full.short
+
+    # out of time before pass 0 chose anything: an empty plan, flagged, not a long wait
+    cut = generate_plan(snap, pa, {}, {}, slots, budget_ms=0)
+    assert cut.partial and cut.timed_out
+    assert cut.passes == 1 and not cut.placements
+    assert cut.short == group_deficits(pa, snap, {})
+
+    r = client.get("/api/plan/generate?program=BS-CS-Core-2025").get_json()
+    assert r["search"]["partial"] is False and r["complete"] is True
+
+
+def test_seed_skips_when_fingerprint_matches_and_force_reseeds(client):
+    course = db.session.query(CourseCatalog).filter_by(code="CSCI 145").one()
+    rule = db.session.query(CoursePrereq).filter_by(course_id=course.id).one()
+    db.session.delete(rule)
+    db.session.commit()
+    version = current_catalog_version(db.session)
+
+    # same data as last time: one lookup of the fingerprint, nothing written
+    db.session.expire_all()
+    with count_statements() as statements:
+        assert seed(db.session) is False
+    assert len(statements) == 1
+    assert current_catalog_version(db.session) == version
+    assert db.session.query(CoursePrereq).filter_by(course_id=course.id).count() == 0
+
+    # force runs it anyway and puts the missing rule back
+    assert seed(db.session, force=True) is True
+    assert db.session.query(CoursePrereq).filter_by(course_id=course.id).count() == 1
+    assert current_catalog_version(db.session) != version
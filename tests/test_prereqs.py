@@ -0,0 +1,186 @@
+"""
+evaluate_prereqs / validate_plan against a frozen copy of the per-course
+closures /api/requirements used before prereqs were compiled to bitmasks,
+and the incremental catch_up against a fresh check_plan.
+"""
+import random
+
+import pytest
+
+from models.catalog import PrereqGroup, PrereqRule, get_catalog_snapshot
+from models.models import db, ORDER_GAP, StudentCourse, StudentSemester, User
+from models.plan import catch_up, check_plan
+from models.prereqs import compile_prereq_index, evaluate_prereqs, validate_plan
+
+# None is stored as PLANNED; DROPPED stands in for any status that doesn't count
+STATUSES = [None, "PLANNED", "IN_PROGRESS", "COMPLETED", "DROPPED"]
+
+
+def legacy_eval(req_map, course_state, anchor_rank, course_id):
+    """The old prereq_eval_for_course closure, with its helper, unchanged apart from arguments."""
+
+    def prereq_rule_satisfied(rule):
+        st = course_state.get(rule["prereq_course_id"])
+        if not st:
+            return False
+        ord_ = st.get("order")
+        if ord_ is None:
+            return False
+        status = st.get("status") or "PLANNED"
+        if ord_ < anchor_rank:
+            return status in {"PLANNED", "IN_PROGRESS", "COMPLETED"}
+        if ord_ == anchor_rank:
+            return bool(rule["allow_concurrent"]) and status in {"PLANNED", "IN_PROGRESS", "COMPLETED"}
+        return False
+
+    groups = req_map.get(course_id, {})
+    if not groups:
+        return True, []
+    satisfied = False
+    missing = []
+    for _gk, rules in groups.items():
+        if all(prereq_rule_satisfied(r) for r in rules):
+            satisfied = True
+            missing = []
+            break
+        else:
+            for r in rules:
+                if not prereq_rule_satisfied(r):
+                    missing.append(r["prereq_course_id"])
+    missing = sorted(set(missing))
+    return satisfied, missing
+
+
+def random_case(rnd):
+    ids = rnd.sample(range(1, 400), rnd.randint(5, 60))
+    rows = []
+    for cid in ids:
+        for gk in range(1, rnd.choice([0, 1, 1, 2, 3]) + 1):
+            for p in rnd.sample(ids, rnd.randint(1, min(3, len(ids)))):
+                rows.append({"course_id": cid, "group_key": gk, "prereq_course_id": p, "allow_concurrent": rnd.random() < 0.4})
+    # a few courses sit in no semester (order None), like classes whose semester row is gone
+    orders = list(range(0, 6 * 1024, 1024))
+    placed = {
+        cid: (rnd.choice(orders + [None]), rnd.choice(STATUSES))
+        for cid in rnd.sample(ids, rnd.randint(0, len(ids)))
+    }
+    return ids, rows, placed
+
+
+def compile_rows(ids, rows):
+    req_map = {}
+    for r in rows:
+        req_map.setdefault(r["course_id"], {}).setdefault(r["group_key"], []).append(r)
+    prereqs = {
+        cid: tuple(
+            PrereqGroup(gk, tuple(PrereqRule(r["prereq_course_id"], None, r["allow_concurrent"]) for r in rules))
+            for gk, rules in sorted(groups.items())
+        )
+        for cid, groups in req_map.items()
+    }
+    return req_map, compile_prereq_index(ids, prereqs)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_evaluate_prereqs_matches_legacy_closure(seed):
+    rnd = random.Random(seed)
+    ids, rows, placed = random_case(rnd)
+    req_map, index = compile_rows(ids, rows)
+    state = {cid: {"order": order, "status": status} for cid, (order, status) in placed.items()}
+    # anchors before, on, between and after the placed terms, plus "no anchor"
+    for anchor in (-1, 0, 1024, 1500, 3072, 5120, 10**9):
+        blocked = evaluate_prereqs(index, placed, anchor)
+        for cid in ids:
+            ok, missing = legacy_eval(req_map, state, anchor, cid)
+            assert (cid not in blocked) == ok, (seed, anchor, cid)
+            assert blocked.get(cid, []) == missing, (seed, anchor, cid)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_validate_plan_matches_legacy_closure_per_semester(seed):
+    rnd = random.Random(seed)
+    ids, rows, placed = random_case(rnd)
+    req_map, index = compile_rows(ids, rows)
+    state = {cid: {"order": order, "status": status} for cid, (order, status) in placed.items()}
+    expected = {}
+    for cid, (order, status) in placed.items():
+        if order is None or (status or "PLANNED") not in {"PLANNED", "IN_PROGRESS", "COMPLETED"}:
+            continue  # not in the plan as far as prereqs go
+        ok, missing = legacy_eval(req_map, state, order, cid)
+        if not ok:
+            expected[cid] = missing
+    assert validate_plan(index, placed) == expected
+
+
+def plan_edits(rnd, snap, user, sems, course_pool, steps):
+    """Random add / move / status / delete / semester-move commits; yields what each one touched."""
+    positions = iter(range(ORDER_GAP, 10**9, ORDER_GAP))
+    for _ in range(steps):
+        classes = db.session.query(StudentCourse).filter_by(student_id=user.id).all()
+        planned = {sc.course_id for sc in classes}
+        kind = rnd.choice(["add", "add", "move", "status", "delete", "semester"]) if classes else "add"
+        if kind == "add":
+            cid = rnd.choice([c for c in course_pool if c not in planned])
+            sc = StudentCourse(
+                student_id=user.id, semester_id=rnd.choice(sems).id, course_id=cid,
+                credits=snap.courses[cid].credits, position=next(positions),
+            )
+            db.session.add(sc)
+            touched = {cid}
+        elif kind == "semester":
+            sem = rnd.choice(sems)
+            used = {s.order for s in sems}
+            sem.order = rnd.choice([o for o in range(-4 * ORDER_GAP, 12 * ORDER_GAP, ORDER_GAP // 2) if o not in used])
+            touched = {sc.course_id for sc in classes if sc.semester_id == sem.id}
+        else:
+            sc = rnd.choice(classes)
+            touched = {sc.course_id}
+            if kind == "move":
+                sc.semester_id = rnd.choice([s.id for s in sems if s.id != sc.semester_id])
+                sc.position = next(positions)
+            elif kind == "status":
+                sc.status = rnd.choice([s for s in ("PLANNED", "IN_PROGRESS", "COMPLETED") if s != sc.status])
+            else:
+                db.session.delete(sc)
+        db.session.commit()
+        yield kind, touched
+
+
+def test_catch_up_matches_a_fresh_check(app):
+    # one database for every seed: a reset per seed would cost more than the checks
+    snap = get_catalog_snapshot()
+    # courses with prereqs and the prereqs themselves, so edits interact
+    course_pool = sorted(
+        {cid for cid in snap.prereqs}
+        | {r.prereq_course_id for groups in snap.prereqs.values() for g in groups for r in g.rules}
+    )
+    for seed in range(40):
+        rnd = random.Random(seed)
+        user = User(email=f"catchup{seed}@example.com", name="Catch up")
+        db.session.add(user)
+        db.session.flush()
+        sems = [
+            StudentSemester(student_id=user.id, name=f"S{i}", term="FALL", year=2030 + i, order=i * ORDER_GAP)
+            for i in range(6)
+        ]
+        db.session.add_all(sems)
+        db.session.commit()
+
+        checks = [check_plan(db.session, user.id, user.plan_version, snap)]
+        for kind, touched in plan_edits(rnd, snap, user, sems, course_pool, steps=25):
+            version = user.plan_version
+            fresh = check_plan(db.session, user.id, version, snap)
+            # from the last check (one edit) and from a few edits back
+            for prev in {id(c): c for c in (checks[-1], rnd.choice(checks[-6:]))}.values():
+                got = catch_up(db.session, prev, user.id, version, snap)
+                assert got.incremental, (seed, kind)
+                assert got.unmet == fresh.unmet, (seed, kind)
+                assert (got.placed, got.classes, got.orders) == (fresh.placed, fresh.classes, fresh.orders), (seed, kind)
+            single = catch_up(db.session, checks[-1], user.id, version, snap)
+            if kind != "semester":
+                # only the edited course and its direct dependents, never the whole plan
+                (cid,) = touched
+                assert single.checked <= 1 + len(snap.prereq_graph.dependents.get(cid, ())), (seed, kind)
+                if len(fresh.placed) > 1 + len(snap.prereq_graph.dependents.get(cid, ())):
+                    assert single.checked < len(fresh.placed), (seed, kind)
+            checks.append(single)
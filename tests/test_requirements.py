@@ -0,0 +1,83 @@
+import json
+
+from models.models import db, CourseCatalog, CoursePrereq
+
+
+def compact(body: bytes) -> str:
+    return json.dumps(json.loads(body), separators=(",", ":"), sort_keys=True)
+
+
+def requirement_items(client, **params) -> dict[str, dict]:
+    r = client.get("/api/requirements", query_string=params)
+    assert r.status_code == 200
+    return {c["code"]: c for g in r.get_json()["groups"] for c in g["courses"]}
+
+
+def test_prereq_anchor_rules(client):
+    # CSCI 145 needs CSCI 135 and CSCI 210 needs CSCI 145; both rules allow
+    # concurrency in the seed, make the second one strict
+    codes = {c.code: c.id for c in db.session.query(CourseCatalog).filter(CourseCatalog.code.in_(["CSCI 135", "CSCI 145", "CSCI 210"]))}
+    rule = db.session.query(CoursePrereq).filter_by(course_id=codes["CSCI 210"], prereq_course_id=codes["CSCI 145"]).one()
+    rule.allow_concurrent = False
+    db.session.commit()
+
+    sems = [
+        client.post("/api/semesters", json={"name": name, "term": term, "year": 2031}).get_json()
+        for name, term in (("Anchor 1", "SPRING"), ("Anchor 2", "FALL"), ("Anchor 3", "SPRING"))
+    ]
+    for code in ("CSCI 135", "CSCI 145"):
+        r = client.post("/api/classes", json={"course_id": codes[code], "semester_id": sems[1]["id"]})
+        assert r.status_code == 201
+
+    def ok(code: str, sem: dict) -> bool:
+        return requirement_items(client, current_order=sem["order"])[code]["prereq_ok"]
+
+    # a concurrent prereq counts in the same term, a strict one doesn't
+    assert ok("CSCI 145", sems[1]) is True
+    assert ok("CSCI 210", sems[1]) is False
+    # both count from a later term, neither from an earlier one
+    assert ok("CSCI 145", sems[2]) is True and ok("CSCI 210", sems[2]) is True
+    assert ok("CSCI 145", sems[0]) is False and ok("CSCI 210", sems[0]) is False
+    assert requirement_items(client, current_order=sems[1]["order"])["CSCI 210"]["unmet_prereqs"] == ["CSCI 145"]
+
+
+def test_requirements_group_paging_has_no_gaps_or_duplicates(client):
+    full = client.get("/api/requirements").get_json()["groups"]
+    paged = client.get("/api/requirements?limit=2").get_json()["groups"]
+    assert [g["group_id"] for g in paged] == [g["group_id"] for g in full]
+    for whole, first in zip(full, paged):
+        ids = [c["id"] for c in first["courses"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            r = client.get("/api/requirements", query_string={"limit": 2, "group_id": whole["group_id"], "cursor": cursor})
+            (page,) = r.get_json()["groups"]
+            assert 0 < len(page["courses"]) <= 2
+            ids += [c["id"] for c in page["courses"]]
+            cursor = page["next_cursor"]
+        assert ids == [c["id"] for c in whole["courses"]], whole["group_id"]
+    assert client.get(f"/api/requirements?cursor={paged[0]['next_cursor']}").status_code == 400  # needs group_id
+
+
+def test_course_cursor_paging_has_no_gaps_or_duplicates(client):
+    for q in ("", "CSCI", "intro"):
+        full = client.get("/api/courses", query_string={"unassigned": 0, "limit": 200, "q": q}).get_json()
+        assert len(full) > 5, q
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {"unassigned": 0, "limit": 4, "q": q}
+            if cursor:
+                params["cursor"] = cursor
+            r = client.get("/api/courses", query_string=params)
+            ids += [c["id"] for c in r.get_json()]
+            pages += 1
+            cursor = r.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert ids == [c["id"] for c in full], q
+        assert pages == -(-len(full) // 4), q
+
+
+def test_streamed_bodies_are_compact(client):
+    for url in ("/api/requirements?current_term=FALL", "/api/requirements?limit=2", "/api/courses?unassigned=0"):
+        body = client.get(url).get_data()
+        assert body.decode() == compact(body), url
@@ -0,0 +1,222 @@
+from models.catalog import get_catalog_snapshot
+from models.models import db, CourseCatalog, StudentCourse, StudentSemester, User, ORDER_GAP
+from routes.routes import encode_cursor, semester_load_for_user
+
+from conftest import count_statements
+
+
+def make_plan(dept: str, semesters: int, classes: int) -> int:
+    user = User(email=f"{dept.lower()}@example.com", name=dept)
+    db.session.add(user)
+    courses = [
+        CourseCatalog(code=f"{dept} {1000 + i}", title=f"Query count {i}", credits=3.0)
+        for i in range(classes)
+    ]
+    db.session.add_all(courses)
+    db.session.flush()
+    sems = [
+        StudentSemester(student_id=user.id, name=f"Term {i}", term="FALL", year=2025 + i, order=i * ORDER_GAP)
+        for i in range(semesters)
+    ]
+    db.session.add_all(sems)
+    db.session.flush()
+    db.session.add_all(
+        StudentCourse(
+            student_id=user.id, semester_id=sems[i % semesters].id, course_id=c.id,
+            credits=c.credits, position=(i // semesters) * ORDER_GAP,
+        )
+        for i, c in enumerate(courses)
+    )
+    db.session.commit()
+    return user.id
+
+
+def test_semester_load_query_count_is_fixed(client):
+    big = make_plan("BIG", semesters=16, classes=100)
+    small = make_plan("SML", semesters=1, classes=1)
+    db.session.expire_all()
+
+    with count_statements() as statements:
+        sems = semester_load_for_user(big)
+    assert sum(len(s.courses) for s in sems) == 100
+    assert {sc.course.code for s in sems for sc in s.courses}  # already loaded, no lazy loads
+    # semesters, their classes, the classes' catalog rows
+    assert len(statements) == 3
+
+    db.session.expire_all()
+    with count_statements() as small_statements:
+        assert client.get(f"/api/semesters?user_id={small}").status_code == 200
+    with count_statements() as big_statements:
+        r = client.get(f"/api/semesters?user_id={big}")
+    assert r.status_code == 200
+    assert sum(len(s["classes"]) for s in r.get_json()) == 100
+    assert len(big_statements) == len(small_statements)
+
+
+def classes_in(client, sem_id: int) -> list[int]:
+    sem = next(s for s in client.get("/api/semesters").get_json() if s["id"] == sem_id)
+    return [c["id"] for c in sem["classes"]]
+
+
+def positions(sem_id: int) -> list[int]:
+    db.session.expire_all()
+    return sorted(p for (p,) in db.session.query(StudentCourse.position).filter_by(semester_id=sem_id))
+
+
+def test_move_respaces_when_gaps_run_out_on_both_sides_of_zero(client):
+    courses = iter(client.get("/api/courses?unassigned=1&limit=8").get_json())
+
+    def fill(name: str) -> tuple[int, list[int]]:
+        sem_id = client.post("/api/semesters", json={"name": name, "term": "FALL", "year": 2031}).get_json()["id"]
+        for _ in range(4):
+            r = client.post("/api/classes", json={"course_id": next(courses)["id"], "semester_id": sem_id})
+            assert r.status_code == 201
+        assert positions(sem_id) == [0, ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP]
+        return sem_id, classes_in(client, sem_id)
+
+    def move_before(sem_id: int, order: list[int], sc_id: int, before_id: int) -> set[int]:
+        r = client.patch(f"/api/classes/{sc_id}", json={"semester_id": sem_id, "before_id": before_id})
+        assert r.status_code == 200, r.get_data(as_text=True)
+        order.remove(sc_id)
+        order.insert(order.index(before_id), sc_id)
+        assert classes_in(client, sem_id) == order
+        return set(positions(sem_id))
+
+    # below zero: squeeze classes in right before the one at 0, so positions
+    # climb -512, -256, ... -1, the gap runs out and the semester is respaced
+    sem_id, order = fill("Below zero")
+    anchor = order[0]
+    seen: set[int] = set()
+    for _ in range(14):
+        seen |= move_before(sem_id, order, order[-1] if order[-1] != anchor else order[0], anchor)
+    # -1 was reached, so the later moves only got room through a respace
+    assert -1 in seen
+
+    # above zero: squeeze in before the class just moved, halving the gap down
+    # to the class at 0: 512, 256, ... 1, then respace
+    sem_id, order = fill("Above zero")
+    last = order[1]
+    seen = set()
+    for _ in range(14):
+        sc_id = order[-1] if order[-1] != last else order[-2]
+        seen |= move_before(sem_id, order, sc_id, last)
+        last = sc_id
+    assert 1 in seen
+
+
+def empty_plan(dept: str, semesters: int, courses: int) -> tuple[int, list[int], list[int]]:
+    uid = make_plan(dept, semesters=semesters, classes=courses)
+    db.session.query(StudentCourse).filter_by(student_id=uid).delete()
+    db.session.commit()
+    sem_ids = [sid for (sid,) in db.session.query(StudentSemester.id).filter_by(student_id=uid)]
+    course_ids = [cid for (cid,) in db.session.query(CourseCatalog.id).filter(CourseCatalog.code.like(f"{dept} %"))]
+    return uid, sem_ids, course_ids
+
+
+def test_batch_add_results_do_not_lazy_load_courses(client):
+    uid, sems, courses = empty_plan("BAT", semesters=5, courses=30)
+    get_catalog_snapshot()  # built outside the counts
+    ops = [{"op": "add", "course_id": c, "semester_id": sems[i % 5]} for i, c in enumerate(courses)]
+    db.session.expire_all()
+    with count_statements() as statements:
+        r = client.post(f"/api/classes/batch?user_id={uid}", json={"ops": ops})
+    assert r.status_code == 200, r.get_data(as_text=True)
+    assert [x["status"] for x in r.get_json()["results"]] == [201] * 30
+    assert all(x["class"]["code"] for x in r.get_json()["results"])
+    catalog_reads = [s for s in statements if s.lstrip().startswith("SELECT") and "FROM course_catalog" in s]
+    assert len(catalog_reads) == 1  # the semester reload; the results come from the snapshot
+
+
+def test_batch_rejects_malformed_ids_per_item(client):
+    uid, sems, courses = empty_plan("MAL", semesters=1, courses=2)
+    r = client.post(f"/api/classes/batch?user_id={uid}", json={"ops": [
+        {"op": "add", "course_id": str(courses[0]), "semester_id": str(sems[0])},
+        {"op": "add", "course_id": [courses[1]], "semester_id": sems[0]},
+        {"op": "remove", "id": {"id": 1}},
+        {"op": "remove", "id": "nope"},
+    ]})
+    assert r.status_code == 200, r.get_data(as_text=True)
+    results = r.get_json()["results"]
+    assert [x["status"] for x in results] == [201, 400, 400, 400]
+    added = results[0]["class"]["id"]
+
+    r = client.post(f"/api/classes/batch?user_id={uid}", json={"ops": [{"op": "remove", "id": str(added)}]})
+    assert r.status_code == 200
+    assert r.get_json()["results"] == [{"index": 0, "ok": True, "status": 204, "id": added, "applied": True}]
+
+
+def test_atomic_batch_failure_reports_every_item(client):
+    uid, sems, courses = empty_plan("ATM", semesters=1, courses=2)
+    kept = client.post(f"/api/classes?user_id={uid}", json={"course_id": courses[0], "semester_id": sems[0]}).get_json()
+    r = client.post(f"/api/classes/batch?user_id={uid}", json={"atomic": True, "ops": [
+        {"op": "add", "course_id": courses[1], "semester_id": sems[0]},
+        {"op": "add", "course_id": 10**9, "semester_id": sems[0]},
+        {"op": "remove", "id": kept["id"]},
+    ]})
+    assert r.status_code == 409
+    body = r.get_json()
+    assert body["semesters"] is None
+    assert body["results"] == [
+        {"index": 0, "ok": True, "status": 201, "applied": False},
+        {"index": 1, "ok": False, "status": 404, "error": "course not found"},
+        {"index": 2, "ok": True, "status": 204, "id": kept["id"], "applied": False},
+    ]
+    db.session.expire_all()
+    assert [sc.id for sc in db.session.query(StudentCourse).filter_by(student_id=uid)] == [kept["id"]]
+
+    r = client.post(f"/api/classes/batch?user_id={uid}", json={"atomic": True, "ops": [
+        {"op": "add", "course_id": courses[1], "semester_id": sems[0]},
+    ]})
+    assert r.status_code == 200
+    result = r.get_json()["results"][0]
+    assert result["applied"] is True and result["class"]["code"] == "ATM 1001"
+
+
+def test_tampered_course_cursor_is_a_400(client):
+    good = client.get("/api/courses?unassigned=0&limit=2").headers["X-Next-Cursor"]
+    assert client.get(f"/api/courses?unassigned=0&limit=2&cursor={good}").status_code == 200
+    for key in ([{"a": 1}, 2], ["CSCI 135", "7"], [None, 1], ["CSCI 135"]):
+        r = client.get(f"/api/courses?unassigned=0&limit=2&cursor={encode_cursor(key)}")
+        assert r.status_code == 400, key
+    assert client.get("/api/courses?unassigned=0&cursor=not-base64!").status_code == 400
+
+
+def test_non_object_json_bodies_are_a_400(client):
+    sem_id = client.post("/api/semesters", json={"name": "Bodies", "term": "FALL", "year": 2031}).get_json()["id"]
+    course = client.get("/api/courses?unassigned=1&limit=1").get_json()[0]
+    sc_id = client.post("/api/classes", json={"course_id": course["id"], "semester_id": sem_id}).get_json()["id"]
+    for body in ([], [1], "x", 3):
+        r = client.patch(f"/api/classes/{sc_id}", json=body)
+        assert r.status_code == 400, body
+        assert client.post("/api/classes/batch", json=body).status_code == 400, body
+        assert client.post("/api/classes", json=body).status_code == 400, body
+        assert client.post("/api/semesters", json=body).status_code == 400, body
+    r = client.post("/api/classes", json={"course_id": [course["id"]], "semester_id": sem_id})
+    assert r.status_code == 400
+    for ops in ({"op": "add"}, "ops", [], None):
+        assert client.post("/api/classes/batch", json={"ops": ops}).status_code == 400, ops
+
+
+def test_plan_reads_revalidate_with_etags(client):
+    other = make_plan("ETG", semesters=1, classes=1)
+    urls = ["/api/semesters", "/api/requirements", "/api/plan/validate", "/api/audit?program=BS-CS-Core-2025"]
+    etags = {}
+    for url in urls:
+        r = client.get(url)
+        assert r.status_code == 200 and r.headers["ETag"], url
+        etags[url] = r.headers["ETag"]
+        r = client.get(url, headers={"If-None-Match": etags[url]})
+        assert r.status_code == 304 and r.get_data() == b"", url
+        assert r.headers["ETag"] == etags[url]
+    other_etag = client.get(f"/api/semesters?user_id={other}").headers["ETag"]
+
+    # a plan write changes the version every one of them is keyed on
+    assert client.post("/api/semesters", json={"name": "ETag", "term": "FALL", "year": 2032}).status_code == 201
+    for url in urls:
+        r = client.get(url, headers={"If-None-Match": etags[url]})
+        assert r.status_code == 200, url
+        assert r.headers["ETag"] != etags[url], url
+        assert client.get(url, headers={"If-None-Match": r.headers["ETag"]}).status_code == 304, url
+    # someone else's plan is untouched
+    r = client.get(f"/api/semesters?user_id={other}", headers={"If-None-Match": other_etag})
+    assert r.status_code == 304
@@ -0,0 +1,52 @@
+import logging
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+import models.search
+from models.models import db, CourseCatalog
+from models.search import ensure_course_search
+
+
+def codes(client, q: str) -> list[str]:
+    r = client.get("/api/courses", query_string={"unassigned": 0, "q": q, "limit": 200})
+    assert r.status_code == 200
+    return [c["code"] for c in r.get_json()]
+
+
+def test_search_by_title_word_and_code_prefix_follows_catalog_writes(client, app):
+    assert app.config["COURSE_FTS"]
+    assert "CSCI 220" in codes(client, "csci 22")
+    assert "CSCI 220" in codes(client, "csci22")
+    assert all(code.startswith("CSCI 2") for code in codes(client, "csci 2"))
+    title = db.session.query(CourseCatalog).filter_by(code="CSCI 220").one().title
+    word = max(title.split(), key=len)
+    assert "CSCI 220" in codes(client, word.lower())
+
+    # the triggers keep the index in step with inserts and renames
+    course = CourseCatalog(code="ZOO 101", title="Marsupial Husbandry", credits=3.0)
+    db.session.add(course)
+    db.session.commit()
+    assert codes(client, "marsup") == ["ZOO 101"]
+    assert codes(client, "zoo 1") == ["ZOO 101"]
+    course.title = "Monotreme Husbandry"
+    db.session.commit()
+    assert codes(client, "marsup") == []
+    assert codes(client, "monotreme husb") == ["ZOO 101"]
+
+
+def test_missing_fts5_falls_back_but_other_errors_surface(tmp_path, monkeypatch, caplog):
+    engine = create_engine(f"sqlite:///{tmp_path / 'nofts.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE course_catalog (id INTEGER PRIMARY KEY, code, title, description)")
+    # what a SQLite built without FTS5 says
+    monkeypatch.setattr(models.search, "_DDL", ["CREATE VIRTUAL TABLE course_catalog_fts USING no_such_module(code)"])
+    with caplog.at_level(logging.WARNING, logger="models.search"):
+        assert ensure_course_search(engine) is False
+    assert "falling back to LIKE" in caplog.text
+
+    monkeypatch.setattr(models.search, "_DDL", [42])  # a bug, not a missing module
+    with pytest.raises(Exception) as exc:
+        ensure_course_search(engine)
+    assert not isinstance(exc.value, OperationalError)
@@ -0,0 +1,91 @@
+"""
+Plan writes from several threads at once, each thread the only writer of
+its own plan. Nothing conflicts, so a 409 here means the write path raced
+with itself. bench/stress_writes.py is for load numbers, not for this.
+"""
+import threading
+
+from models.models import db, User
+
+THREADS = 6
+
+
+def write_sequence(client, uid: int, course_ids: list[int]) -> list[tuple[str, int]]:
+    out = []
+
+    def call(label: str, method: str, url: str, **kw):
+        r = client.open(f"{url}?user_id={uid}", method=method, **kw)
+        out.append((label, r.status_code))
+        return r.get_json(silent=True)
+
+    sems = [
+        call("add semester", "POST", "/api/semesters", json={"name": f"T{i}", "term": "FALL", "year": 2030 + i})["id"]
+        for i in range(2)
+    ]
+    classes = [
+        call("add class", "POST", "/api/classes", json={"course_id": cid, "semester_id": sems[i % 2]})["id"]
+        for i, cid in enumerate(course_ids[:6])
+    ]
+    for i, sc_id in enumerate(classes[:4]):
+        call("move class", "PATCH", f"/api/classes/{sc_id}", json={"semester_id": sems[(i + 1) % 2]})
+    call("move class", "PATCH", f"/api/classes/{classes[5]}", json={"semester_id": sems[0], "before_id": classes[1]})
+    call("delete class", "DELETE", f"/api/classes/{classes[0]}")
+    batch = call("batch", "POST", "/api/classes/batch", json={"ops": [
+        {"op": "remove", "id": classes[2]},
+        {"op": "add", "course_id": course_ids[6], "semester_id": sems[0]},
+        {"op": "add", "course_id": course_ids[7], "semester_id": sems[1]},
+    ]})
+    out.extend(("batch op", r["status"]) for r in batch["results"])
+    return out
+
+
+def run_threads(target, args: list) -> None:
+    errors: list[BaseException] = []
+    start = threading.Barrier(len(args))
+
+    def run(arg) -> None:
+        try:
+            start.wait()
+            target(arg)
+        except BaseException as e:  # surfaced below, not lost in the thread
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(a,)) for a in args]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors, errors
+
+
+def test_single_writer_sequences_never_conflict(app):
+    users = [User(email=f"writer{i}@example.com", name=f"Writer {i}") for i in range(THREADS)]
+    db.session.add_all(users)
+    db.session.commit()
+    uids = [u.id for u in users]
+    course_ids = [c["id"] for c in app.test_client().get("/api/courses?limit=8").get_json()]
+    assert len(course_ids) == 8
+
+    results: dict[int, list[tuple[str, int]]] = {}
+    run_threads(lambda uid: results.__setitem__(uid, write_sequence(app.test_client(), uid, course_ids)), uids)
+
+    for uid in uids:
+        bad = [(label, status) for label, status in results[uid] if status >= 300]
+        assert not bad, (uid, bad)
+
+
+def test_concurrent_adds_to_one_semester_never_conflict(app):
+    # every thread appends to the same semester, so each add reads the same
+    # last position unless plan writes really are one at a time
+    client = app.test_client()
+    sem_id = client.post("/api/semesters", json={"name": "Shared", "term": "FALL", "year": 2030}).get_json()["id"]
+    courses = client.get("/api/courses?unassigned=1&limit=50").get_json()
+    course_ids = [c["id"] for c in courses if c["credits"] <= 3][:THREADS]  # all fit under the credit cap
+    assert len(course_ids) == THREADS
+    statuses: list[int] = []
+
+    def add(cid: int) -> None:
+        statuses.append(app.test_client().post("/api/classes", json={"course_id": cid, "semester_id": sem_id}).status_code)
+
+    run_threads(add, course_ids)
+    assert statuses == [201] * THREADS